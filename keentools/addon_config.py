@@ -109,6 +109,29 @@ class Config:
 
     default_tone_exposure = 0.0
     default_tone_gamma = 1.0
+    tone_mapping_cache_size = 2
+    tone_mapping_preview_step = 4  # 1 means no reduced preview on drag
+    tone_mapping_interactive_interval = 0.25  # seconds between slider events
+    # Keep cached frames as uint8 / float16 instead of float32,
+    # conversion to float32 happens only at pykeentools boundary
+    compact_pixel_pipeline = False
+    pixel_buffer_pool_size = 2  # free buffers kept per image size
+    # Wireframe level of detail while pins are dragged or timeline scrubbed
+    wireframe_lod_min_edges = 300000  # LOD is used only for heavier meshes
+    wireframe_lod_edges = 150000
+    wireframe_lod_idle_delay = 0.3  # seconds after last interaction event
+
+    # Pin drag updates are coalesced when solve is slower than frame budget
+    pin_drag_frame_budget = 1.0 / 60
+
+    # Hot-path profiler: solve, batch rebuild, redraw and frame load timings
+    hot_path_profiling = False
+    profiler_buffer_size = 512  # records per stage
+    profiler_trace_filename = 'keentools_trace.json'
+
+    # Serialization strings stored in blend-file
+    serial_compression_prefix = 'zlib64:'
+    serial_compression_level = 1  # fast, saved after most operations
 
     default_updater_preferences = {
         'latest_show_datetime_update_reminder': {'value': '', 'type': 'string'},
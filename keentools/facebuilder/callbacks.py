@@ -16,7 +16,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 import logging
-import numpy as np
 import bpy
 from typing import Any
 
@@ -27,7 +26,8 @@ from ..utils import coords
 from ..utils.manipulate import (get_vertex_groups,
                                 create_vertex_groups)
 from ..utils.blendshapes import (restore_facs_blendshapes,
-                                 disconnect_blendshapes_action)
+                                 disconnect_blendshapes_action,
+                                 transfer_shape_keys)
 from ..blender_independent_packages.pykeentools_loader import module as pkt_module
 from ..preferences.user_preferences import UserPreferences
 
@@ -195,13 +195,7 @@ def _update_mesh_now(headnum):
 
     # Copy blendshapes and animation
     if old_mesh.shape_keys and len(old_mesh.vertices) == len(mesh.vertices):
-        for kb in old_mesh.shape_keys.key_blocks:
-            shape = head.headobj.shape_key_add(name=kb.name)
-            count = len(kb.data)
-            verts = np.empty((count, 3), dtype=np.float32)
-            kb.data.foreach_get('co', np.reshape(verts, count * 3))
-            shape.data.foreach_set('co', verts.ravel())
-            shape.value = kb.value
+        transfer_shape_keys(old_mesh, head.headobj)
         if old_mesh.shape_keys.animation_data and old_mesh.shape_keys.animation_data.action:
             mesh.shape_keys.animation_data_create()
             mesh.shape_keys.animation_data.action = old_mesh.shape_keys.animation_data.action
@@ -212,7 +206,7 @@ def _update_mesh_now(headnum):
         wf = vp.wireframer()
         wf.init_geom_data_from_fb(fb, head.headobj,
                                   head.get_keyframe(settings.current_camnum))
-        wf.init_edge_indices(fb)
+        wf.init_edge_indices(fb, FBLoader.edge_indices_key(head))
         vp.update_wireframe_colors()
 
     if recreate_vertex_groups_flag:
@@ -29,9 +29,13 @@ from ..utils.focal_length import (configure_focal_mode_and_fixes,
 from ..utils import attrs, coords
 from ..facebuilder.utils.exif_reader import reload_all_camera_exif
 from ..utils.timer import KTStopShaderTimer
+from ..utils.profiling import profile_stage
 from ..utils.other import unhide_viewport_ui_elements_from_object
 from ..utils.ui_redraw import force_ui_redraw
+from ..utils.images import clear_tone_mapping_cache
+from ..utils.serial_storage import serial_hash
 from .viewport import FBViewport
+from .utils.edges import mesh_face_corners
 from ..blender_independent_packages.pykeentools_loader import module as pkt_module
 
 
@@ -61,6 +65,8 @@ def force_stop_fb_shaders():
 class FBLoader:
     _camera_input = None
     _builder_instance = None
+    # Hash of the serial that _builder_instance state corresponds to
+    _loaded_serial_hash = None
     _viewport = FBViewport()
     _check_shader_timer = KTStopShaderTimer(get_fb_settings, force_stop_fb_shaders)
 
@@ -81,14 +87,22 @@ class FBLoader:
         from .camera_input import FaceBuilderCameraInput
         cls._camera_input = FaceBuilderCameraInput()
         cls._builder_instance = pkt_module().FaceBuilder(cls._camera_input)
+        cls._loaded_serial_hash = None
         return cls._builder_instance
 
     @classmethod
-    def get_builder(cls):
+    def _builder(cls):
         if cls._builder_instance is not None:
             return cls._builder_instance
         return cls.new_builder()
 
+    @classmethod
+    def get_builder(cls):
+        # The caller can change the builder, so its state is not considered
+        # equal to the stored serial until the next save or load
+        cls._loaded_serial_hash = None
+        return cls._builder()
+
     @classmethod
     def is_not_loaded(cls):
         return cls._builder_instance is None
@@ -163,6 +177,9 @@ class FBLoader:
         camera = head.get_camera(settings.current_camnum)
         if camera:
             camera.reset_tone_mapping()
+        clear_tone_mapping_cache()
+        from ..utils.materials import clear_bake_frames_cache
+        clear_bake_frames_cache()
 
     @classmethod
     def out_pinmode(cls, headnum):
@@ -176,7 +193,9 @@ class FBLoader:
         if not head:
             return
         fb = cls.get_builder()
-        head.store_serial_str_in_head_and_on_headobj(fb.serialize())
+        serial = fb.serialize()
+        head.store_serial_str_in_head_and_on_headobj(serial)
+        cls._loaded_serial_hash = serial_hash(serial)
 
     @classmethod
     def _save_fb_images_and_keentools_attribute_on_headobj(cls, headnum):
@@ -314,21 +333,31 @@ class FBLoader:
             geo = builder.applied_args_model()
         me = geo.mesh(0)
 
+        if keyframe is not None:
+            vertices = builder.applied_args_model_vertices_at(keyframe)
+        else:
+            vertices = builder.applied_args_vertices()
         v_count = me.points_count()
-        vertices = np.empty((v_count, 3), dtype=np.float32)
-        for i in range(v_count):
-            vertices[i] = me.point(i)
+        if len(vertices) != v_count:
+            vertices = np.array([me.point(i) for i in range(v_count)],
+                                dtype=np.float32).reshape(-1, 3)
 
         vertices2 = vertices @ xy_to_xz_rotation_matrix_3x3()
 
-        f_count = me.faces_count()
-        faces = np.empty(f_count, dtype=np.object)
-
-        for i in range(f_count):
-            faces[i] = [me.face_point(i, j) for j in range(me.face_size(i))]
+        face_sizes, loop_indices, uvs = mesh_face_corners(me)
+        f_count = len(face_sizes)
+        loop_count = len(loop_indices)
 
         mesh = bpy.data.meshes.new(mesh_name)
-        mesh.from_pydata(vertices2, [], faces.tolist())
+        mesh.vertices.add(v_count)
+        mesh.vertices.foreach_set(
+            'co', np.ascontiguousarray(vertices2, dtype=np.float32).ravel())
+        mesh.loops.add(loop_count)
+        mesh.loops.foreach_set('vertex_index', loop_indices)
+        mesh.polygons.add(f_count)
+        mesh.polygons.foreach_set('loop_start',
+                                  np.cumsum(face_sizes) - face_sizes)
+        mesh.polygons.foreach_set('loop_total', face_sizes)
 
         # Normals are not in use yet
         # Init Custom Normals (work on Shading Flat only!)
@@ -337,15 +366,11 @@ class FBLoader:
         # mesh.normals_split_custom_set(normals)
 
         # Simple Shade Smooth analog
-        values = [True] * len(mesh.polygons)
-        mesh.polygons.foreach_set('use_smooth', values)
+        mesh.polygons.foreach_set('use_smooth', np.ones(f_count, dtype=np.bool_))
+        mesh.update(calc_edges=True)
 
         uvtex = mesh.uv_layers.new()
-        uvmap = uvtex.data
-        # Fill uvs in uvmap
-        uvs_count = me.uvs_count()
-        for i in range(uvs_count):
-            uvmap[i].uv = me.uv(i)
+        uvtex.data.foreach_set('uv', uvs.ravel())
 
         mesh.update()
 
@@ -364,10 +389,17 @@ class FBLoader:
 
     @classmethod
     def _load_model_from_head(cls, head):
-        fb = cls.get_builder()
-        if not fb.deserialize(head.get_serial_str()):
-            _log_warning(f'DESERIALIZE ERROR: {head.get_serial_str()}')
+        fb = cls._builder()
+        serial = head.get_serial_str()
+        current_hash = serial_hash(serial)
+        if current_hash == cls._loaded_serial_hash:
+            _log_output('_load_model_from_head: serial is already loaded')
+            return True
+        cls._loaded_serial_hash = None
+        if not fb.deserialize(serial):
+            _log_warning(f'DESERIALIZE ERROR: {serial}')
             return False
+        cls._loaded_serial_hash = current_hash
         return True
 
     @classmethod
@@ -383,7 +415,7 @@ class FBLoader:
         _log_output('_deserialize_global_options call')
         settings = get_fb_settings()
         head = settings.get_head(headnum)  # we assume that head is checked
-        fb = cls.get_builder()
+        fb = cls._builder()
         with settings.ui_write_mode_context():
             try:
                 head.use_emotions = fb.use_emotions()
@@ -427,6 +459,7 @@ class FBLoader:
             camobj.matrix_world = mat
 
     @classmethod
+    @profile_stage('solve')
     def solve(cls, headnum, camnum):
         def _exception_handling(headnum, msg, license_err=True):
             _log_error(msg)
@@ -600,13 +633,16 @@ class FBLoader:
         return cls.add_new_camera(headnum, img)
 
     @classmethod
-    def _update_wireframe(cls, obj, keyframe):
+    def edge_indices_key(cls, head):
+        return head.model_type, head.tex_uv_shape, tuple(head.get_masks())
+
+    @classmethod
+    def _update_wireframe(cls, head, keyframe):
         fb = cls.get_builder()
         vp = cls.viewport()
         wf = vp.wireframer()
-        wf.init_geom_data_from_fb(fb, obj, keyframe)
-        wf.init_edge_indices(fb)
-        wf.create_batches()
+        wf.init_geom_data_from_fb(fb, head.headobj, keyframe)
+        wf.init_edge_indices(fb, cls.edge_indices_key(head))
 
     @classmethod
     def _update_points_and_residuals(cls, area, obj, keyframe):
@@ -623,7 +659,7 @@ class FBLoader:
         if not head or not head.headobj:
             return
         kid = head.get_keyframe(camnum)
-        cls._update_wireframe(head.headobj, kid)
+        cls._update_wireframe(head, kid)
         cls._update_points_and_residuals(area, head.headobj, kid)
 
     @classmethod
@@ -633,7 +669,7 @@ class FBLoader:
         if not head or not head.headobj:
             return
         kid = head.get_keyframe(camnum)
-        cls._update_wireframe(head.headobj, kid)
+        cls._update_wireframe(head, kid)
 
     @classmethod
     def load_pins_into_viewport(cls, headnum, camnum):
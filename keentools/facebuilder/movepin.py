@@ -23,6 +23,8 @@ from bpy.props import IntProperty, FloatProperty, StringProperty
 
 from ..utils.kt_logging import KTLogger
 from ..utils.bpy_common import bpy_background_mode
+from ..utils.timer import KTDragUpdates
+from ..utils.profiling import profile_stage
 from ..utils import coords
 from .fbloader import FBLoader
 from ..facebuilder_config import FBConfig, get_fb_settings
@@ -72,6 +74,11 @@ class FB_OT_MovePin(Operator):
     def get_camnum(self):
         return self.camnum
 
+    def _drag_updates(self):
+        if not hasattr(self, '_drag_updates_instance'):
+            self._drag_updates_instance = KTDragUpdates()
+        return self._drag_updates_instance
+
     def _new_pin(self, area, mouse_x, mouse_y):
         settings = get_fb_settings()
         headnum = self.get_headnum()
@@ -122,7 +129,7 @@ class FB_OT_MovePin(Operator):
         x, y = coords.get_image_space_coord(mouse_x, mouse_y, area)
         vp.pins().set_current_pin((x, y))
 
-        nearest, dist2 = coords.nearest_point(x, y, vp.pins().arr())
+        nearest, dist2 = vp.pins().nearest_pin(x, y)
 
         if nearest >= 0 and dist2 < vp.tolerance_dist2():
             vp.pins().set_current_pin_num(nearest)
@@ -130,6 +137,11 @@ class FB_OT_MovePin(Operator):
             return self._new_pin(area, mouse_x, mouse_y)
 
     def on_left_mouse_release(self, area, mouse_x, mouse_y):
+        drag_updates = self._drag_updates()
+        if drag_updates.has_pending():
+            self._flush_drag_updates(area)
+        drag_updates.stop_timer()
+
         settings = get_fb_settings()
         headnum = self.get_headnum()
         camnum = self.get_camnum()
@@ -141,7 +153,7 @@ class FB_OT_MovePin(Operator):
         pins = vp.pins()
         if pins.current_pin() is not None:
             # Move current 2D-pin
-            pins.arr()[pins.current_pin_num()] = (x, y)
+            pins.set_pin(pins.current_pin_num(), (x, y))
 
         FBLoader.update_head_camobj_focals(headnum)
 
@@ -170,10 +182,37 @@ class FB_OT_MovePin(Operator):
         pins = FBLoader.viewport().pins()
         pins.set_current_pin((x, y))
         pin_idx = pins.current_pin_num()
-        pins.arr()[pin_idx] = (x, y)
+        pins.set_pin(pin_idx, (x, y))
         fb.move_pin(kid, pin_idx, coords.image_space_to_frame(x, y))
 
     def on_mouse_move(self, area, mouse_x, mouse_y):
+        drag_updates = self._drag_updates()
+        drag_updates.push(mouse_x, mouse_y)
+        if not drag_updates.is_due():
+            self._move_current_pin_2d(area, mouse_x, mouse_y)
+            return self.on_default_modal()
+        return self._flush_drag_updates(area)
+
+    def _flush_drag_updates(self, area):
+        drag_updates = self._drag_updates()
+        mouse_x, mouse_y = drag_updates.pop()
+        with drag_updates.measure():
+            return self._update_dragged_pin(area, mouse_x, mouse_y)
+
+    @staticmethod
+    def _move_current_pin_2d(area, mouse_x, mouse_y):
+        # Solve is deferred, only the pin follows the cursor
+        x, y = coords.get_image_space_coord(mouse_x, mouse_y, area)
+        vp = FBLoader.viewport()
+        pins = vp.pins()
+        pins.set_current_pin((x, y))
+        pins.set_pin(pins.current_pin_num(), (x, y))
+        vp.create_batch_2d(area)
+        if not bpy_background_mode():
+            vp.tag_redraw()
+
+    @profile_stage('pin_drag')
+    def _update_dragged_pin(self, area, mouse_x, mouse_y):
         settings = get_fb_settings()
         headnum = self.get_headnum()
         camnum = self.get_camnum()
@@ -185,6 +224,7 @@ class FB_OT_MovePin(Operator):
 
         if not FBLoader.solve(headnum, camnum):
             _log.error('MOVE PIN PROBLEM')
+            self._drag_updates().stop_timer()
             return {'FINISHED'}
 
         fb = FBLoader.get_builder()
@@ -194,7 +234,6 @@ class FB_OT_MovePin(Operator):
         vp = FBLoader.viewport()
         vp.wireframer().init_geom_data_from_fb(fb, headobj, kid)
         vp.wireframer().update_edges_vertices()
-        vp.wireframer().create_batches()
         vp.create_batch_2d(area)
         vp.update_surface_points(fb, headobj, kid)
 
@@ -204,12 +243,12 @@ class FB_OT_MovePin(Operator):
 
         return self.on_default_modal()
 
-    @staticmethod
-    def on_default_modal():
+    def on_default_modal(self):
         if FBLoader.viewport().pins().current_pin() is not None:
             return {'RUNNING_MODAL'}
 
         _log.output('MOVE PIN FINISH')
+        self._drag_updates().stop_timer()
         return {'FINISHED'}
 
     # Integration testing purpose only
@@ -233,6 +272,7 @@ class FB_OT_MovePin(Operator):
             return ret
         FBLoader.viewport().create_batch_2d(context.area)
         context.window_manager.modal_handler_add(self)
+        self._drag_updates().start_timer(context)
         _log.output('START PIN MOVING')
         return {"RUNNING_MODAL"}
 
@@ -247,7 +287,11 @@ class FB_OT_MovePin(Operator):
 
         if event.type == 'MOUSEMOVE' \
                 and FBLoader.viewport().pins().current_pin() is not None:
-            _log.output(f'MOUSEMOVE {mouse_x} {mouse_y}')
+            _log.output('MOUSEMOVE %s %s', mouse_x, mouse_y)
             return self.on_mouse_move(context.area, mouse_x, mouse_y)
 
+        if event.type == 'TIMER' and self._drag_updates().has_pending() \
+                and self._drag_updates().is_due():
+            return self._flush_drag_updates(context.area)
+
         return self.on_default_modal()
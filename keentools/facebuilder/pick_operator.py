@@ -58,7 +58,7 @@ def _set_detected_faces(faces_info: List[Any]) -> None:
 
 def _get_detected_faces_rectangles() -> List[Tuple]:
     faces = get_detected_faces()
-    _log.output(f'_get_detected_faces: {faces}')
+    _log.output('_get_detected_faces: %s', faces)
     rects = []
     for i, face in enumerate(faces):
         x1, y1 = face.xy_min
@@ -93,9 +93,9 @@ def init_detected_faces(fb: Any, headnum: int, camnum: int) -> Optional[Any]:
 def sort_detected_faces() -> List[Tuple]:
     faces = get_detected_faces()
     rects = _get_detected_faces_rectangles()
-    _log.output(f'RECTS BEFORE: {rects}')
+    _log.output('RECTS BEFORE: %s', rects)
     rects.sort(key=lambda x: x[0])  # order by x1
-    _log.output(f'RECTS AFTER: {rects}')
+    _log.output('RECTS AFTER: %s', rects)
     _set_detected_faces([faces[x[4]] for x in rects])
     return rects
 
@@ -169,7 +169,6 @@ class FB_OT_PickMode(Operator):
         vp = FBLoader.viewport()
         rectangler = vp.rectangler()
         rectangler.prepare_shader_data(area)
-        rectangler.create_batch()
         vp.create_batch_2d(area)
 
     def _get_rectangler(self) -> Any:
@@ -178,7 +177,6 @@ class FB_OT_PickMode(Operator):
     def _update_rectangler_shader(self, area: Area) -> None:
         rectangler = self._get_rectangler()
         rectangler.prepare_shader_data(area)
-        rectangler.create_batch()
         area.tag_redraw()
 
     def _before_operator_stop(self, area: Area) -> None:
@@ -35,7 +35,6 @@ from ..utils.bpy_common import (operator_with_context,
                                 bpy_render_frame)
 from ..utils.coords import (update_head_mesh_non_neutral,
                             get_image_space_coord,
-                            nearest_point,
                             point_is_in_area,
                             point_is_in_service_region,
                             get_area_region,
@@ -45,6 +44,7 @@ from .fbloader import FBLoader
 from ..utils.focal_length import update_camera_focal
 from ..utils.other import hide_viewport_ui_elements_and_store_on_object
 from ..utils.html import split_long_string
+from ..utils.profiling import KTProfiler
 from ..utils.localview import exit_area_localview, check_area_active_problem
 from ..utils.manipulate import switch_to_camera, center_viewports_on_object
 from .ui_strings import buttons
@@ -158,8 +158,7 @@ class FB_OT_PinMode(bpy.types.Operator):
 
         wf.init_geom_data_from_fb(fb, head.headobj,
                                   head.get_keyframe(settings.current_camnum))
-        wf.init_edge_indices(fb)
-        wf.create_batches()
+        wf.init_edge_indices(fb, FBLoader.edge_indices_key(head))
 
     def _change_wireframe_visibility(self, *, toggle=True, value=True):
         vp = FBLoader.viewport()
@@ -182,7 +181,7 @@ class FB_OT_PinMode(bpy.types.Operator):
 
         fb = FBLoader.get_builder()
         fb.remove_pin(kid, nearest)
-        del FBLoader.viewport().pins().arr()[nearest]
+        FBLoader.viewport().pins().remove_pin(nearest)
         _log.output('FB PIN REMOVED {}'.format(nearest))
 
         if not FBLoader.solve(headnum, camnum):
@@ -222,7 +221,7 @@ class FB_OT_PinMode(bpy.types.Operator):
 
         x, y = get_image_space_coord(mouse_x, mouse_y, area)
 
-        nearest, dist2 = nearest_point(x, y, vp.pins().arr())
+        nearest, dist2 = vp.pins().nearest_pin(x, y)
         if nearest >= 0 and dist2 < FBLoader.viewport().tolerance_dist2():
             return self._delete_found_pin(nearest, area)
 
@@ -452,6 +451,8 @@ class FB_OT_PinMode(bpy.types.Operator):
             if FBLoader.viewport().profiling:
                 pr = FBLoader.viewport().pr
                 pr.dump_stats('facebuilder.pstat')
+            if KTProfiler.is_enabled():
+                KTProfiler.save_chrome_trace()
             # --- PROFILING ---
             bpy_view_camera()
             return True
@@ -518,6 +519,9 @@ class FB_OT_PinMode(bpy.types.Operator):
             FBLoader.out_pinmode(headnum)
             return {'FINISHED'}
 
+        if event.type == 'TIMER' and KTProfiler.is_enabled():
+            vp.update_profiler_overlay()
+
         vp.create_batch_2d(context.area)
         vp.update_residuals(FBLoader.get_builder(), kid, context.area)
 
@@ -16,7 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 
-from typing import Any, Tuple, List, Optional
+from typing import Any, Dict, Tuple, List, Optional
 import numpy as np
 
 import bpy
@@ -27,7 +27,9 @@ from gpu_extras.batch import batch_for_shader
 
 from ...facebuilder_config import FBConfig
 from ...utils.bpy_common import bpy_background_mode
-from ...utils.edges import KTEdgeShaderBase, KTEdgeShader2D
+from ...utils.edges import (KTEdgeShaderBase,
+                            KTEdgeShader2D,
+                            loop_edge_pairs)
 from ...utils.coords import (frame_to_image_space,
                              get_camera_border,
                              image_space_to_region,
@@ -43,8 +45,31 @@ from ...utils.shaders import (solid_line_vertex_shader,
 from ...utils.images import (check_bpy_image_has_same_size,
                              find_bpy_image_by_name,
                              remove_bpy_image,
-                             assign_pixels_data,
-                             inverse_gamma_color)
+                             assign_pixels_data)
+from ...utils.color_transform import inverse_gamma_colors
+
+
+def mesh_face_corners(me: Any) -> Tuple[Any, Any, Any]:
+    ''' Face sizes (F,), corner point indices (C,) and corner UVs (C, 2)
+        of pykeentools mesh. Its bindings have no bulk getters,
+        so all corners are walked once here '''
+    face_sizes = np.array([me.face_size(x) for x in range(me.faces_count())],
+                          dtype=np.int32)
+    corners = [(face, k) for face, count in enumerate(face_sizes.tolist())
+               for k in range(count)]
+    points = np.array([me.face_point(face, k) for face, k in corners],
+                      dtype=np.int32)
+    uvs = np.array([me.uv(face, k) for face, k in corners],
+                   dtype=np.float32).reshape(-1, 2)
+    return face_sizes, points, uvs
+
+
+def mesh_edge_indices_and_uvs(me: Any) -> Tuple[Any, Any]:
+    ''' Edges point indices (E, 2) and their UVs (2E, 2) of pykeentools
+        mesh. Corner data is read in one pass, edges are built with numpy '''
+    face_sizes, points, uvs = mesh_face_corners(me)
+    pairs = loop_edge_pairs(face_sizes)
+    return points[pairs].reshape(-1, 2), uvs[pairs]
 
 
 class FBRectangleShader2D(KTEdgeShader2D):
@@ -138,13 +163,15 @@ class FBRasterEdgeShader3D(KTEdgeShaderBase):
     def __init__(self, target_class: Any=SpaceView3D):
         self._edges_indices = np.array([], dtype=np.int32)
         self._edges_uvs = []
+        self._edge_indices_cache: Dict[Tuple, Tuple[Any, Any]] = {}
         self._colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
         self._opacity = 0.3
         self._use_simple_shader = False
         super().__init__(target_class)
 
     def init_colors(self, colors: List, opacity: float) -> None:
-        self._colors = [inverse_gamma_color(color[:3]) for color in colors]
+        self._colors = inverse_gamma_colors(
+            [color[:3] for color in colors]).tolist()
         self._opacity = opacity
 
     def switch_to_simple_shader(self) -> None:
@@ -279,6 +306,9 @@ class FBRasterEdgeShader3D(KTEdgeShaderBase):
             {'pos': self.edges_vertices, 'texCoord': self._edges_uvs}
         )
 
+    def rebuild_batches(self) -> None:
+        self.create_batches()
+
     def init_shaders(self) -> None:
         self.fill_shader = gpu.types.GPUShader(
             simple_fill_vertex_shader(), black_fill_fragment_shader())
@@ -300,6 +330,8 @@ class FBRasterEdgeShader3D(KTEdgeShaderBase):
         m = np.array(obj.matrix_world, dtype=np.float32).transpose()
         self.vertices = multiply_verts_on_matrix_4x4(geom_verts, m)
         self.triangle_indices = get_triangulation_indices(obj.data)
+        self.update_batch_inputs(vertices=self.vertices,
+                                 triangle_indices=self.triangle_indices)
 
     def init_geom_data_from_mesh(self, obj: Object) -> None:
         mesh = obj.data
@@ -310,41 +342,38 @@ class FBRasterEdgeShader3D(KTEdgeShaderBase):
         m = np.array(obj.matrix_world, dtype=np.float32).transpose()
         self.vertices = multiply_verts_on_matrix_4x4(verts, m)
         self.triangle_indices = get_triangulation_indices(mesh)
+        self.update_batch_inputs(vertices=self.vertices,
+                                 triangle_indices=self.triangle_indices)
 
     def _clear_edge_indices(self) -> None:
         self._edges_indices = np.array([], dtype=np.int32)
         self._edges_uvs = []
+        self.update_batch_inputs(edges_indices=self._edges_indices)
 
-    def init_edge_indices(self, builder: Any) -> None:
+    def init_edge_indices(self, builder: Any,
+                          key: Optional[Tuple]=None) -> None:
+        ''' key is (model, UV set, masks), edge topology
+            is not recalculated for already known keys '''
         if not builder.face_texture_available():
             self._clear_edge_indices()
             return
-        keyframes = builder.keyframes()
-        if len(keyframes) == 0:
-            return
-        geo = builder.applied_args_replaced_uvs_model_at(keyframes[0])
-        me = geo.mesh(0)
-        face_counts = [me.face_size(x) for x in range(me.faces_count())]
-        indices = np.empty((sum(face_counts), 2), dtype=np.int32)
-        tex_coords = np.empty((sum(face_counts) * 2, 2), dtype=np.float32)
-
-        i = 0
-        for face, count in enumerate(face_counts):
-            tex_coords[i * 2] = me.uv(face, count - 1)
-            tex_coords[i * 2 + 1] = me.uv(face, 0)
-            indices[i] = (me.face_point(face, count - 1),
-                          me.face_point(face, 0))
-            i += 1
-            for k in range(1, count):
-                tex_coords[i * 2] = me.uv(face, k - 1)
-                tex_coords[i * 2 +1] = me.uv(face, k)
-                indices[i] = (me.face_point(face, k - 1),
-                              me.face_point(face, k))
-                i += 1
-
-        self._edges_indices = indices
-        self._edges_uvs = tex_coords
+        item = None if key is None else self._edge_indices_cache.get(key)
+        if item is None:
+            keyframes = builder.keyframes()
+            if len(keyframes) == 0:
+                return
+            geo = builder.applied_args_replaced_uvs_model_at(keyframes[0])
+            item = mesh_edge_indices_and_uvs(geo.mesh(0))
+            if key is not None:
+                if len(self._edge_indices_cache) >= \
+                        FBConfig.edge_indices_cache_size:
+                    self._edge_indices_cache = {}
+                self._edge_indices_cache[key] = item
+
+        self._edges_indices, self._edges_uvs = item
         self.update_edges_vertices()
 
     def update_edges_vertices(self) -> None:
         self.edges_vertices = self.vertices[self._edges_indices.ravel()]
+        self.update_batch_inputs(edges_indices=self._edges_indices,
+                                 edges_vertices=self.edges_vertices)
@@ -24,11 +24,14 @@ from bpy.types import Object, Area, SpaceView3D
 from ..facebuilder_config import FBConfig, get_fb_settings
 from ..utils.bpy_common import bpy_render_frame
 from ..utils.coords import (multiply_verts_on_matrix_4x4,
-                            pin_to_xyz_from_mesh,
-                            pin_to_xyz_from_fb_geo_mesh,
+                            get_mesh_verts,
+                            surface_points_from_verts,
+                            surface_points_from_geo_mesh,
                             xy_to_xz_rotation_matrix_3x3,
                             frame_to_image_space,
                             image_space_to_region,
+                            image_space_to_region_array,
+                            frame_to_region_array,
                             get_camera_border,
                             get_area_region_3d,
                             to_homogeneous)
@@ -36,6 +39,7 @@ from ..utils.viewport import KTViewport
 from ..utils.edges import KTEdgeShader2D
 from ..utils.screen_text import KTScreenText
 from ..utils.points import KTPoints2D, KTPoints3D
+from ..utils.base_shaders import color_attribute
 from .utils.edges import FBRasterEdgeShader3D, FBRectangleShader2D
 
 
@@ -75,14 +79,13 @@ class FBViewport(KTViewport):
             self, fb: Any, headobj: Object, keyframe: int=-1,
             color: Tuple[float, float, float, float]=FBConfig.surface_point_color):
         verts = self.surface_points_from_fb(fb, keyframe)
-        colors = [color] * len(verts)
+        colors = color_attribute(color, len(verts))
 
         if len(verts) > 0:
             m = np.array(headobj.matrix_world, dtype=np.float32).transpose()
             verts = multiply_verts_on_matrix_4x4(verts, m)
 
         self.points3d().set_vertices_colors(verts, colors)
-        self.points3d().create_batch()
 
     def update_wireframe_colors(self) -> None:
         settings = get_fb_settings()
@@ -90,7 +93,6 @@ class FBViewport(KTViewport):
                                       settings.wireframe_special_color,
                                       settings.wireframe_midline_color),
                                       settings.wireframe_opacity * settings.get_adaptive_opacity())
-        self.wireframer().create_batches()
 
     def update_pin_sensitivity(self) -> None:
         settings = get_fb_settings()
@@ -103,25 +105,15 @@ class FBViewport(KTViewport):
             settings.pin_size * FBConfig.surf_pin_size_scale)
 
     def surface_points_from_mesh(self, fb: Any, headobj: Object,
-                                 keyframe: int=-1) -> List[Any]:
-        verts = []
-        for i in range(fb.pins_count(keyframe)):
-            pin = fb.pin(keyframe, i)
-            p = pin_to_xyz_from_mesh(pin, headobj)
-            verts.append(p)
-        return verts
+                                 keyframe: int=-1) -> Any:
+        pins = [fb.pin(keyframe, i) for i in range(fb.pins_count(keyframe))]
+        return surface_points_from_verts(pins, get_mesh_verts(headobj.data))
 
-    def surface_points_from_fb(self, fb: Any, keyframe: int=-1) -> List[Tuple]:
+    def surface_points_from_fb(self, fb: Any, keyframe: int=-1) -> Any:
         geo = fb.applied_args_model_at(keyframe)
-        geo_mesh = geo.mesh(0)
-        pins_count = fb.pins_count(keyframe)
-        verts = np.empty((pins_count, 3), dtype=np.float32)
-        for i in range(fb.pins_count(keyframe)):
-            pin = fb.pin(keyframe, i)
-            p = pin_to_xyz_from_fb_geo_mesh(pin, geo_mesh)
-            verts[i] = p
-        # tolist() is needed by shader batch on Mac
-        return (verts @ xy_to_xz_rotation_matrix_3x3()).tolist()
+        pins = [fb.pin(keyframe, i) for i in range(fb.pins_count(keyframe))]
+        verts = surface_points_from_geo_mesh(pins, geo.mesh(0))
+        return verts @ xy_to_xz_rotation_matrix_3x3()
 
     def img_points(self, fb: Any, keyframe: int) -> List[Tuple]:
         w, h = bpy_render_frame()
@@ -134,40 +126,43 @@ class FBViewport(KTViewport):
         return verts
 
     def create_batch_2d(self, area: Area) -> None:
-        def _add_markers_at_camera_corners(points: List[Tuple],
-                                           vertex_colors: List[Tuple]) -> None:
+        def _add_markers_at_camera_corners(points: Any,
+                                           vertex_colors: Any) -> Tuple:
             asp = ry / rx
-            points.append(
-                image_space_to_region(-0.5, -asp * 0.5, x1, y1, x2, y2))
-            points.append(
-                image_space_to_region(0.5, asp * 0.5, x1, y1, x2, y2))
-            vertex_colors.append((1.0, 0.0, 1.0, 0.2))  # left camera corner
-            vertex_colors.append((1.0, 0.0, 1.0, 0.2))  # right camera corner
-
-        points = self.pins().arr().copy()
+            corners = image_space_to_region_array(
+                ((-0.5, -asp * 0.5), (0.5, asp * 0.5)), x1, y1, x2, y2)
+            # left and right camera corners
+            return (np.append(points, corners, axis=0),
+                    np.append(vertex_colors,
+                              color_attribute((1.0, 0.0, 1.0, 0.2), 2),
+                              axis=0))
 
         rx, ry = bpy_render_frame()
         x1, y1, x2, y2 = get_camera_border(area)
 
-        for i, p in enumerate(points):
-            points[i] = image_space_to_region(p[0], p[1], x1, y1, x2, y2)
-
-        vertex_colors = [FBConfig.pin_color for _ in range(len(points))]
+        # Rectangles drawing
+        self.rectangler().prepare_shader_data(area)
 
         pins = self.pins()
+        if not self.points2d().update_batch_inputs(
+                pins=pins.arr(),
+                current_pin=(pins.current_pin() is not None,
+                             pins.current_pin_num()),
+                camera_border=(x1, y1, x2, y2), render_frame=(rx, ry)):
+            return
+
+        points = image_space_to_region_array(pins.arr(), x1, y1, x2, y2)
+
+        vertex_colors = color_attribute(FBConfig.pin_color, len(points))
+
         if pins.current_pin() and pins.current_pin_num() < len(vertex_colors):
             vertex_colors[pins.current_pin_num()] = FBConfig.current_pin_color
 
         if FBConfig.show_markers_at_camera_corners:
-            _add_markers_at_camera_corners(points, vertex_colors)
+            points, vertex_colors = _add_markers_at_camera_corners(
+                points, vertex_colors)
 
         self.points2d().set_vertices_colors(points, vertex_colors)
-        self.points2d().create_batch()
-
-        # Rectangles drawing
-        rectangler = self.rectangler()
-        rectangler.prepare_shader_data(area)
-        rectangler.create_batch()
 
     def update_residuals(self, fb: Any, keyframe: int, area: Area) -> None:
         if not area:
@@ -180,17 +175,17 @@ class FBViewport(KTViewport):
         x1, y1, x2, y2 = get_camera_border(area)
         kt_pins = fb.projected_pins(keyframe)
 
-        verts = []
-        for pin in kt_pins:
-            x, y = frame_to_image_space(*pin.img_pos, rx, ry)
-            verts.append(image_space_to_region(x, y, x1, y1, x2, y2))
-            x, y = frame_to_image_space(*pin.surface_point, rx, ry)
-            verts.append(image_space_to_region(x, y, x1, y1, x2, y2))
+        pins_count = len(kt_pins)
+        coords = np.empty((pins_count, 2, 2), dtype=np.float32)
+        for i, pin in enumerate(kt_pins):
+            coords[i] = (pin.img_pos, pin.surface_point)
+        verts = frame_to_region_array(coords.reshape(-1, 2), rx, ry,
+                                      x1, y1, x2, y2)
 
         wire = self.residuals()
-        wire.vertices = verts
-        wire.vertices_colors = [FBConfig.residual_color] * len(wire.vertices)
+        wire.set_vertices_colors(
+            verts, color_attribute(FBConfig.residual_color, len(verts)))
 
         # For pin dashes drawing template like this: O- - - -o
-        wire.edge_lengths = [0.0, 22.0] * len(kt_pins)
-        wire.create_batch()
+        wire.edge_lengths = np.tile(np.array((0.0, 22.0), dtype=np.float32),
+                                    len(kt_pins))
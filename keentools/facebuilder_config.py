@@ -171,6 +171,7 @@ class FBConfig:
     surf_pin_size_scale = 0.85
 
     viewport_redraw_interval = 0.1
+    edge_indices_cache_size = 8  # (model, UV set, masks) wireframe topologies
 
     default_focal_length = 50.0
     default_sensor_width = 36.0
@@ -189,6 +190,8 @@ class FBConfig:
     show_markers_at_camera_corners = False
     recreate_vertex_groups = True
 
+    bake_tex_loader_threads = 4
+
     # In Material
     image_node_layout_coord = (-300, 0)
 
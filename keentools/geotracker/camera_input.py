@@ -20,6 +20,7 @@ import numpy as np
 from typing import Any, Tuple, List, Dict, Optional
 
 from ..utils.kt_logging import KTLogger
+from ..utils.profiling import profile_stage
 from ..geotracker_config import get_current_geotracker_item
 from ..utils.coords import (focal_mm_to_px,
                             focal_px_to_mm,
@@ -39,7 +40,8 @@ from ..utils.bpy_common import (bpy_current_frame,
 from ..blender_independent_packages.pykeentools_loader import module as pkt_module
 from ..geotracker.gtloader import GTLoader
 from ..utils.images import (np_array_from_background_image,
-                            np_threshold_image)
+                            np_threshold_image,
+                            KTPixelBufferPool)
 from ..utils.ui_redraw import total_redraw_ui
 from ..utils.mesh_builder import build_geo
 from ..utils.materials import find_bpy_image_by_name
@@ -78,6 +80,7 @@ class GTImageInput(pkt_module().ImageInputI):
     def image_hash(self, frame: int) -> Any:
         return pkt_module().Hash(frame)
 
+    @profile_stage('frame_load')
     def load_linear_rgb_image_at(self, frame: int) -> Any:
         def _empty_image():
             w, h = bpy_render_frame()
@@ -132,7 +135,8 @@ class GTMask2DInput(pkt_module().Mask2DInputI):
             bpy_set_current_frame(frame)
 
         total_redraw_ui()
-        np_img = np_array_from_background_image(geotracker.camobj, index=1)
+        np_img = np_array_from_background_image(geotracker.camobj, index=1,
+                                                pooled=True)
 
         if current_frame != frame:
             _log.output(f'REVERT FRAME TO: {frame}')
@@ -148,6 +152,7 @@ class GTMask2DInput(pkt_module().Mask2DInputI):
 
         _log.output(f'MASK INPUT HAS BEEN CALCULATED AT FRAME: {frame}')
         grayscale = np_threshold_image(np_img, geotracker.mask_2d_threshold)
+        KTPixelBufferPool.release(np_img)
         _log.output(f'MASK SIZE: {grayscale.shape}')
         return pkt_module().LoadedMask(grayscale, geotracker.mask_2d_inverted)
 
@@ -193,7 +198,7 @@ class GTGeoTrackerResultsStorage(pkt_module().GeoTrackerResultsStorageI):
         return ''
 
     def deserialize(self, serial_txt: str) -> bool:
-        _log.output(f'deserialize: {serial_txt}')
+        _log.output('deserialize: %s', serial_txt)
         return True
 
     def model_mat_at(self, frame: int) -> Any:
@@ -32,6 +32,7 @@ from ..utils.coords import (image_space_to_frame,
                             focal_by_projection_matrix_mm,
                             compensate_view_scale,
                             frame_to_image_space,
+                            frame_to_image_space_array,
                             camera_sensor_width)
 from ..utils.bpy_common import (bpy_render_frame,
                                 bpy_current_frame,
@@ -39,6 +40,7 @@ from ..utils.bpy_common import (bpy_render_frame,
                                 bpy_is_animation_playing)
 from .gt_class_loader import GTClassLoader
 from ..utils.timer import KTStopShaderTimer
+from ..utils.profiling import profile_stage
 from ..utils.ui_redraw import force_ui_redraw
 from ..utils.localview import exit_area_localview, check_localview
 from ..utils.other import unhide_viewport_ui_elements_from_object
@@ -55,17 +57,23 @@ def force_stop_gt_shaders() -> None:
 
 def depsgraph_update_handler(scene, depsgraph):
     def _check_updated(depsgraph, name):
-        _log.output('COUNT UPDATES: {}'.format(len(depsgraph.updates)))
-        _log.output('ids: {}'.format([update.id.name for update in depsgraph.updates]))
+        if _log.enabled():
+            _log.output('COUNT UPDATES: %s', len(depsgraph.updates))
+            _log.output('ids: %s',
+                        [update.id.name for update in depsgraph.updates])
         for update in depsgraph.updates:
             if update.id.name != name:
                 continue
             if not update.is_updated_transform:
                 continue
-            _log.output(f'update.id: {update.id.name}')
-            _log.output(f'update.is_updated_geometry: {update.is_updated_geometry}')
-            _log.output(f'update.is_updated_transform: {update.is_updated_transform}')
-            _log.output(f'update.is_updated_shading: {update.is_updated_shading}')
+            if _log.enabled():
+                _log.output('update.id: %s', update.id.name)
+                _log.output('update.is_updated_geometry: %s',
+                            update.is_updated_geometry)
+                _log.output('update.is_updated_transform: %s',
+                            update.is_updated_transform)
+                _log.output('update.is_updated_shading: %s',
+                            update.is_updated_shading)
             return True
         return False
 
@@ -133,6 +141,7 @@ def frame_change_post_handler(scene):
     _log.output('KEYFRAME UPDATED')
     geotracker = get_current_geotracker_item()
     geotracker.reset_focal_length_estimation()
+    GTLoader.viewport().wireframer().pulse_interaction()
     GTLoader.place_object_or_camera()
     GTLoader.update_viewport_shaders(wireframe=False, geomobj_matrix=True,
                                      timeline=False)
@@ -148,6 +157,8 @@ class GTLoader:
     _camera_input: Any = None
     _kt_geotracker: Any = None
     _mask2d: Any = None
+    # Hash of the serial that _kt_geotracker state corresponds to
+    _loaded_serial_hash: Optional[str] = None
 
     _check_shader_timer: Any = KTStopShaderTimer(get_gt_settings,
                                                  force_stop_gt_shaders)
@@ -223,14 +234,22 @@ class GTLoader:
             cls._mask2d,
             cls._storage
         )
+        cls._loaded_serial_hash = None
         return cls._kt_geotracker
 
     @classmethod
-    def kt_geotracker(cls) -> Any:
+    def _geotracker_instance(cls) -> Any:
         if cls._kt_geotracker is None:
             return cls.new_kt_geotracker()
         return cls._kt_geotracker
 
+    @classmethod
+    def kt_geotracker(cls) -> Any:
+        # The caller can change the tracker, so its state is not considered
+        # equal to the stored serial until the next save or load
+        cls._loaded_serial_hash = None
+        return cls._geotracker_instance()
+
     @classmethod
     def add_pin(cls, keyframe: int, pos: Tuple[float, float]) -> Optional[Any]:
         _log.output(f'add_pin ADD PIN: {pos}')
@@ -246,14 +265,32 @@ class GTLoader:
                         image_space_to_frame(*pos, shift_x, shift_y))
 
     @classmethod
-    def delta_move_pin(cls, keyframe: int, indices: List[int],
+    def delta_move_pin(cls, keyframe: int, indices: Any,
                        offset: Tuple[float, float]) -> None:
+        ''' Moves all pins from indices by the same offset in frame pixels.
+            pykeentools has no bulk pin binding, so every pin is still read
+            and moved by its own call. Only the viewport pins are updated
+            in place, without full reload '''
         gt = cls.kt_geotracker()
         pins_count = gt.pins_count()
-        for i in indices:
-            if i < pins_count:
-                x, y = gt.pin(keyframe, i).img_pos
-                gt.move_pin(keyframe, i, (x + offset[0], y + offset[1]))
+        indices = np.asarray(indices, dtype=np.int32).ravel()
+        indices = indices[(indices >= 0) & (indices < pins_count)]
+        if len(indices) == 0:
+            return
+        points = np.array([gt.pin(keyframe, i).img_pos
+                           for i in indices.tolist()],
+                          dtype=np.float64).reshape(-1, 2)
+        points += np.asarray(offset, dtype=np.float64)
+        for i, (x, y) in zip(indices.tolist(), points.tolist()):
+            gt.move_pin(keyframe, i, (x, y))
+
+        pins = cls.viewport().pins()
+        if len(pins.arr()) != pins_count:
+            cls.load_pins_into_viewport()
+            return
+        w, h = bpy_render_frame()
+        pins.set_pins_at(indices, frame_to_image_space_array(
+            points, w, h, *get_scene_camera_shift()))
 
     @classmethod
     def load_pins_into_viewport(cls) -> None:
@@ -348,6 +385,7 @@ class GTLoader:
             gt.update_model_mat(keyframe, mat)
 
     @classmethod
+    @profile_stage('solve')
     def solve(cls) -> bool:
         _log.output('GTloader.solve called')
         geotracker = get_current_geotracker_item()
@@ -385,13 +423,15 @@ class GTLoader:
             return
 
         gt = cls.kt_geotracker()
-        geotracker.save_serial_str(gt.serialize())
+        if not geotracker.save_serial_str(gt.serialize()):
+            _log.output('save_geotracker: serial is not changed')
         geotracker.store_serial_str_on_geomobj()
+        cls._loaded_serial_hash = geotracker.get_serial_hash()
 
     @classmethod
     def _deserialize_global_options(cls):
         settings = get_gt_settings()
-        gt = cls.kt_geotracker()
+        gt = cls._geotracker_instance()
         with settings.ui_write_mode_context():
             try:
                 settings.wireframe_backface_culling = gt.back_face_culling()
@@ -405,15 +445,24 @@ class GTLoader:
         if not geotracker:
             return False
 
+        serial_hash = geotracker.get_serial_hash()
+        gt = cls._geotracker_instance()
+        settings = get_gt_settings()
+        # Tracking and refine change the tracker in background
+        if serial_hash != '' and serial_hash == cls._loaded_serial_hash \
+                and not settings.is_calculating():
+            _log.output('load_geotracker: serial is already loaded')
+            cls._deserialize_global_options()
+            return True
+
         serial = geotracker.get_serial_str()
 
-        _log.output(_log.color('cyan', f'SERIAL:\n{serial}'))
+        _log.output(lambda: _log.color('cyan', f'SERIAL:\n{serial}'))
         if serial == '':
-            settings = get_gt_settings()
             _log.warning(f'EMPTY SERIAL ERROR: {settings.current_geotracker_num}')
             return False
 
-        gt = cls.kt_geotracker()
+        cls._loaded_serial_hash = None
         try:
             if not gt.deserialize(serial):
                 _log.warning(f'DESERIALIZE ERROR: {serial}')
@@ -421,6 +470,7 @@ class GTLoader:
         except Exception as err:
             _log.error(f'load_geotracker Exception:\n{str(err)}')
             return False
+        cls._loaded_serial_hash = serial_hash
         cls._deserialize_global_options()
         return True
 
@@ -442,7 +492,6 @@ class GTLoader:
                                     geotracker.mask_3d_inverted)
         wf.set_backface_culling(settings.wireframe_backface_culling)
         wf.set_lit_wireframe(settings.lit_wireframe)
-        wf.create_batches()
 
     @classmethod
     def update_viewport_pins_and_residuals(cls, area: Area) -> None:
@@ -496,7 +545,6 @@ class GTLoader:
         timeliner = vp.timeliner()
         gt = cls.kt_geotracker()
         timeliner.set_keyframes(gt.keyframes())
-        timeliner.create_batch()
         cls._update_all_timelines()
 
     @classmethod
@@ -18,6 +18,7 @@
 
 from typing import Any, Set, Tuple, List
 from copy import deepcopy
+import numpy as np
 
 import bpy
 from bpy.types import Area
@@ -30,12 +31,13 @@ from ..geotracker_config import (GTConfig,
 from .gtloader import GTLoader
 from ..utils.coords import (get_image_space_coord,
                             image_space_to_frame,
-                            nearest_point,
                             point_is_in_area,
                             point_is_in_service_region,
                             change_far_clip_plane)
 from ..utils.manipulate import force_undo_push
 from ..utils.bpy_common import bpy_current_frame, get_scene_camera_shift
+from ..utils.timer import KTDragUpdates
+from ..utils.profiling import profile_stage
 from .ui_strings import buttons
 
 
@@ -62,14 +64,24 @@ class GT_OT_MovePin(bpy.types.Operator):
     camera_clip_end: FloatProperty(default=1000.0)
 
     def _move_pin_mode_on(self) -> None:
-        GTLoader.viewport().pins().set_move_pin_mode(True)
+        vp = GTLoader.viewport()
+        vp.pins().set_move_pin_mode(True)
+        vp.wireframer().begin_interaction()
 
     def _move_pin_mode_off(self) -> None:
-        GTLoader.viewport().pins().set_move_pin_mode(False)
+        vp = GTLoader.viewport()
+        vp.pins().set_move_pin_mode(False)
+        vp.wireframer().end_interaction()
 
     def _before_operator_finish(self) -> None:
+        self._drag_updates().stop_timer()
         self._move_pin_mode_off()
 
+    def _drag_updates(self) -> KTDragUpdates:
+        if not hasattr(self, '_drag_updates_instance'):
+            self._drag_updates_instance = KTDragUpdates()
+        return self._drag_updates_instance
+
     def _new_pin(self, area: Area, mouse_x: float, mouse_y: float) -> bool:
         frame = bpy_current_frame()
         x, y = get_image_space_coord(mouse_x, mouse_y, area)
@@ -85,7 +97,7 @@ class GT_OT_MovePin(bpy.types.Operator):
         else:
             pins.add_pin((x, y))
             pins.set_current_pin_num_to_last()
-            _log.output(f'_new_pin ADD PIN pins: {pins.arr()}')
+            _log.output('_new_pin ADD PIN pins: %s', pins.arr())
             return True
 
     def init_action(self, context: Any, mouse_x: float, mouse_y: float) -> bool:
@@ -109,7 +121,7 @@ class GT_OT_MovePin(bpy.types.Operator):
         x, y = get_image_space_coord(mouse_x, mouse_y, context.area)
         pins.set_current_pin((x, y))
 
-        nearest, dist2 = nearest_point(x, y, pins.arr())
+        nearest, dist2 = pins.nearest_pin(x, y)
 
         if nearest >= 0 and dist2 < vp.tolerance_dist2():
             _log.output(f'init_action PIN FOUND: {nearest}')
@@ -142,6 +154,9 @@ class GT_OT_MovePin(bpy.types.Operator):
             else:
                 force_undo_push('Drag GeoTracker pin')
 
+        if self._drag_updates().has_pending():
+            self._flush_drag_updates(area)
+
         GTLoader.viewport().pins().reset_current_pin()
 
         if self.dragged:
@@ -164,13 +179,12 @@ class GT_OT_MovePin(bpy.types.Operator):
             new_x, new_y = image_space_to_frame(x, y, *get_scene_camera_shift())
             offset = (new_x - old_x, new_y - old_y)
             GTLoader.delta_move_pin(kid, selected_pins, offset)
-            GTLoader.load_pins_into_viewport()
 
         x, y = get_image_space_coord(mouse_x, mouse_y, area)
         pins = GTLoader.viewport().pins()
         pins.set_current_pin((x, y))
         pin_index = pins.current_pin_num()
-        pins.arr()[pin_index] = (x, y)
+        pins.set_pin(pin_index, (x, y))
         selected_pins = pins.get_selected_pins()
 
         GTLoader.safe_keyframe_add(kid)
@@ -183,6 +197,40 @@ class GT_OT_MovePin(bpy.types.Operator):
         return GTLoader.solve()
 
     def on_mouse_move(self, area: Area, mouse_x: float, mouse_y: float) -> Set:
+        drag_updates = self._drag_updates()
+        drag_updates.push(mouse_x, mouse_y)
+        if not drag_updates.is_due():
+            self._move_current_pin_2d(area, mouse_x, mouse_y)
+            return self.on_default_modal()
+        return self._flush_drag_updates(area)
+
+    def _flush_drag_updates(self, area: Area) -> Set:
+        drag_updates = self._drag_updates()
+        mouse_x, mouse_y = drag_updates.pop()
+        with drag_updates.measure():
+            return self._update_dragged_pin(area, mouse_x, mouse_y)
+
+    @staticmethod
+    def _move_current_pin_2d(area: Area, mouse_x: float,
+                             mouse_y: float) -> None:
+        # Solve is deferred, only the selected pins follow the cursor
+        x, y = get_image_space_coord(mouse_x, mouse_y, area)
+        vp = GTLoader.viewport()
+        pins = vp.pins()
+        pin_index = pins.current_pin_num()
+        pins.set_current_pin((x, y))
+        selected_pins = pins.get_selected_pins()
+        if len(selected_pins) > 1:
+            offset = np.array((x, y), dtype=np.float32) - pins.arr()[pin_index]
+            pins.set_pins_at(selected_pins,
+                             pins.arr()[selected_pins] + offset)
+        pins.set_pin(pin_index, (x, y))
+        vp.create_batch_2d(area)
+        vp.tag_redraw()
+
+    @profile_stage('pin_drag')
+    def _update_dragged_pin(self, area: Area, mouse_x: float,
+                            mouse_y: float) -> Set:
         geotracker = get_current_geotracker_item()
         if not geotracker:
             return self.on_default_modal()
@@ -217,7 +265,6 @@ class GT_OT_MovePin(bpy.types.Operator):
         if not geotracker.camera_mode():
             wf = vp.wireframer()
             wf.set_object_world_matrix(geotracker.geomobj.matrix_world)
-            wf.create_batches()
 
         vp.create_batch_2d(area)
         vp.update_residuals(gt, area, frame)
@@ -258,6 +305,7 @@ class GT_OT_MovePin(bpy.types.Operator):
             gt.fixate_pins(keyframe)
 
         context.window_manager.modal_handler_add(self)
+        self._drag_updates().start_timer(context)
         _log.output('GT START PIN MOVING')
         return {'RUNNING_MODAL'}
 
@@ -271,7 +319,11 @@ class GT_OT_MovePin(bpy.types.Operator):
 
         if event.type == 'MOUSEMOVE' \
                 and GTLoader.viewport().pins().current_pin() is not None:
-            _log.output(f'MOVEPIN MOUSEMOVE: {mouse_x} {mouse_y}')
+            _log.output('MOVEPIN MOUSEMOVE: %s %s', mouse_x, mouse_y)
             return self.on_mouse_move(context.area, mouse_x, mouse_y)
 
+        if event.type == 'TIMER' and self._drag_updates().has_pending() \
+                and self._drag_updates().is_due():
+            return self._flush_drag_updates(context.area)
+
         return self.on_default_modal()
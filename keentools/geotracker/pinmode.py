@@ -30,7 +30,6 @@ from .gtloader import GTLoader
 from ..utils.coords import (point_is_in_area,
                             point_is_in_service_region,
                             get_image_space_coord,
-                            nearest_point,
                             change_far_clip_plane,
                             get_camera_border)
 
@@ -45,6 +44,7 @@ from ..utils.bpy_common import (bpy_current_frame,
                                 bpy_view_camera,
                                 bpy_render_frame)
 from ..utils.video import fit_render_size
+from ..utils.profiling import KTProfiler
 from .utils.prechecks import common_checks
 from .ui_strings import buttons
 
@@ -147,7 +147,7 @@ class GT_OT_PinMode(Operator):
             return {'PASS_THROUGH'}
 
         x, y = get_image_space_coord(mouse_x, mouse_y, area)
-        nearest, dist2 = nearest_point(x, y, vp.pins().arr())
+        nearest, dist2 = vp.pins().nearest_pin(x, y)
         if nearest >= 0 and dist2 < vp.tolerance_dist2():
             _log.output(f'CHANGE SELECTION PIN FOUND: {nearest}')
             pins.set_current_pin_num(nearest)
@@ -171,7 +171,7 @@ class GT_OT_PinMode(Operator):
 
         x, y = get_image_space_coord(mouse_x, mouse_y, area)
 
-        nearest, dist2 = nearest_point(x, y, vp.pins().arr())
+        nearest, dist2 = vp.pins().nearest_pin(x, y)
         if nearest >= 0 and dist2 < vp.tolerance_dist2():
             return self._delete_found_pin(nearest, area)
 
@@ -204,7 +204,6 @@ class GT_OT_PinMode(Operator):
         if not geotracker.camera_mode():
             wf = vp.wireframer()
             wf.init_geom_data_from_mesh(geotracker.geomobj)
-            wf.create_batches()
 
         vp.create_batch_2d(area)
         vp.update_residuals(gt, area, kid)
@@ -431,6 +430,8 @@ class GT_OT_PinMode(Operator):
                 return {'PASS_THROUGH'}
             _log.output('Exit pinmode by ESC')
             GTLoader.out_pinmode()
+            if KTProfiler.is_enabled():
+                KTProfiler.save_chrome_trace()
             return {'FINISHED'}
 
         if event.type == 'TAB' and event.value == 'PRESS':
@@ -455,6 +456,14 @@ class GT_OT_PinMode(Operator):
                                 bpy_current_frame())
             vp.tag_redraw()
 
+        if event.type == 'TIMER' and vp.wireframer().needs_full_detail_redraw():
+            _log.output('WIREFRAME LOD IS OFF')
+            vp.tag_redraw()
+
+        if event.type == 'TIMER' and KTProfiler.is_enabled():
+            vp.update_profiler_overlay()
+            vp.tag_redraw()
+
         if event.type == 'TIMER' and GTLoader.get_stored_geomobj_mode() == 'EDIT':
             _log.output('TIMER IN EDIT_MODE')
             vp.message_to_screen([
@@ -40,6 +40,9 @@ from ..utils.coords import (xz_to_xy_rotation_matrix_4x4,
                             camera_sensor_width,
                             get_polygons_in_vertex_group)
 from ..utils.video import fit_render_size, fit_time_length
+from ..utils.serial_storage import (serial_hash,
+                                    compress_serial,
+                                    decompress_serial)
 from ..utils.bpy_common import (bpy_render_frame,
                                 bpy_start_frame,
                                 bpy_end_frame,
@@ -251,6 +254,8 @@ class FrameListItem(bpy.types.PropertyGroup):
 
 class GeoTrackerItem(bpy.types.PropertyGroup):
     serial_str: bpy.props.StringProperty(name='GeoTracker Serialization string')
+    serial_hash: bpy.props.StringProperty(name='Serialization string hash',
+                                          default='')
     geomobj: bpy.props.PointerProperty(name='Geometry',
                                        description='Geometry object in scene',
                                        type=bpy.types.Object,
@@ -359,14 +364,33 @@ class GeoTrackerItem(bpy.types.PropertyGroup):
     )
 
     def get_serial_str(self) -> str:
-        return self.serial_str
+        return decompress_serial(self.serial_str)
 
-    def save_serial_str(self, serial: str) -> None:
-        self.serial_str = serial
+    def get_serial_hash(self) -> str:
+        if self.serial_hash == '' and self.serial_str != '':
+            return serial_hash(self.get_serial_str())
+        return self.serial_hash
+
+    def save_serial_str(self, serial: str) -> bool:
+        ''' Returns False when the same serial is already stored '''
+        new_hash = serial_hash(serial)
+        if self.serial_str != '' and new_hash == self.get_serial_hash():
+            return False
+        self.serial_str = compress_serial(serial)
+        self.serial_hash = new_hash
+        return True
 
     def store_serial_str_on_geomobj(self) -> None:
-        if self.geomobj:
-            self.geomobj[GTConfig.serial_prop_name] = self.get_serial_str()
+        # Object keeps the compressed serial, rewritten only when it changes
+        obj = self.geomobj
+        if not obj:
+            return
+        new_hash = self.get_serial_hash()
+        if obj.get(GTConfig.serial_hash_prop_name) == new_hash and \
+                GTConfig.serial_prop_name in obj.keys():
+            return
+        obj[GTConfig.serial_prop_name] = self.serial_str
+        obj[GTConfig.serial_hash_prop_name] = new_hash
 
     def camera_mode(self) -> None:
         return self.solve_for_camera
@@ -649,11 +673,9 @@ class GTSceneSettings(bpy.types.PropertyGroup):
         selector = vp.selector()
         if not self.selection_mode:
             selector.clear_rectangle()
-            selector.create_batch()
             return
         selector.add_rectangle(self.selection_x, self.selection_y,
                                mouse_x, mouse_y)
-        selector.create_batch()
 
     def cancel_selection(self) -> None:
         self.selection_mode = False
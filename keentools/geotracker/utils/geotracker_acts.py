@@ -301,8 +301,8 @@ class _CommonTimer:
         _log.output(f'--- {self._operation_name} statistics ---')
         _log.output(f'Total calc frames: {overall}')
         gt = GTLoader.kt_geotracker()
-        _log.output(f'KEYFRAMES: {gt.keyframes()}')
-        _log.output(f'TRACKED FRAMES: {gt.track_frames()}\n')
+        _log.output(lambda: f'KEYFRAMES: {gt.keyframes()}')
+        _log.output(lambda: f'TRACKED FRAMES: {gt.track_frames()}\n')
 
     def _cancel(self) -> None:
         _log.output(f'{self._operation_name} Cancel call. State={self._state}')
@@ -621,10 +621,9 @@ def remove_pins_act() -> ActionStatus:
         pins.clear_disabled_pins()
         pins.clear_selected_pins()
     else:
-        selected_pins.sort()
         for i in reversed(selected_pins):
             gt.remove_pin(i)
-            selected_pins.remove(i)
+            pins.remove_pin(i)
         if not GTLoader.solve():
             return ActionStatus(False, 'Could not remove selected pins')
         GTLoader.load_pins_into_viewport()
@@ -31,7 +31,8 @@ from ...utils.images import (np_image_to_grayscale,
                              np_array_from_background_image,
                              get_background_image_object,
                              check_bpy_image_size,
-                             np_array_from_bpy_image)
+                             np_array_from_bpy_image,
+                             KTPixelBufferPool)
 from ...utils.bpy_common import (bpy_render_frame,
                                  bpy_current_frame,
                                  update_depsgraph,
@@ -83,7 +84,8 @@ class PrecalcTimer(CalcTimer):
             return self._interval
         geotracker = settings.get_current_geotracker_item()
 
-        np_img = np_array_from_background_image(geotracker.camobj)
+        np_img = np_array_from_background_image(geotracker.camobj,
+                                                pooled=True)
         if np_img is None:
             # For testing purpose only
             _log.output('no np_img. possible in bpy.app.background mode')
@@ -105,10 +107,11 @@ class PrecalcTimer(CalcTimer):
                 self.finish_calc_mode_with_error('* Cannot load images')
                 return None
 
-            np_img = np_array_from_bpy_image(img)
+            np_img = np_array_from_bpy_image(img, pooled=True)
             bpy.data.images.remove(img)
 
         grayscale = np_image_to_grayscale(np_img)
+        KTPixelBufferPool.release(np_img)
         self._runner.fulfill_loading_request(grayscale)
         return self._interval
 
@@ -16,7 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 
-from typing import Any, List, Tuple
+from typing import Any, Tuple
 import numpy as np
 
 from bpy.types import Object, Area, SpaceView3D, SpaceDopeSheetEditor
@@ -25,14 +25,19 @@ from ..geotracker_config import GTConfig, get_gt_settings
 from ..utils.coords import (get_camera_border,
                             image_space_to_region,
                             frame_to_image_space,
+                            frame_to_region_array,
+                            image_space_to_region_array,
+                            residual_lines,
                             multiply_verts_on_matrix_4x4,
                             to_homogeneous,
-                            pin_to_xyz_from_mesh)
+                            get_mesh_verts,
+                            surface_points_from_verts)
 from ..utils.bpy_common import (bpy_render_frame,
                                 evaluated_object,
                                 bpy_scene_camera)
 from ..utils.viewport import KTViewport
 from ..utils.screen_text import KTScreenText
+from ..utils.base_shaders import color_attribute, set_colors_at
 from ..utils.points import KTPoints2D, KTPoints3D
 from ..utils.edges import (KTEdgeShader2D,
                            KTLitEdgeShaderLocal3D,
@@ -95,21 +100,17 @@ class GTViewport(KTViewport):
     def update_surface_points(self, gt: Any, obj: Object, keyframe: int,
                               color: Tuple=GTConfig.surface_point_color) -> None:
         verts = self.surface_points_from_mesh(gt, obj, keyframe)
-        colors = [color] * len(verts)
+        colors = color_attribute(color, len(verts))
 
         pins = self.pins()
         if pins.move_pin_mode():
-            points_count = len(verts)
-            hidden_color = (*color[:3], 0.0)
-            for i in [x for x in pins.get_disabled_pins() if x < points_count]:
-                colors[i] = hidden_color
+            set_colors_at(colors, pins.get_disabled_pins(), (*color[:3], 0.0))
 
         if len(verts) > 0:
             m = np.array(obj.matrix_world, dtype=np.float32).transpose()
             verts = multiply_verts_on_matrix_4x4(verts, m)
 
         self.points3d().set_vertices_colors(verts, colors)
-        self.points3d().create_batch()
 
     def update_pin_sensitivity(self) -> None:
         settings = get_gt_settings()
@@ -122,69 +123,72 @@ class GTViewport(KTViewport):
             settings.pin_size * GTConfig.surf_pin_size_scale)
 
     def surface_points_from_mesh(self, gt: Any, geomobj: Object,
-                                 keyframe: int) -> List:
-        verts = []
-        pins_count = gt.pins_count()
+                                 keyframe: int) -> Any:
         obj = evaluated_object(geomobj)
         if len(obj.data.vertices) == 0:
-            return verts
-        for i in range(pins_count):
-            pin = gt.pin(keyframe, i)
-            if pin is not None:
-                p = pin_to_xyz_from_mesh(pin, obj)
-                if p is not None:
-                    verts.append(p)
-        return verts
+            return np.empty((0, 3), dtype=np.float32)
+        pins = [gt.pin(keyframe, i) for i in range(gt.pins_count())]
+        return surface_points_from_verts([pin for pin in pins
+                                          if pin is not None],
+                                         get_mesh_verts(obj.data))
 
     def create_batch_2d(self, area: Area) -> None:
-        def _add_markers_at_camera_corners(points: List,
-                                           vertex_colors: List) -> None:
-            points.append(
-                (image_space_to_region(-0.5, -asp * 0.5, x1, y1, x2, y2))
-            )
-            points.append(
-                (image_space_to_region(0.5, asp * 0.5, x1, y1, x2, y2))
-            )
-            vertex_colors.append((1.0, 0.0, 1.0, 0.2))  # left camera corner
-            vertex_colors.append((1.0, 0.0, 1.0, 0.2))  # right camera corner
-
         rx, ry = bpy_render_frame()
         asp = ry / rx
         x1, y1, x2, y2 = get_camera_border(area)
 
         pins = self.pins()
-        points = pins.arr().copy()
-        for i, p in enumerate(points):
-            points[i] = image_space_to_region(p[0], p[1], x1, y1, x2, y2)
+        if self.points2d().update_batch_inputs(
+                pins=pins.arr(), selected=pins.get_selected_mask(),
+                disabled=pins.get_disabled_mask(),
+                current_pin=(pins.current_pin() is not None,
+                             pins.current_pin_num()),
+                move_pin_mode=pins.move_pin_mode(),
+                camera_border=(x1, y1, x2, y2), render_frame=(rx, ry)):
+            self._update_points2d(x1, y1, x2, y2, asp)
+
+        mask = self.mask2d()
+        if mask.image:
+            mask.left = image_space_to_region(-0.5, -asp * 0.5, x1, y1, x2, y2)
+            w, h = mask.image.size[:]
+            mask.right = image_space_to_region(
+                *frame_to_image_space(w, h, rx, ry), x1, y1, x2, y2)
+
+    def _update_points2d(self, x1: float, y1: float, x2: float, y2: float,
+                         asp: float) -> None:
+        def _add_markers_at_camera_corners(points: Any,
+                                           vertex_colors: Any) -> Tuple:
+            corners = image_space_to_region_array(
+                ((-0.5, -asp * 0.5), (0.5, asp * 0.5)), x1, y1, x2, y2)
+            # left and right camera corners
+            return (np.append(points, corners, axis=0),
+                    np.append(vertex_colors,
+                              color_attribute((1.0, 0.0, 1.0, 0.2), 2),
+                              axis=0))
+
+        pins = self.pins()
+        points = image_space_to_region_array(pins.arr(),
+                                             x1, y1, x2, y2)
 
         points_count = len(points)
 
-        vertex_colors = [GTConfig.pin_color] * points_count
+        vertex_colors = color_attribute(GTConfig.pin_color, points_count)
 
         color = (*GTConfig.disabled_pin_color[:3], 0.0) \
             if pins.move_pin_mode() else GTConfig.disabled_pin_color
-        for i in [x for x in pins.get_disabled_pins() if x < points_count]:
-            vertex_colors[i] = color
-
-        for i in [x for x in pins.get_selected_pins() if x < points_count]:
-            vertex_colors[i] = GTConfig.selected_pin_color
+        set_colors_at(vertex_colors, pins.get_disabled_pins(), color)
+        set_colors_at(vertex_colors, pins.get_selected_pins(),
+                      GTConfig.selected_pin_color)
 
         pin_num = pins.current_pin_num()
         if pins.current_pin() and pin_num >= 0 and pin_num < points_count:
             vertex_colors[pin_num] = GTConfig.current_pin_color
 
         if GTConfig.show_markers_at_camera_corners:
-            _add_markers_at_camera_corners(points, vertex_colors)
+            points, vertex_colors = _add_markers_at_camera_corners(
+                points, vertex_colors)
 
         self.points2d().set_vertices_colors(points, vertex_colors)
-        self.points2d().create_batch()
-
-        mask = self.mask2d()
-        if mask.image:
-            mask.left = image_space_to_region(-0.5, -asp * 0.5, x1, y1, x2, y2)
-            w, h = mask.image.size[:]
-            mask.right = image_space_to_region(
-                *frame_to_image_space(w, h, rx, ry), x1, y1, x2, y2)
 
     def update_residuals(self, gt: Any, area: Area, keyframe: int) -> None:
         rx, ry = bpy_render_frame()
@@ -196,19 +200,11 @@ class GTViewport(KTViewport):
         p3d = self.points3d().get_vertices()
 
         wire = self.residuals()
-        wire.clear_vertices()
-        wire.edge_lengths = []
-        wire.vertices_colors = []
-
-        if len(p2d) != len(p3d):
-            return
-
-        if len(p3d) == 0:
-            wire.create_batch()  # Empty shader
-            return
-
         camobj = bpy_scene_camera()
-        if not camobj:
+        if len(p2d) != len(p3d) or len(p3d) == 0 or not camobj:
+            if wire.update_batch_inputs(valid=False, p2d=p2d, p3d=p3d):
+                wire.clear_vertices()
+                wire.edge_lengths = np.empty((0,), dtype=np.float32)
             return
 
         projection = gt.projection_mat(keyframe).T
@@ -216,31 +212,32 @@ class GTViewport(KTViewport):
         # Object transform, inverse camera, projection apply -> numpy
         transform = np.array(m.transposed()) @ projection
 
+        pins = self.pins()
+        shift = (camobj.data.shift_x, camobj.data.shift_y)
+        if not wire.update_batch_inputs(
+                valid=True, p2d=p2d, p3d=p3d, transform=transform,
+                shift=shift, camera_border=(x1, y1, x2, y2),
+                render_frame=(rx, ry), disabled=pins.get_disabled_mask(),
+                move_pin_mode=pins.move_pin_mode()):
+            return
+
         # Calc projection
         vv = to_homogeneous(p3d) @ transform
-        vv = (vv.T / vv[:, 3]).T
-
-        verts = []
-        shift_x, shift_y = camobj.data.shift_x, camobj.data.shift_y
-        for i, v in enumerate(vv):
-            x, y = frame_to_image_space(v[0], v[1], rx, ry, shift_x, shift_y)
-            verts.append(image_space_to_region(x, y, x1, y1, x2, y2))
-            wire.edge_lengths.append(0)
-            verts.append((p2d[i][0], p2d[i][1]))
-            # length = np.linalg.norm((v[0]-p2d[i][0], v[1]-p2d[i][1]))
-            length = 22.0
-            wire.edge_lengths.append(length)
-
-        wire.vertices = verts
-        wire.vertices_colors = [GTConfig.residual_color] * len(verts)
-        pins = self.pins()
+        projected = vv[:, :2] / vv[:, 3:4]
+
+        projected = frame_to_region_array(
+            projected, rx, ry, x1, y1, x2, y2, *shift)
+        verts = residual_lines(projected, p2d)
+        # For pin dashes drawing template like this: O- - - -o
+        wire.edge_lengths = np.tile(np.array((0.0, 22.0), dtype=np.float32),
+                                    len(p3d))
+
+        colors = color_attribute(GTConfig.residual_color, len(verts))
         if pins.move_pin_mode():
-            points_count = len(wire.vertices_colors)
-            color = (*GTConfig.residual_color[:3], 0.0)
-            for i in [x for x in pins.get_disabled_pins() if 2 * x < points_count]:
-                wire.vertices_colors[i * 2] = color
-                wire.vertices_colors[i * 2 + 1] = color
-        wire.create_batch()
+            disabled = 2 * np.asarray(pins.get_disabled_pins(), dtype=np.int32)
+            set_colors_at(colors, np.stack([disabled, disabled + 1], axis=-1),
+                          (*GTConfig.residual_color[:3], 0.0))
+        wire.set_vertices_colors(verts, colors)
 
     def update_wireframe_colors(self) -> None:
         settings = get_gt_settings()
@@ -248,7 +245,6 @@ class GTViewport(KTViewport):
         wf.init_color_data((*settings.wireframe_color,
                             settings.wireframe_opacity * settings.get_adaptive_opacity()))
         wf.set_lit_wireframe(settings.lit_wireframe)
-        wf.create_batches()
 
     def hide_pins_and_residuals(self):
         self.points2d().hide_shader()
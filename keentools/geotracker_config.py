@@ -144,6 +144,7 @@ class GTConfig:
     mask_3d_color = (0.0, 0.0, 1.0, 0.4)
 
     serial_prop_name = prefix + '_serial'
+    serial_hash_prop_name = prefix + '_serial_hash'
     version_prop_name = prefix + '_version'
 
     prevent_view_rotation = True
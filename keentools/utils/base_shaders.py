@@ -16,11 +16,77 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 
-from typing import Any, List, Callable, Tuple, Optional
+import time
+import numpy as np
+from typing import Any, Dict, List, Callable, Tuple, Optional
 
 from bpy.types import Object, Area, Region, SpaceView3D
 
 from .bpy_common import bpy_background_mode
+from .profiling import KTProfiler
+
+
+def float32_attribute(data: Any, width: int) -> Any:
+    ''' Contiguous float32 array (N, width) ready for vertex buffer upload.
+        No copy is made for data that is already in this format '''
+    return np.ascontiguousarray(
+        np.asarray(data, dtype=np.float32).reshape(-1, width))
+
+
+def color_attribute(color: Any, count: int) -> Any:
+    return np.full((count, 4), color, dtype=np.float32)
+
+
+def set_colors_at(colors: Any, indices: Any, color: Any) -> None:
+    ''' colors[indices] = color, out of range indices are skipped '''
+    indices = np.asarray(indices, dtype=np.int32).ravel()
+    colors[indices[(indices >= 0) & (indices < len(colors))]] = color
+
+
+def _same_batch_input(old: Any, new: Any) -> bool:
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        return isinstance(old, np.ndarray) and isinstance(new, np.ndarray) \
+            and old.shape == new.shape and np.array_equal(old, new)
+    return old == new
+
+
+class KTBatchStats:
+    ''' Counts lazy batch rebuilds of all shaders for profiling '''
+    _counts: Dict[str, int] = {}
+    _window_start: float = time.perf_counter()
+    _window_count: int = 0
+    _rate: float = 0.0
+
+    @classmethod
+    def count_rebuild(cls, name: str) -> None:
+        cls._counts[name] = cls._counts.get(name, 0) + 1
+        cls._window_count += 1
+        cls._update_rate()
+
+    @classmethod
+    def _update_rate(cls) -> None:
+        now = time.perf_counter()
+        elapsed = now - cls._window_start
+        if elapsed >= 1.0:
+            cls._rate = cls._window_count / elapsed
+            cls._window_start = now
+            cls._window_count = 0
+
+    @classmethod
+    def rebuilds_per_second(cls) -> float:
+        cls._update_rate()
+        return cls._rate
+
+    @classmethod
+    def rebuild_counts(cls) -> Dict[str, int]:
+        return dict(cls._counts)
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._counts = {}
+        cls._window_start = time.perf_counter()
+        cls._window_count = 0
+        cls._rate = 0.0
 
 
 class KTShaderBase:
@@ -44,6 +110,8 @@ class KTShaderBase:
         self.target_class: Any = target_class
         self.work_area: Optional[Area] = None
         self.is_shader_visible: bool = True
+        self._batch_inputs: Dict[str, Any] = {}
+        self._batch_dirty: bool = True
 
         if not bpy_background_mode():
             self.init_shaders()
@@ -69,16 +137,60 @@ class KTShaderBase:
     def create_batch(self) -> None:
         pass
 
+    def rebuild_batches(self) -> None:
+        self.create_batch()
+
+    def update_batch_inputs(self, **inputs: Any) -> bool:
+        ''' Stores inputs the batch is built from. Batch is marked dirty
+            only when some of them differ from the stored ones '''
+        changed = False
+        for name, value in inputs.items():
+            if name in self._batch_inputs and \
+                    _same_batch_input(self._batch_inputs[name], value):
+                continue
+            self._batch_inputs[name] = value.copy() \
+                if isinstance(value, np.ndarray) else value
+            changed = True
+        if changed:
+            self._batch_dirty = True
+        return changed
+
+    def reset_batch_inputs(self) -> None:
+        self._batch_inputs = {}
+        self._batch_dirty = True
+
+    def mark_batch_dirty(self) -> None:
+        self._batch_dirty = True
+
+    def is_batch_dirty(self) -> bool:
+        return self._batch_dirty
+
+    def update_batch(self) -> bool:
+        ''' Rebuild batch now if it is dirty '''
+        if not self._batch_dirty:
+            return False
+        self._batch_dirty = False
+        with KTProfiler.stage('batch_rebuild'):
+            self.rebuild_batches()
+        KTBatchStats.count_rebuild(self.__class__.__name__)
+        return True
+
     def draw_callback(self, context) -> None:
         pass
 
+    def _scheduled_draw_callback(self, context) -> None:
+        with KTProfiler.stage('redraw'):
+            if self.is_visible():
+                self.update_batch()
+            self.draw_callback(context)
+
     def register_handler(self, context: Any,
                          post_type: str='POST_VIEW') -> None:
         self.work_area = context.area
         if self.draw_handler is not None:
             self.unregister_handler()
         self.draw_handler = self.get_target_class().draw_handler_add(
-            self.draw_callback, (context,), 'WINDOW', post_type)
+            self._scheduled_draw_callback, (context,), 'WINDOW', post_type)
         self.add_handler_list(self.draw_handler)
 
     def unregister_handler(self) -> None:
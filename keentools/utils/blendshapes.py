@@ -19,7 +19,7 @@
 import math
 import numpy as np
 import os
-from typing import Any, List, Optional, Tuple, Dict
+from typing import Any, List, Optional, Tuple, Dict, Iterator
 
 import bpy
 from bpy.types import Object, Action, FCurve
@@ -142,6 +142,31 @@ def _get_obj_verts(obj: Object) -> Any:
     return verts @ xz_to_xy_rotation_matrix_3x3()
 
 
+def _get_shape_keys_verts(mesh: Any) -> Any:
+    key_blocks = mesh.shape_keys.key_blocks
+    verts = np.empty((len(key_blocks), len(mesh.vertices), 3),
+                     dtype=np.float32)
+    for i, kb in enumerate(key_blocks):
+        kb.data.foreach_get('co', verts[i].ravel())
+    return verts
+
+
+def transfer_shape_keys(from_mesh: Any, obj: Object) -> int:
+    ''' All key blocks are read into one stacked (K, N, 3) array,
+        then created on obj without mix evaluation and filled from it '''
+    if not from_mesh.shape_keys:
+        return 0
+    key_blocks = from_mesh.shape_keys.key_blocks
+    verts = _get_shape_keys_verts(from_mesh)
+    params = [(kb.name, kb.value) for kb in key_blocks]
+    shapes = [obj.shape_key_add(name=name, from_mix=False)
+              for name, _ in params]
+    for shape, shape_verts, (_, value) in zip(shapes, verts, params):
+        shape.data.foreach_set('co', shape_verts.ravel())
+        shape.value = value
+    return len(shapes)
+
+
 def _get_facs_executor(obj: Object, scale: float) -> Optional[Any]:
     verts = _get_obj_verts(obj)
 
@@ -159,9 +184,24 @@ def _get_facs_executor(obj: Object, scale: float) -> Optional[Any]:
     return fe
 
 
-def _update_blendshape_verts(shape: Any, verts: Any) -> None:
-    shape.data.foreach_set(
-        'co', (verts @ xy_to_xz_rotation_matrix_3x3()).ravel())
+def facs_blendshapes_verts(facs_executor: Any,
+                           indices: List[int]) -> Iterator[Any]:
+    ''' Blendshapes are requested one by one since pykeentools calls are not
+        thread-safe. Only one rotated shape is kept in memory at a time '''
+    rot = xy_to_xz_rotation_matrix_3x3()
+    for i in indices:
+        blendshape = facs_executor.get_facs_blendshape(i)
+        yield np.matmul(blendshape, rot).astype(np.float32, copy=False)
+
+
+def _add_facs_blendshapes(obj: Object, facs_executor: Any,
+                          indices: List[int]) -> int:
+    names = facs_executor.facs_names
+    verts = facs_blendshapes_verts(facs_executor, indices)
+    for i, shape_verts in zip(indices, verts):
+        shape = obj.shape_key_add(name=names[i], from_mix=False)
+        shape.data.foreach_set('co', shape_verts.ravel())
+    return len(indices)
 
 
 def create_facs_blendshapes(obj: Object, scale: float) -> int:
@@ -170,14 +210,10 @@ def create_facs_blendshapes(obj: Object, scale: float) -> int:
         return -1
 
     _create_basis_blendshape(obj)
-    counter = 0
-    for i, name in enumerate(facs_executor.facs_names):
-        if obj.data.shape_keys.key_blocks.find(name) < 0:
-            shape = obj.shape_key_add(name=name)
-            verts = facs_executor.get_facs_blendshape(i)
-            _update_blendshape_verts(shape, verts)
-            counter += 1
-    return counter
+    key_blocks = obj.data.shape_keys.key_blocks
+    indices = [i for i, name in enumerate(facs_executor.facs_names)
+               if key_blocks.find(name) < 0]
+    return _add_facs_blendshapes(obj, facs_executor, indices)
 
 
 def update_facs_blendshapes(obj: Object, scale: float) -> int:
@@ -186,16 +222,15 @@ def update_facs_blendshapes(obj: Object, scale: float) -> int:
     if not facs_executor:
         return -1
 
-    counter = 0
-    for i, name in enumerate(facs_executor.facs_names):
-        index = obj.data.shape_keys.key_blocks.find(name)
-        if index >= 0:
-            shape = obj.data.shape_keys.key_blocks[index]
-            verts = facs_executor.get_facs_blendshape(i)
-            _update_blendshape_verts(shape, verts)
-            counter += 1
+    key_blocks = obj.data.shape_keys.key_blocks
+    items = [(i, key_blocks.find(name))
+             for i, name in enumerate(facs_executor.facs_names)]
+    items = [(i, index) for i, index in items if index >= 0]
+    verts = facs_blendshapes_verts(facs_executor, [i for i, _ in items])
+    for (_, index), shape_verts in zip(items, verts):
+        key_blocks[index].data.foreach_set('co', shape_verts.ravel())
     obj.data.update()
-    return counter
+    return len(items)
 
 
 def restore_facs_blendshapes(obj: Object, scale: float,
@@ -205,14 +240,10 @@ def restore_facs_blendshapes(obj: Object, scale: float,
     if not facs_executor:
         return -1
 
-    counter = 0
-    for i, name in enumerate(facs_executor.facs_names):
-        if obj.data.shape_keys.key_blocks.find(name) < 0 \
-                and (name in restore_names):
-            shape = obj.shape_key_add(name=name)
-            verts = facs_executor.get_facs_blendshape(i)
-            _update_blendshape_verts(shape, verts)
-            counter += 1
+    key_blocks = obj.data.shape_keys.key_blocks
+    indices = [i for i, name in enumerate(facs_executor.facs_names)
+               if key_blocks.find(name) < 0 and (name in restore_names)]
+    counter = _add_facs_blendshapes(obj, facs_executor, indices)
     obj.data.update()
     return counter
 
@@ -0,0 +1,225 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+# KeenTools for blender is a blender addon for using KeenTools in Blender.
+# Copyright (C) 2022  KeenTools
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ##### END GPL LICENSE BLOCK #####
+
+from typing import Any, Optional
+from functools import lru_cache
+
+import numpy as np
+
+
+# All kernels work on flat contiguous buffers (SIMD-friendly ufuncs with
+# out= parameter) and restore alpha channel afterwards, so RGBA images
+# are never split into strided RGB views. Float images are processed
+# via ufuncs (in place when out is np_img), uint8 images via lookup tables.
+
+_srgb_threshold: float = 0.04045
+_lut_size: int = 256
+
+
+def _prepare_output(np_img: Any, out: Optional[Any],
+                    dtype: Any=np.float32) -> Any:
+    if out is None:
+        return np.empty(np_img.shape, dtype=dtype)
+    if not out.flags.c_contiguous:
+        # reshape(-1) of a strided array is a copy, results would be lost
+        raise ValueError('out array must be C-contiguous')
+    return out
+
+
+def _save_alpha(np_img: Any) -> Optional[Any]:
+    if np_img.ndim < 2 or np_img.shape[-1] != 4:
+        return None
+    return np_img[..., 3].copy()
+
+
+def _restore_alpha(out: Any, alpha: Optional[Any]) -> None:
+    if alpha is not None:
+        out[..., 3] = alpha
+
+
+def _flat(np_img: Any) -> Any:
+    return np.ascontiguousarray(np_img).reshape(-1)
+
+
+def gain_from_exposure(exposure: float) -> float:
+    return pow(2, exposure / 2.2)
+
+
+def is_default_tone(exposure: float, gamma: float,
+                    default_exposure: float=0.0,
+                    default_gamma: float=1.0,
+                    atol: float=0.001) -> bool:
+    return abs(exposure - default_exposure) <= atol and \
+        abs(gamma - default_gamma) <= atol
+
+
+def srgb_to_linear(np_img: Any, out: Optional[Any]=None) -> Any:
+    ''' Piecewise sRGB EOTF. out can be the same array as np_img '''
+    if np_img.dtype == np.uint8:
+        return apply_lut(np_img, srgb_to_linear_lut(), out)
+    out = _prepare_output(np_img, out)
+    alpha = _save_alpha(np_img)
+    src = _flat(np_img)
+    dst = out.reshape(-1)
+    mask = np.less(src, _srgb_threshold)
+    low = np.multiply(src, 1.0 / 12.92)
+    np.add(src, 0.055, out=dst)
+    np.multiply(dst, 1.0 / 1.055, out=dst)
+    np.power(dst, 2.4, out=dst)
+    np.copyto(dst, low, where=mask)
+    _restore_alpha(out, alpha)
+    return out
+
+
+def linear_to_srgb(np_img: Any, out: Optional[Any]=None) -> Any:
+    ''' Inverse of srgb_to_linear. out can be the same array as np_img '''
+    if np_img.dtype == np.uint8:
+        return apply_lut(np_img, linear_to_srgb_lut(), out)
+    out = _prepare_output(np_img, out)
+    alpha = _save_alpha(np_img)
+    src = _flat(np_img)
+    dst = out.reshape(-1)
+    mask = np.less(src, _srgb_threshold / 12.92)
+    low = np.multiply(src, 12.92)
+    np.power(src, 1.0 / 2.4, out=dst)
+    np.multiply(dst, 1.055, out=dst)
+    np.subtract(dst, 0.055, out=dst)
+    np.copyto(dst, low, where=mask)
+    _restore_alpha(out, alpha)
+    return out
+
+
+def exposure_gamma(np_img: Any, exposure: float, gamma: float,
+                   out: Optional[Any]=None) -> Any:
+    ''' (gain * x) ** (1 / gamma) where gain is calculated from exposure '''
+    if np_img.dtype == np.uint8:
+        return apply_lut(np_img, exposure_gamma_lut(exposure, gamma), out)
+    out = _prepare_output(np_img, out)
+    alpha = _save_alpha(np_img)
+    dst = out.reshape(-1)
+    np.multiply(_flat(np_img), gain_from_exposure(exposure), out=dst)
+    if gamma != 1.0:
+        np.power(dst, 1.0 / gamma, out=dst)
+    _restore_alpha(out, alpha)
+    return out
+
+
+def gamma_image(np_img: Any, gamma: float=1.0,
+                out: Optional[Any]=None) -> Any:
+    out = _prepare_output(np_img, out, dtype=np_img.dtype)
+    alpha = _save_alpha(np_img)
+    np.power(_flat(np_img), gamma, out=out.reshape(-1))
+    _restore_alpha(out, alpha)
+    return out
+
+
+def threshold_image(np_img: Any, threshold: float=0.0,
+                    out: Optional[Any]=None) -> Any:
+    ''' uint8 mask 255 where average of RGB channels is above threshold '''
+    if np_img.dtype == np.uint8:
+        acc = np.add(np_img[..., 0], np_img[..., 1], dtype=np.uint16)
+        threshold *= 255
+    else:
+        acc = np.add(np_img[..., 0], np_img[..., 1])
+    np.add(acc, np_img[..., 2], out=acc)
+    if out is None:
+        out = np.empty(acc.shape, dtype=np.uint8)
+    np.greater(acc, 3.0 * threshold, out=out.view(np.bool_))
+    out *= 255
+    return out
+
+
+def float_to_uint8(np_img: Any, out: Optional[Any]=None) -> Any:
+    tmp = np.multiply(np_img, _lut_size - 1, dtype=np.float32)
+    np.add(tmp, 0.5, out=tmp)
+    np.clip(tmp, 0, _lut_size - 1, out=tmp)
+    if out is None:
+        out = np.empty(tmp.shape, dtype=np.uint8)
+    np.copyto(out, tmp, casting='unsafe')
+    return out
+
+
+def float_to_float16(np_img: Any, out: Optional[Any]=None) -> Any:
+    if out is None:
+        out = np.empty(np_img.shape, dtype=np.float16)
+    np.copyto(out, np_img, casting='same_kind')
+    return out
+
+
+def compact_pixels(np_img: Any, is_float: bool) -> Any:
+    ''' 8-bit data goes to uint8 (lossless), float data to float16 '''
+    if np_img.dtype in (np.uint8, np.float16):
+        return np_img
+    return float_to_float16(np_img) if is_float else float_to_uint8(np_img)
+
+
+def float32_pixels(np_img: Any, out: Optional[Any]=None) -> Any:
+    ''' float32 view of compact pixels, uint8 data is normalized to [0..1].
+        float32 input is returned as is when out is not set '''
+    if np_img.dtype == np.float32 and out is None:
+        return np_img
+    out = _prepare_output(np_img, out)
+    if np_img.dtype == np.uint8:
+        np.multiply(np_img, 1.0 / (_lut_size - 1), out=out)
+    else:
+        np.copyto(out, np_img)
+    return out
+
+
+# --- Lookup tables for 8-bit data ---
+
+def _lut_input() -> Any:
+    return np.arange(_lut_size, dtype=np.float32) / (_lut_size - 1)
+
+
+@lru_cache(maxsize=1)
+def srgb_to_linear_lut() -> Any:
+    return srgb_to_linear(_lut_input())
+
+
+@lru_cache(maxsize=1)
+def linear_to_srgb_lut() -> Any:
+    return linear_to_srgb(_lut_input())
+
+
+@lru_cache(maxsize=16)
+def exposure_gamma_lut(exposure: float, gamma: float) -> Any:
+    return exposure_gamma(_lut_input(), exposure, gamma)
+
+
+def apply_lut(np_img: Any, lut: Any, out: Optional[Any]=None) -> Any:
+    ''' Apply 256-entries LUT to RGB channels of uint8 image.
+        Alpha is converted to float without LUT '''
+    out = _prepare_output(np_img, out)
+    alpha = _save_alpha(np_img)
+    np.take(lut, _flat(np_img), out=out.reshape(-1))
+    if alpha is not None:
+        alpha = alpha.astype(np.float32) / (_lut_size - 1)
+    _restore_alpha(out, alpha)
+    return out
+
+
+# --- Colors ---
+
+def gamma_colors(colors: Any, power: float=2.2) -> Any:
+    ''' Works on one color or on array of colors at once '''
+    return np.power(np.asarray(colors, dtype=np.float32), power)
+
+
+def inverse_gamma_colors(colors: Any, power: float=2.2) -> Any:
+    return gamma_colors(colors, 1.0 / power)
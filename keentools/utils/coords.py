@@ -17,7 +17,7 @@
 # ##### END GPL LICENSE BLOCK #####
 import numpy as np
 import math
-from typing import Any, Tuple, List, Optional, Set
+from typing import Any, Dict, Tuple, List, Optional, Set
 
 from bpy.types import Area, Object
 
@@ -33,16 +33,15 @@ from .animation import get_safe_evaluated_fcurve
 _log = KTLogger(__name__)
 
 
-def nearest_point(x: float, y: float, points: List[Tuple[float, float]],
+def nearest_point(x: float, y: float, points: Any,
                   dist: float=4000000.0) -> Tuple[int, float]:  # dist squared
-    dist2 = dist
-    nearest = -1
-    for i, p in enumerate(points):
-        d2 = (x - p[0]) ** 2 + (y - p[1]) ** 2
-        if d2 < dist2:
-            dist2 = d2
-            nearest = i
-    return nearest, dist2
+    if len(points) == 0:
+        return -1, dist
+    d2 = np.sum((np.asarray(points, dtype=np.float64) - (x, y)) ** 2, axis=1)
+    nearest = int(np.argmin(d2))
+    if d2[nearest] < dist:
+        return nearest, float(d2[nearest])
+    return -1, dist
 
 
 def xy_to_xz_rotation_matrix_3x3() -> Any:
@@ -178,6 +177,48 @@ def frame_to_image_space(x: float, y: float, w: float, h: float,
     return x / w - 0.5 - shift_x, (y - 0.5 * h) / w - shift_y
 
 
+def transform_points_2d(points: Any, mat: Any) -> Any:
+    """ Apply 3x3 affine matrix to (N, 2) points """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    res = points @ mat[:2, :2].T.astype(np.float32)
+    res += mat[:2, 2].astype(np.float32)
+    return res
+
+
+def frame_to_image_matrix(w: float, h: float, shift_x: float=0.0,
+                          shift_y: float=0.0) -> Any:
+    """ Affine 3x3 form of frame_to_image_space """
+    return np.array([[1.0 / w, 0.0, -0.5 - shift_x],
+                     [0.0, 1.0 / w, -0.5 * h / w - shift_y],
+                     [0.0, 0.0, 1.0]])
+
+
+def image_to_region_matrix(x1: float, y1: float,
+                           x2: float, y2: float) -> Any:
+    """ Affine 3x3 form of image_space_to_region """
+    sc = x2 - x1
+    return np.array([[sc, 0.0, (x1 + x2) * 0.5],
+                     [0.0, sc, (y1 + y2) * 0.5],
+                     [0.0, 0.0, 1.0]])
+
+
+def region_to_image_matrix(x1: float, y1: float,
+                           x2: float, y2: float) -> Any:
+    """ Affine 3x3 form of region_to_image_space """
+    sc = (x2 - x1) if x2 != x1 else 1.0
+    return np.array([[1.0 / sc, 0.0, -(x1 + x2) * 0.5 / sc],
+                     [0.0, 1.0 / sc, -(y1 + y2) * 0.5 / sc],
+                     [0.0, 0.0, 1.0]])
+
+
+def frame_to_image_space_array(points: Any, w: float, h: float,
+                               shift_x: float=0.0,
+                               shift_y: float=0.0) -> Any:
+    """ Array version of frame_to_image_space for (N, 2) points """
+    return transform_points_2d(
+        points, frame_to_image_matrix(w, h, shift_x, shift_y))
+
+
 def get_mouse_coords(event: Any) -> Tuple[float, float]:
     return event.mouse_region_x, event.mouse_region_y
 
@@ -191,10 +232,25 @@ def image_space_to_region(x: float, y: float, x1: float, y1: float,
     return x1 + (x + 0.5) * sc, (y1 + y2) * 0.5 + y * sc
 
 
+def image_space_to_region_array(points: Any, x1: float, y1: float,
+                                x2: float, y2: float) -> Any:
+    """ Array version of image_space_to_region for (N, 2) points """
+    return transform_points_2d(points,
+                               image_to_region_matrix(x1, y1, x2, y2))
+
+
+def frame_to_region_array(points: Any, w: float, h: float,
+                          x1: float, y1: float, x2: float, y2: float,
+                          shift_x: float=0.0, shift_y: float=0.0) -> Any:
+    """ Frame pixels to Region (screen) space for (N, 2) points """
+    return transform_points_2d(
+        points, image_to_region_matrix(x1, y1, x2, y2) @
+        frame_to_image_matrix(w, h, shift_x, shift_y))
+
+
 def get_image_space_coord(px: float, py: float, area: Area) -> Tuple[float, float]:
-    x1, y1, x2, y2 = get_camera_border(area)
-    x, y = region_to_image_space(px, py, x1, y1, x2, y2)
-    return x, y
+    m = KTCameraBorder.region_to_image_matrix(area)
+    return float(m[0, 0] * px + m[0, 2]), float(m[1, 1] * py + m[1, 2])
 
 
 def region_to_image_space(x: float, y: float, x1: float, y1: float,
@@ -204,6 +260,22 @@ def region_to_image_space(x: float, y: float, x1: float, y1: float,
     return (x - (x1 + x2) * 0.5) / sc, (y - (y1 + y2) * 0.5) / sc
 
 
+def region_to_image_space_array(points: Any, x1: float, y1: float,
+                                x2: float, y2: float) -> Any:
+    """ Array version of region_to_image_space for (N, 2) points """
+    return transform_points_2d(points,
+                               region_to_image_matrix(x1, y1, x2, y2))
+
+
+def residual_lines(points_from: Any, points_to: Any) -> Any:
+    """ Interleaved (2N, 2) LINES vertices: from[0], to[0], from[1] ... """
+    count = len(points_from)
+    res = np.empty((count * 2, 2), dtype=np.float32)
+    res[0::2] = points_from
+    res[1::2] = points_to
+    return res
+
+
 def pin_to_xyz_from_mesh(
         pin: Any, obj: Object) -> Optional[Tuple[float, float, float]]:
     """ Surface point from barycentric to XYZ using passed mesh"""
@@ -231,6 +303,50 @@ def pin_to_xyz_from_fb_geo_mesh(pin: Any, geo_mesh: Any) -> Tuple[float, float,
     return p
 
 
+def pins_surface_data(pins: List[Any]) -> Tuple[Any, Any]:
+    """ Geo point indices (N, 3) and barycentric weights (N, 3) of pins.
+    Indices of pins without triangle surface point are set to -1 """
+    count = len(pins)
+    idxs = np.full((count, 3), -1, dtype=np.int64)
+    bars = np.zeros((count, 3), dtype=np.float64)
+    for i, pin in enumerate(pins):
+        sp = pin.surface_point
+        gp = sp.geo_point_idxs
+        if len(gp) < 3:
+            continue
+        bar = sp.barycentric_coordinates
+        idxs[i] = (gp[0], gp[1], gp[2])
+        bars[i] = (bar[0], bar[1], bar[2])
+    return idxs, bars
+
+
+def valid_surface_idxs(idxs: Any, verts_count: int) -> Any:
+    return np.all((idxs >= 0) & (idxs < verts_count), axis=1)
+
+
+def barycentric_to_xyz(verts: Any, idxs: Any, bars: Any) -> Any:
+    """ All surface points at once: sum of triangle vertices with weights """
+    return np.einsum('nkj,nk->nj', verts[idxs], bars).astype(np.float32)
+
+
+def surface_points_from_verts(pins: List[Any], verts: Any) -> Any:
+    """ XYZ of pins with valid surface points, others are skipped """
+    idxs, bars = pins_surface_data(pins)
+    valid = valid_surface_idxs(idxs, len(verts))
+    return barycentric_to_xyz(verts, idxs[valid], bars[valid])
+
+
+def surface_points_from_geo_mesh(pins: List[Any], geo_mesh: Any) -> Any:
+    """ Only vertices referenced by pins are read from geo_mesh.
+    Pins without surface point get zero XYZ to keep pins order """
+    idxs, bars = pins_surface_data(pins)
+    used, inverse = np.unique(idxs, return_inverse=True)
+    verts = np.array([geo_mesh.point(i) if i >= 0 else (0.0, 0.0, 0.0)
+                      for i in used],
+                     dtype=np.float64).reshape(-1, 3)
+    return barycentric_to_xyz(verts, inverse.reshape(idxs.shape), bars)
+
+
 def calc_model_mat(model_mat: Any, head_mat: Any) -> Optional[Any]:
     """ Convert model matrix to camera matrix """
     rot_mat = xy_to_xz_rotation_matrix_4x4()
@@ -257,28 +373,16 @@ def get_area_overlay(area: Area) -> Optional[Any]:
     return area.spaces.active.overlay
 
 
-def get_camera_border(area: Area) -> Tuple[float, float, float, float]:
-    if bpy_background_mode():
-        context = get_fake_context()
-        area = context.area
-
-    region = get_area_region(area)
-    assert region.type == 'WINDOW'
-    w = region.width
-    h = region.height
-
-    rv3d = get_area_region_3d(area)
-    z = rv3d.view_camera_zoom
+def calc_camera_border(w: int, h: int, zoom: float,
+                       offset_x: float, offset_y: float,
+                       rx: int, ry: int) -> Tuple[float, float, float, float]:
     # Blender Zoom formula
-    f = (z * 0.01 + math.sqrt(0.5)) ** 2  # f - scale factor
-
-    rx, ry = bpy_render_frame()
+    f = (zoom * 0.01 + math.sqrt(0.5)) ** 2  # f - scale factor
 
     a1 = w / h
     a2 = rx / ry
 
-    offset = (rv3d.view_camera_offset[0] * w * 2 * f,
-              rv3d.view_camera_offset[1] * h * 2 * f)
+    offset = (offset_x * w * 2 * f, offset_y * h * 2 * f)
 
     # This works when Camera Sensor Mode is Auto
     if a1 >= 1.0:
@@ -306,6 +410,62 @@ def get_camera_border(area: Area) -> Tuple[float, float, float, float]:
     return x1, y1, x2, y2
 
 
+class KTCameraBorder:
+    """ Camera border memoized per view state
+    (area, region size, zoom, offset, render size) together with
+    image <-> region affine matrices """
+    _items: Dict[Tuple, Tuple[Tuple[float, float, float, float],
+                              Any, Any]] = {}
+    _max_items: int = 16
+
+    @classmethod
+    def _view_state(cls, area: Area) -> Tuple:
+        if bpy_background_mode():
+            context = get_fake_context()
+            area = context.area
+
+        region = get_area_region(area)
+        assert region.type == 'WINDOW'
+        rv3d = get_area_region_3d(area)
+        offset = rv3d.view_camera_offset
+        return (area.as_pointer(), region.width, region.height,
+                rv3d.view_camera_zoom, offset[0], offset[1],
+                *bpy_render_frame())
+
+    @classmethod
+    def _get_item(cls, area: Area) -> Tuple:
+        state = cls._view_state(area)
+        item = cls._items.get(state)
+        if item is None:
+            if len(cls._items) >= cls._max_items:
+                cls._items = {}
+            border = calc_camera_border(*state[1:])
+            item = (border, image_to_region_matrix(*border),
+                    region_to_image_matrix(*border))
+            cls._items[state] = item
+        return item
+
+    @classmethod
+    def border(cls, area: Area) -> Tuple[float, float, float, float]:
+        return cls._get_item(area)[0]
+
+    @classmethod
+    def image_to_region_matrix(cls, area: Area) -> Any:
+        return cls._get_item(area)[1]
+
+    @classmethod
+    def region_to_image_matrix(cls, area: Area) -> Any:
+        return cls._get_item(area)[2]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._items = {}
+
+
+def get_camera_border(area: Area) -> Tuple[float, float, float, float]:
+    return KTCameraBorder.border(area)
+
+
 def point_is_in_area(area: Area, x: float, y: float) -> bool:
     if bpy_background_mode():
         context = get_fake_context()
@@ -16,14 +16,16 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 
+import time
 import numpy as np
-from typing import Any, List, Callable, Tuple, Optional
+from typing import Any, List, Callable, Tuple, Optional, Dict
 
 from bpy.types import Object, Area, Region, SpaceView3D
 import gpu
 import bgl
 from gpu_extras.batch import batch_for_shader
 
+from ..addon_config import Config
 from .kt_logging import KTLogger
 from .shaders import (simple_fill_vertex_shader,
                       black_fill_fragment_shader, residual_vertex_shader,
@@ -31,23 +33,54 @@ from .shaders import (simple_fill_vertex_shader,
                       dashed_fragment_shader,
                       solid_line_vertex_shader, solid_line_fragment_shader,
                       simple_fill_vertex_local_shader,
-                      smooth_3d_vertex_local_shader, smooth_3d_fragment_shader,
+                      smooth_3d_fragment_shader,
                       uniform_3d_vertex_local_shader,
                       lit_vertex_local_shader,
                       lit_fragment_shader)
 from .coords import (get_mesh_verts,
                      multiply_verts_on_matrix_4x4,
-                     get_scale_vec_4_from_matrix_world,
                      get_triangulation_indices,
                      get_triangles_in_vertex_group)
 from .bpy_common import evaluated_mesh, bpy_background_mode
-from .base_shaders import KTShaderBase
+from .base_shaders import KTShaderBase, float32_attribute, color_attribute
 
 
 _log = KTLogger(__name__)
 
 
+def loop_edge_pairs(loop_totals: Any) -> Any:
+    ''' Loop indices of polygon edges as LINES pairs:
+        (l0, l1), (l1, l2) ... (ln, l0) for every polygon,
+        polygon loops are expected to be stored one after another '''
+    loop_totals = np.asarray(loop_totals, dtype=np.int32)
+    loop_count = int(np.sum(loop_totals))
+    if loop_count == 0:
+        return np.empty((0,), dtype=np.int32)
+    pairs = np.empty((loop_count * 2,), dtype=np.int32)
+    pairs[0::2] = np.arange(loop_count, dtype=np.int32)
+    pairs[1::2] = pairs[0::2] + 1
+    loop_ends = np.cumsum(loop_totals)
+    loop_starts = loop_ends - loop_totals
+    # The last edge of every polygon closes it on its first loop
+    pairs[2 * loop_ends[loop_totals > 0] - 1] = \
+        loop_starts[loop_totals > 0]
+    return pairs
+
+
+def _batch_with_index_buffer(shader: Any, type: str, content: Dict,
+                             index_buffer: Any) -> Any:
+    ''' Same as batch_for_shader but reuses already uploaded indices,
+        so only vertex attributes are sent to GPU '''
+    vbo_format = shader.format_calc()
+    vbo = gpu.types.GPUVertBuf(vbo_format, len(next(iter(content.values()))))
+    for attr_id, data in content.items():
+        vbo.attr_fill(attr_id, data)
+    return gpu.types.GPUBatch(type=type, buf=vbo, elem=index_buffer)
+
+
 class KTEdgeShaderBase(KTShaderBase):
+    pos_width: int = 3
+
     def __init__(self, target_class: Any=SpaceView3D):
         super().__init__(target_class)
         self.fill_shader: Optional[Any] = None
@@ -55,13 +88,14 @@ class KTEdgeShaderBase(KTShaderBase):
         self.fill_batch: Optional[Any] = None
         self.line_batch: Optional[Any] = None
         # Triangle vertices & indices
-        self.vertices: List = []
-        self.triangle_indices: List = []
+        self.vertices: Any = np.empty((0, self.pos_width), dtype=np.float32)
+        self.triangle_indices: Any = np.empty((0, 3), dtype=np.int32)
         # Edge vertices
-        self.edges_vertices: List = []
-        self.edges_indices: List = []
-        self.edges_colors: List = []
-        self.vertices_colors = []
+        self.edges_vertices: Any = np.empty((0, self.pos_width),
+                                            dtype=np.float32)
+        self.edges_indices: Any = np.empty((0,), dtype=np.int32)
+        self.edges_colors: Any = np.empty((0, 4), dtype=np.float32)
+        self.vertices_colors: Any = np.empty((0, 4), dtype=np.float32)
 
         self.backface_culling: bool = False
         self.adaptive_opacity: float = 1.0
@@ -71,15 +105,18 @@ class KTEdgeShaderBase(KTShaderBase):
             self.init_shaders()
 
     def init_color_data(self, color: Tuple[float, float, float, float]):
-        self.edges_colors = [color] * len(self.edges_vertices)
+        self.edge_color = color
+        self.edges_colors = color_attribute(color, len(self.edges_vertices))
 
-    def set_vertices_colors(self, verts: List, colors: List) -> None:
-        self.vertices = verts
-        self.vertices_colors = colors
+    def set_vertices_colors(self, verts: Any, colors: Any) -> None:
+        self.vertices = float32_attribute(verts, self.pos_width)
+        self.vertices_colors = float32_attribute(colors, 4)
+        self.update_batch_inputs(vertices=self.vertices,
+                                 colors=self.vertices_colors)
 
     def clear_vertices(self) -> None:
-        self.vertices = []
-        self.vertices_colors = []
+        self.vertices = np.empty((0, self.pos_width), dtype=np.float32)
+        self.vertices_colors = np.empty((0, 4), dtype=np.float32)
 
     def set_backface_culling(self, state: bool) -> None:
         self.backface_culling = state
@@ -89,8 +126,10 @@ class KTEdgeShaderBase(KTShaderBase):
 
 
 class KTEdgeShader2D(KTEdgeShaderBase):
+    pos_width: int = 2
+
     def __init__(self, target_class: Any):
-        self.edge_lengths: List[float] = []
+        self.edge_lengths: Any = np.empty((0,), dtype=np.float32)
         super().__init__(target_class)
 
     def init_shaders(self) -> None:
@@ -126,8 +165,9 @@ class KTEdgeShader2D(KTEdgeShaderBase):
 
         self.line_batch = batch_for_shader(
             self.line_shader, 'LINES',
-            {'pos': self.vertices, 'color': self.vertices_colors,
-             'lineLength': self.edge_lengths}
+            {'pos': float32_attribute(self.vertices, self.pos_width),
+             'color': float32_attribute(self.vertices_colors, 4),
+             'lineLength': np.asarray(self.edge_lengths, dtype=np.float32)}
         )
 
     def register_handler(self, context: Any,
@@ -178,11 +218,13 @@ class KTScreenRectangleShader2D(KTEdgeShader2D):
     def create_batch(self) -> None:
         if bpy_background_mode():
             return
-        self.edge_vertices_colors = [self.line_color] * len(self.edge_vertices)
+        self.edge_vertices_colors = color_attribute(self.line_color,
+                                                    len(self.edge_vertices))
 
         self.line_batch = batch_for_shader(
             self.line_shader, 'LINES',
-            {'pos': self.edge_vertices, 'color': self.edge_vertices_colors}
+            {'pos': float32_attribute(self.edge_vertices, 2),
+             'color': self.edge_vertices_colors}
         )
         self.fill_batch = batch_for_shader(
             self.fill_shader, 'TRIS',
@@ -194,12 +236,14 @@ class KTScreenRectangleShader2D(KTEdgeShader2D):
         self.edge_vertices = []
         self.edge_vertices_colors = []
         self.edge_lengths = []
+        self.update_batch_inputs(rectangle=())
 
     def add_rectangle(self, x1: int, y1: int, x2: int, y2: int) -> None:
         self.edge_vertices = [(x1, y1), (x1, y2),
                               (x1, y2), (x2, y2),
                               (x2, y2), (x2, y1),
                               (x2, y1), (x1, y1)]
+        self.update_batch_inputs(rectangle=(x1, y1, x2, y2))
 
 
 class KTScreenDashedRectangleShader2D(KTScreenRectangleShader2D):
@@ -211,12 +255,14 @@ class KTScreenDashedRectangleShader2D(KTScreenRectangleShader2D):
     def create_batch(self) -> None:
         if bpy_background_mode():
             return
-        self.edge_vertices_colors = [self.line_color] * len(self.edge_vertices)
+        self.edge_vertices_colors = color_attribute(self.line_color,
+                                                    len(self.edge_vertices))
 
         self.line_batch = batch_for_shader(
             self.line_shader, 'LINES',
-            {'pos': self.edge_vertices, 'color': self.edge_vertices_colors,
-             'lineLength': self.edge_lengths})
+            {'pos': float32_attribute(self.edge_vertices, 2),
+             'color': self.edge_vertices_colors,
+             'lineLength': np.asarray(self.edge_lengths, dtype=np.float32)})
         self.fill_batch = batch_for_shader(
             self.fill_shader, 'TRIS',
             {'pos': self.edge_vertices},
@@ -227,6 +273,7 @@ class KTScreenDashedRectangleShader2D(KTScreenRectangleShader2D):
                               (x1, y2), (x2, y2),
                               (x2, y2), (x2, y1),
                               (x2, y1), (x1, y1)]
+        self.update_batch_inputs(rectangle=(x1, y1, x2, y2))
         dy = y2 - y1
         dx = x2 - x1
         self.edge_lengths = [0, dy, dy, dx + dy, -dx - dy, -dx, -dx, 0]
@@ -236,24 +283,25 @@ class KTEdgeShaderAll2D(KTEdgeShader2D):
     def __init__(self, target_class: Any,
                  line_color: Tuple[float, float, float, float]):
         self.keyframes: List[int] = []
-        self.state: Tuple[float, float] = (-1000.0, -1000.0)
-        self.batch_needs_update: bool = True
         self.line_color: Tuple[float, float, float, float] = line_color
         super().__init__(target_class)
 
     def set_keyframes(self, keyframes: List[int]) -> None:
         self.keyframes = keyframes
-        self.batch_needs_update = True
 
     def _update_keyframe_lines(self, area: Area) -> None:
         bottom = 0
         top = 1000
         reg = self._get_region(area)
-        pos = [reg.view2d.view_to_region(x, 0, clip=False)[0]
-               for x in self.keyframes]
-        self.vertices = [(x, y) for x in pos for y in (bottom, top)]
-        self.vertices_colors = [self.line_color for _ in self.vertices]
-        self.edge_lengths = [x for _ in pos for x in (bottom, top * 0.5)]
+        pos = np.array([reg.view2d.view_to_region(x, 0, clip=False)[0]
+                        for x in self.keyframes], dtype=np.float32)
+        count = len(pos)
+        self.vertices = np.empty((count * 2, 2), dtype=np.float32)
+        self.vertices[:, 0] = np.repeat(pos, 2)
+        self.vertices[:, 1] = np.tile((bottom, top), count)
+        self.vertices_colors = color_attribute(self.line_color, count * 2)
+        self.edge_lengths = np.tile(
+            np.array((bottom, top * 0.5), dtype=np.float32), count)
 
     def _get_region(self, area: Area) -> Optional[Region]:
         return area.regions[-1]
@@ -277,11 +325,11 @@ class KTEdgeShaderAll2D(KTEdgeShader2D):
         reg = self._get_region(area)
         current_state = (reg.view2d.view_to_region(0, 0, clip=False),
                          reg.view2d.view_to_region(100, 0, clip=False))
-        if self.batch_needs_update or current_state != self.state:
-            self.state = current_state
+        # Keyframe lines depend on timeline view, so they are checked here
+        if self.update_batch_inputs(keyframes=tuple(self.keyframes),
+                                    view_state=current_state):
             self._update_keyframe_lines(area)
-            self.batch_needs_update = False
-            self.create_batch()
+            self.update_batch()
 
         bgl.glEnable(bgl.GL_BLEND)
         bgl.glEnable(bgl.GL_LINE_SMOOTH)
@@ -365,6 +413,9 @@ class KTEdgeShader3D(KTEdgeShaderBase):
             self.line_shader, 'LINES',
             {'pos': self.edges_vertices, 'color': self.edges_colors})
 
+    def rebuild_batches(self) -> None:
+        self.create_batches()
+
     def init_shaders(self) -> None:
         self.fill_shader = gpu.types.GPUShader(
             simple_fill_vertex_shader(), black_fill_fragment_shader())
@@ -393,47 +444,113 @@ class KTEdgeShader3D(KTEdgeShaderBase):
         pass
 
 
+def decimated_edges(verts: Any, edges: Any, count: int) -> Any:
+    ''' The longest edges subset, in original order for better locality '''
+    if len(edges) <= count:
+        return edges
+    vectors = verts[edges[:, 1]] - verts[edges[:, 0]]
+    lengths = np.einsum('ij,ij->i', vectors, vectors)
+    keep = np.argpartition(lengths, len(edges) - count)[len(edges) - count:]
+    return edges[np.sort(keep)]
+
+
 class KTEdgeShaderLocal3D(KTEdgeShader3D):
+    lod_min_edges: int = Config.wireframe_lod_min_edges
+    lod_edges: int = Config.wireframe_lod_edges
+    lod_idle_delay: float = Config.wireframe_lod_idle_delay
+
     def __init__(self, target_class: Any, mask_color: Tuple):
         self.object_world_matrix: Any = np.eye(4, dtype=np.float32)
         self.selection_fill_color: Tuple[float, float, float, float] = mask_color
         self.selection_fill_shader: Optional[Any] = None
         self.selection_fill_batch: Optional[Any] = None
         self.selection_triangle_indices: List[Tuple[int, int, int]] = []
+        # Topology cache: triangulation and edges are only
+        # recalculated when mesh topology changes
+        self._topology_signature: Optional[Tuple] = None
+        self._mesh_edges: Any = np.empty((0, 2), dtype=np.int32)
+        self._fill_index_buffer: Optional[Any] = None
+        self._edges_index_buffer: Optional[Any] = None
+        self._selection_index_buffer: Optional[Any] = None
+        self._topology_changed: bool = True
+        self._vertices_changed: bool = True
+        self._selection_changed: bool = True
+        # Level of detail: decimated edges are drawn during interaction
+        self._lod_edges: Optional[Any] = None
+        self._lod_index_buffer: Optional[Any] = None
+        self.lod_line_batch: Optional[Any] = None
+        self._lod_hold: bool = False
+        self._lod_last_event: float = 0.0
+        self._lod_drawn: bool = False
         super().__init__(target_class)
 
     def init_shaders(self) -> None:
         self.fill_shader = gpu.types.GPUShader(
             simple_fill_vertex_local_shader(), black_fill_fragment_shader())
 
+        # Wireframe colour is a uniform, so colour changes
+        # do not need vertex data upload
         self.line_shader = gpu.types.GPUShader(
-            smooth_3d_vertex_local_shader(), smooth_3d_fragment_shader())
+            uniform_3d_vertex_local_shader(), smooth_3d_fragment_shader())
 
         self.selection_fill_shader = gpu.types.GPUShader(
             uniform_3d_vertex_local_shader(), smooth_3d_fragment_shader())
 
+    def init_color_data(self, color: Tuple[float, float, float, float]):
+        self.edge_color = color
+
     def create_batches(self) -> None:
         if bpy_background_mode():
             return
-        self.fill_batch = batch_for_shader(
-                    self.fill_shader, 'TRIS',
-                    {'pos': self.vertices},
-                    indices=self.triangle_indices)
-        self.line_batch = batch_for_shader(
-            self.line_shader, 'LINES',
-            {'pos': self.edges_vertices, 'color': self.edges_colors})
-
-        verts = []
-        indices = []
+        vertices_changed = self._vertices_changed or self.fill_batch is None
+        if self._topology_changed or self._fill_index_buffer is None:
+            self._fill_index_buffer = gpu.types.GPUIndexBuf(
+                type='TRIS', seq=self.triangle_indices)
+            self._edges_index_buffer = gpu.types.GPUIndexBuf(
+                type='LINES', seq=self._mesh_edges)
+            self._lod_index_buffer = None if self._lod_edges is None else \
+                gpu.types.GPUIndexBuf(type='LINES', seq=self._lod_edges)
+        if vertices_changed:
+            # Lines share vertex positions with fill instead of
+            # uploading two positions per edge
+            self.fill_batch = _batch_with_index_buffer(
+                self.fill_shader, 'TRIS', {'pos': self.vertices},
+                self._fill_index_buffer)
+            self.line_batch = _batch_with_index_buffer(
+                self.line_shader, 'LINES', {'pos': self.vertices},
+                self._edges_index_buffer)
+            self.lod_line_batch = None if self._lod_index_buffer is None \
+                else _batch_with_index_buffer(
+                    self.line_shader, 'LINES', {'pos': self.vertices},
+                    self._lod_index_buffer)
+        if vertices_changed or self._selection_changed \
+                or self.selection_fill_batch is None:
+            self._create_selection_batch()
+
+        self._topology_changed = False
+        self._vertices_changed = False
+        self._selection_changed = False
+
+    def _create_selection_batch(self) -> None:
+        verts = np.empty((0, 3), dtype=np.float32)
+        indices = np.empty((0, 3), dtype=np.int32)
         verts_count = len(self.vertices)
         if verts_count > 0 and len(self.selection_triangle_indices) > 0:
             max_index = np.max(self.selection_triangle_indices)
             if max_index < verts_count:
                 verts = self.vertices
                 indices = self.selection_triangle_indices
-        self.selection_fill_batch = batch_for_shader(
+        if self._selection_changed or self._selection_index_buffer is None:
+            self._selection_index_buffer = gpu.types.GPUIndexBuf(
+                type='TRIS', seq=indices)
+        if len(verts) == 0:
+            self.selection_fill_batch = batch_for_shader(
+                self.selection_fill_shader, 'TRIS', {'pos': verts},
+                indices=indices)
+            return
+        self.selection_fill_batch = _batch_with_index_buffer(
             self.selection_fill_shader, 'TRIS', {'pos': verts},
-            indices=indices)
+            self._selection_index_buffer)
 
     def set_object_world_matrix(self, bpy_matrix_world: Any) -> None:
         self.object_world_matrix = np.array(bpy_matrix_world,
@@ -442,33 +559,81 @@ class KTEdgeShaderLocal3D(KTEdgeShader3D):
     def init_geom_data_from_mesh(self, obj: Any) -> None:
         # self.vertices for evaluated mesh coords
         # self.triangle_indices for hidden mesh drawing
-        # self.edges_vertices for wireframe drawing
-        mw = obj.matrix_world
-        scale_vec = get_scale_vec_4_from_matrix_world(mw)
-        scale_vec = np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32)
-        scm = np.diag(scale_vec)
-        scminv = np.diag(1.0 / scale_vec)
-
-        self.object_world_matrix = scminv @ np.array(mw, dtype=np.float32).transpose()
+        # self._mesh_edges for wireframe drawing (as index buffer)
+        # Model matrix is a shader uniform, so a matrix-only change
+        # needs no batch updates at all
+        self.set_object_world_matrix(obj.matrix_world)
 
         mesh = evaluated_mesh(obj)
-        verts = get_mesh_verts(mesh)
-
-        self.vertices = multiply_verts_on_matrix_4x4(verts, scm)
-        self.triangle_indices = get_triangulation_indices(mesh)
-
         edges = np.empty((len(mesh.edges), 2), dtype=np.int32)
         mesh.edges.foreach_get(
             'vertices', np.reshape(edges, len(mesh.edges) * 2))
 
-        self.edges_vertices = self.vertices[edges.ravel()]
+        signature = (len(mesh.vertices), len(mesh.edges),
+                     len(mesh.polygons), len(mesh.loops))
+        if signature != self._topology_signature or \
+                not np.array_equal(edges, self._mesh_edges):
+            _log.output(f'{self.__class__.__name__}: topology changed')
+            self._topology_signature = signature
+            self._mesh_edges = edges
+            self.triangle_indices = get_triangulation_indices(mesh)
+            self.edges_indices = edges.ravel()
+            self._topology_changed = True
+            self.mark_batch_dirty()
+
+        verts = get_mesh_verts(mesh)
+        if self._topology_changed or not np.array_equal(verts, self.vertices):
+            self.vertices = verts
+            self._vertices_changed = True
+            self.mark_batch_dirty()
+        if self._topology_changed:
+            self._init_lod_edges()
+
+    def _init_lod_edges(self) -> None:
+        # Once per topology, vertex moves keep the same subset
+        if len(self._mesh_edges) < self.lod_min_edges:
+            self._lod_edges = None
+            return
+        self._lod_edges = decimated_edges(self.vertices, self._mesh_edges,
+                                          self.lod_edges)
+        _log.output(f'{self.__class__.__name__}: LOD edges '
+                    f'{len(self._lod_edges)} of {len(self._mesh_edges)}')
+
+    def begin_interaction(self) -> None:
+        ''' Decimated wireframe until end_interaction '''
+        self._lod_hold = True
+
+    def end_interaction(self) -> None:
+        self._lod_hold = False
+        self._lod_last_event = 0.0
+
+    def pulse_interaction(self) -> None:
+        ''' Decimated wireframe for lod_idle_delay after last call '''
+        self._lod_last_event = time.perf_counter()
+
+    def lod_is_active(self) -> bool:
+        if self._lod_edges is None:
+            return False
+        return self._lod_hold or \
+            time.perf_counter() - self._lod_last_event < self.lod_idle_delay
+
+    def needs_full_detail_redraw(self) -> bool:
+        return self._lod_drawn and not self.lod_is_active()
 
     def draw_edges(self) -> None:
-        self.line_shader.bind()
-        self.line_shader.uniform_vector_float(
-            self.line_shader.uniform_from_name('modelMatrix'),
+        shader = self.line_shader
+        shader.bind()
+        shader.uniform_float('adaptiveOpacity', 1.0)
+        shader.uniform_float('color', self.edge_color)
+        shader.uniform_vector_float(
+            shader.uniform_from_name('modelMatrix'),
             self.object_world_matrix.ravel(), 16)
-        self.line_batch.draw(self.line_shader)
+        self._lod_drawn = self.lod_is_active() and \
+            self.lod_line_batch is not None
+        if self._lod_drawn:
+            self.lod_line_batch.draw(shader)
+        else:
+            self.line_batch.draw(shader)
 
     def draw_empty_fill(self) -> None:
         self.fill_shader.bind()
@@ -489,8 +654,15 @@ class KTEdgeShaderLocal3D(KTEdgeShader3D):
 
     def init_selection_from_mesh(self, obj: Object, mask_3d: str,
                                  inverted: bool) -> None:
-        self.selection_triangle_indices = get_triangles_in_vertex_group(
-            obj, mask_3d, inverted)
+        # Vertex group membership can change without any topology change,
+        # so the selection is always recalculated and only compared here
+        indices = get_triangles_in_vertex_group(obj, mask_3d, inverted)
+        if not self._topology_changed and \
+                np.array_equal(indices, self.selection_triangle_indices):
+            return
+        self.selection_triangle_indices = indices
+        self._selection_changed = True
+        self.mark_batch_dirty()
 
 
 class KTLitEdgeShaderLocal3D(KTEdgeShaderLocal3D):
@@ -499,8 +671,9 @@ class KTLitEdgeShaderLocal3D(KTEdgeShaderLocal3D):
         self.lit_shader: Optional[Any] = None
         self.lit_batch: Optional[Any] = None
         self.lit_flag: bool = False
-        self.lit_edge_vertices: List = []
-        self.lit_edge_vertex_normals: List = []
+        self.lit_edge_vertices: Any = np.empty((0, 3), dtype=np.float32)
+        self.lit_edge_vertex_normals: Any = np.empty((0, 3), dtype=np.float32)
+        self._lit_changed: bool = True
         super().__init__(target_class, mask_color)
 
     def set_lit_wireframe(self, state: bool) -> None:
@@ -529,26 +702,14 @@ class KTLitEdgeShaderLocal3D(KTEdgeShaderLocal3D):
         polys = np.empty((poly_count,), dtype=np.int32)
         mesh.polygons.foreach_get('loop_total', np.reshape(polys, poly_count))
 
-        edge_indices = np.empty((loop_count * 2,), dtype=np.int32)
-        edge_normals = np.empty((loop_count * 2, 3), dtype=np.float32)
-        i = 0
-        k = 0
-        for p_count in polys:
-            indices = loops[i: i + p_count]
-            normals = loop_normals[i: i + p_count]
-            delta = p_count * 2
-            edge_indices[k: k + delta] = \
-                np.roll(np.repeat(indices, 2), -1, axis=0)
-            edge_normals[k: k + delta] = \
-                np.roll(np.repeat(normals, 2, axis=0), -1, axis=0)
-            i += p_count
-            k += delta
-
-        self.lit_edge_vertices = self.vertices[edge_indices.ravel()]
-        self.lit_edge_vertex_normals = edge_normals
+        pairs = loop_edge_pairs(polys)
+        self.lit_edge_vertices = self.vertices[loops[pairs]]
+        self.lit_edge_vertex_normals = loop_normals[pairs]
+        self._lit_changed = True
+        self.mark_batch_dirty()
 
     def init_color_data(self, color: Tuple[float, float, float, float]) -> None:
-        self.edges_colors = [color] * len(self.edges_vertices)
+        super().init_color_data(color)
         self.lit_color = color
         self.edge_color = color
 
@@ -556,15 +717,19 @@ class KTLitEdgeShaderLocal3D(KTEdgeShaderLocal3D):
         if bpy_background_mode():
             return
         super().create_batches()
+        if not self._lit_changed and self.lit_batch is not None:
+            return
         self.lit_batch = batch_for_shader(
             self.lit_shader, 'LINES',
             {'pos': self.lit_edge_vertices,
              'vertNormal': self.lit_edge_vertex_normals})
+        self._lit_changed = False
 
     def draw_edges(self) -> None:
-        if not self.lit_is_working():
+        if not self.lit_is_working() or self.lod_is_active():
             return super().draw_edges()
 
+        self._lod_drawn = False
         shader = self.lit_shader
         shader.bind()
         shader.uniform_float('color', self.lit_color)
@@ -17,16 +17,30 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import numpy as np
-from typing import Any, Callable, Optional, Tuple, List
+from typing import Any, Callable, Optional, Tuple, List, Dict
 import re
 import os
+import time
+from contextlib import contextmanager
 
 import bpy
 from bpy.types import Image, Camera, Object, MovieClip
 
 from ..addon_config import Config
 from .kt_logging import KTLogger
-from .bpy_common import bpy_end_frame
+from .ui_redraw import force_ui_redraw
+from .bpy_common import (bpy_end_frame,
+                         bpy_current_frame,
+                         bpy_timer_register,
+                         bpy_timer_unregister)
+from .color_transform import (gamma_image,
+                              exposure_gamma,
+                              threshold_image,
+                              is_default_tone,
+                              gain_from_exposure,
+                              compact_pixels,
+                              gamma_colors,
+                              inverse_gamma_colors)
 
 
 _log = KTLogger(__name__)
@@ -56,18 +70,132 @@ get_pixels_data: Callable = _get_pixels_data_new \
     if bpy.app.version >= (2, 83, 0) else _get_pixels_data_old
 
 
-def np_array_from_bpy_image(bpy_image: Optional[Image]) -> Optional[Any]:
+class KTPixelBufferPool:
+    ''' Size-keyed pool of float32 pixel buffers for image readback.
+        Leased buffer has to be released when its data is not needed
+        anymore, so the next frame of the same size reuses it.
+        Main thread only '''
+    _free: Dict[Tuple, List[Any]] = {}
+    _allocated_bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    peak_bytes: int = 0
+
+    @classmethod
+    def lease(cls, shape: Tuple) -> Any:
+        key = tuple(shape)
+        free = cls._free.get(key)
+        if free:
+            cls.hits += 1
+            return free.pop()
+        cls.misses += 1
+        buffer = np.empty(key, dtype=np.float32)
+        cls._allocated_bytes += buffer.nbytes
+        cls.peak_bytes = max(cls.peak_bytes, cls._allocated_bytes)
+        return buffer
+
+    @classmethod
+    def release(cls, buffer: Optional[Any]) -> None:
+        if buffer is None:
+            return
+        free = cls._free.setdefault(buffer.shape, [])
+        if any(x is buffer for x in free):
+            return
+        if len(free) < Config.pixel_buffer_pool_size:
+            free.append(buffer)
+        else:
+            cls._allocated_bytes -= buffer.nbytes
+
+    @classmethod
+    @contextmanager
+    def leased(cls, shape: Tuple) -> Any:
+        buffer = cls.lease(shape)
+        try:
+            yield buffer
+        finally:
+            cls.release(buffer)
+
+    @classmethod
+    def clear(cls) -> None:
+        for free in cls._free.values():
+            cls._allocated_bytes -= sum(x.nbytes for x in free)
+        cls._free = {}
+
+    @classmethod
+    def reset_counters(cls) -> None:
+        cls.hits = 0
+        cls.misses = 0
+        cls.peak_bytes = cls._allocated_bytes
+
+    @classmethod
+    def stats(cls) -> Dict:
+        return {'hits': cls.hits, 'misses': cls.misses,
+                'allocated_bytes': cls._allocated_bytes,
+                'peak_bytes': cls.peak_bytes,
+                'free_buffers': sum(len(x) for x in cls._free.values())}
+
+
+def np_array_from_bpy_image(bpy_image: Optional[Image],
+                            pooled: bool=False) -> Optional[Any]:
+    ''' pooled=True leases the result from KTPixelBufferPool,
+        the caller has to release it '''
     if not bpy_image or not bpy_image.size or not bpy_image.channels:
         return None
     w, h = bpy_image.size[:2]
     if w > 0 and h > 0:
-        np_img = np.empty((h, w, bpy_image.channels), dtype=np.float32)
+        shape = (h, w, bpy_image.channels)
+        np_img = KTPixelBufferPool.lease(shape) if pooled \
+            else np.empty(shape, dtype=np.float32)
         get_pixels_data(bpy_image.pixels, np_img.ravel())
     else:
         return None
     return np_img
 
 
+@contextmanager
+def pooled_np_array_from_bpy_image(bpy_image: Optional[Image]) -> Any:
+    np_img = np_array_from_bpy_image(bpy_image, pooled=True)
+    try:
+        yield np_img
+    finally:
+        KTPixelBufferPool.release(np_img)
+
+
+def cached_pixels(np_img: Any, is_float: bool) -> Any:
+    ''' Storage format for image caches. 8-bit images are always kept
+        as uint8 (lossless), float images are kept as float16 only
+        when Config.compact_pixel_pipeline is on '''
+    if is_float and not Config.compact_pixel_pipeline:
+        return np_img
+    return compact_pixels(np_img, is_float)
+
+
+def np_cached_array_from_bpy_image(bpy_image: Optional[Image]) -> Optional[Any]:
+    if bpy_image and bpy_image.is_float and \
+            not Config.compact_pixel_pipeline:
+        return np_array_from_bpy_image(bpy_image)
+    # Readback buffer is temporary here, the compact copy is kept
+    with pooled_np_array_from_bpy_image(bpy_image) as np_img:
+        if np_img is None:
+            return None
+        return cached_pixels(np_img, bpy_image.is_float)
+
+
+def oriented_float_image(np_img: Any, orientation: int) -> Any:
+    ''' Rotated contiguous float32 copy made in one pass.
+        uint8 data is normalized to [0..1] on the fly,
+        float16 data is widened '''
+    rotated = np.rot90(np_img, orientation)
+    if np_img.dtype == np.float32 and orientation % 4 == 0:
+        return np.ascontiguousarray(rotated)
+    res = np.empty(rotated.shape, dtype=np.float32)
+    if np_img.dtype == np.uint8:
+        np.multiply(rotated, 1.0 / 255.0, out=res)
+    else:
+        np.copyto(res, rotated)
+    return res
+
+
 def load_rgba(camera: Optional[Camera]) -> Optional[Any]:
     if not camera or camera.cam_image is None:
         return None
@@ -79,9 +207,7 @@ def load_rgba(camera: Optional[Camera]) -> Optional[Any]:
 
 
 def gamma_np_image(np_img: Any, gamma: float=1.0) -> Any:
-    res_img = np_img.copy()
-    res_img[:, :, :3] = np.power(np_img[:, :, :3], gamma)
-    return res_img
+    return gamma_image(np_img, gamma)
 
 
 def get_background_image_object(camobj: Camera, index: int=0) -> Any:
@@ -223,42 +349,184 @@ def np_image_to_average_grayscale(np_img: Any) -> Any:
 
 
 def np_threshold_image(np_img: Any, threshold: float=0.0) -> Any:
-    return (255 * ((np_img[:, :, 0] +
-                    np_img[:, :, 1] +
-                    np_img[:, :, 2]) / 3.0 > threshold)).astype(np.uint8)
+    return threshold_image(np_img, threshold)
 
 
-def np_array_from_background_image(camobj: Camera, index: int=0) -> Optional[Any]:
+def np_array_from_background_image(camobj: Camera, index: int=0,
+                                   pooled: bool=False) -> Optional[Any]:
     bg_img = get_background_image_object(camobj, index)
-    np_img = np_array_from_bpy_image(bg_img.image)
+    np_img = np_array_from_bpy_image(bg_img.image, pooled=pooled)
     return np_img
 
 
+class KTToneMappingCache:
+    ''' Original pixels of tone mapped images. Every slider change is
+        recalculated from the cached source into a reused output buffer,
+        so the image is never reloaded from disk '''
+    _items: Dict[int, Dict] = {}
+    _refine_state: Optional[Tuple[str, float, float]] = None
+
+    @classmethod
+    def _image_signature(cls, image: Image) -> Tuple:
+        w, h = image.size[:2]
+        frame = bpy_current_frame() \
+            if image.source in {'MOVIE', 'SEQUENCE'} else 0
+        return image.filepath, w, h, image.channels, image.is_float, frame
+
+    @classmethod
+    def get_item(cls, image: Image) -> Optional[Dict]:
+        key = image.as_pointer()
+        item = cls._items.get(key)
+        if item is None:
+            return None
+        if item['signature'] != cls._image_signature(image):
+            del cls._items[key]
+            return None
+        return item
+
+    @classmethod
+    def _store_item(cls, image: Image, np_img: Any) -> Dict:
+        # 8-bit images are stored losslessly as uint8 (4 times less memory)
+        # and tone mapped via lookup tables
+        source = cached_pixels(np_img, image.is_float)
+        if np.shares_memory(source, np_img):
+            # np_img becomes the output buffer and is rewritten on apply
+            source = source.copy()
+        item = {'signature': cls._image_signature(image),
+                'source': source,
+                'output': np_img,
+                'last_update': 0.0}
+        key = image.as_pointer()
+        cls._items.pop(key, None)
+        while len(cls._items) >= max(Config.tone_mapping_cache_size, 1):
+            del cls._items[next(iter(cls._items))]
+        cls._items[key] = item
+        return item
+
+    @classmethod
+    def get_or_create_item(cls, image: Image) -> Optional[Dict]:
+        item = cls.get_item(image)
+        if item is not None:
+            return item
+        if image.is_dirty:
+            # Pixels could be changed before caching
+            image.reload()
+            _log.output('KTToneMappingCache: IMAGE RELOADED')
+        np_img = np_array_from_bpy_image(image)
+        if np_img is None:
+            return None
+        return cls._store_item(image, np_img)
+
+    @classmethod
+    def clear(cls, image: Optional[Image]=None) -> None:
+        if image is None:
+            cls._items = {}
+        else:
+            cls._items.pop(image.as_pointer(), None)
+
+    @classmethod
+    def _calc_preview(cls, item: Dict, exposure: float, gamma: float,
+                      step: int) -> None:
+        source = item['source']
+        out = item['output']
+        small = exposure_gamma(source[::step, ::step], exposure, gamma)
+        for i in range(step):
+            for j in range(step):
+                part = out[i::step, j::step]
+                part[:] = small[:part.shape[0], :part.shape[1]]
+
+    @classmethod
+    def apply(cls, image: Image, exposure: float, gamma: float) -> bool:
+        item = cls.get_or_create_item(image)
+        if item is None:
+            return False
+
+        now = time.time()
+        interactive = now - item['last_update'] < \
+            Config.tone_mapping_interactive_interval
+        item['last_update'] = now
+
+        step = Config.tone_mapping_preview_step
+        if interactive and step > 1:
+            cls._calc_preview(item, exposure, gamma, step)
+            cls._start_refine_timer(image, exposure, gamma)
+        else:
+            exposure_gamma(item['source'], exposure, gamma,
+                           out=item['output'])
+        assign_pixels_data(image.pixels, item['output'].ravel())
+        return True
+
+    @classmethod
+    def restore(cls, image: Image) -> bool:
+        item = cls.get_item(image)
+        if item is None:
+            return False
+        exposure_gamma(item['source'], Config.default_tone_exposure,
+                       Config.default_tone_gamma, out=item['output'])
+        assign_pixels_data(image.pixels, item['output'].ravel())
+        return True
+
+    @classmethod
+    def _start_refine_timer(cls, image: Image,
+                            exposure: float, gamma: float) -> None:
+        cls._refine_state = (image.name, exposure, gamma)
+        bpy_timer_unregister(cls._refine_timer_callback)
+        bpy_timer_register(
+            cls._refine_timer_callback,
+            first_interval=Config.tone_mapping_interactive_interval)
+
+    @classmethod
+    def _refine_timer_callback(cls) -> Optional[float]:
+        if cls._refine_state is None:
+            return None
+        image_name, exposure, gamma = cls._refine_state
+        image = find_bpy_image_by_name(image_name)
+        item = cls.get_item(image) if image else None
+        if item is None:
+            cls._refine_state = None
+            return None
+        interval = Config.tone_mapping_interactive_interval
+        if time.time() - item['last_update'] < interval:
+            return interval  # Slider is still being dragged
+        cls._refine_state = None
+        exposure_gamma(item['source'], exposure, gamma, out=item['output'])
+        assign_pixels_data(image.pixels, item['output'].ravel())
+        force_ui_redraw('VIEW_3D')
+        _log.output('KTToneMappingCache: full resolution refined')
+        return None
+
+
+def clear_tone_mapping_cache(image: Optional[Image]=None) -> None:
+    KTToneMappingCache.clear(image)
+
+
 def reset_tone_mapping(cam_image: Optional[Image]) -> None:
     if not cam_image:
         return
     if cam_image.is_dirty:
+        if KTToneMappingCache.restore(cam_image):
+            _log.output('reset_tone_mapping: SOURCE RESTORED FROM CACHE')
+            return
         cam_image.reload()
         _log.output('reset_tone_mapping: IMAGE RELOADED')
 
 
-def tone_mapping(cam_image, exposure, gamma):
+def tone_mapping(cam_image: Optional[Image],
+                 exposure: float, gamma: float) -> None:
     if not cam_image:
         return
-    reset_tone_mapping(cam_image)
 
-    if np.all(np.isclose([exposure, gamma], [Config.default_tone_exposure,
-                                             Config.default_tone_gamma],
-                                             atol=0.001)):
-        _log.output('SKIP tone mapping, only reload()')
+    if is_default_tone(exposure, gamma, Config.default_tone_exposure,
+                       Config.default_tone_gamma):
+        _log.output('SKIP tone mapping, only restore source')
+        reset_tone_mapping(cam_image)
         return
-    np_img = np_array_from_bpy_image(cam_image)
 
-    gain = pow(2, exposure / 2.2)
-    np_img[:, :, :3] = np.power(gain * np_img[:, :, :3], 1.0 / gamma)
-    assign_pixels_data(cam_image.pixels, np_img.ravel())
-    _log.output('restore_tone_mapping: exposure: {} '
-                '(gain: {}) gamma: {}'.format(exposure, gain, gamma))
+    if not KTToneMappingCache.apply(cam_image, exposure, gamma):
+        return
+    _log.output('restore_tone_mapping: exposure: {} (gain: {}) '
+                'gamma: {}'.format(exposure, gain_from_exposure(exposure),
+                                   gamma))
 
 
 def create_compatible_bpy_image(np_img: Any, name: str= 'tmp_name') -> Any:
@@ -298,8 +566,8 @@ def check_gl_image(image: Optional[Image]) -> bool:
 
 
 def gamma_color(col: List[float], power: float=2.2) -> List[float]:
-    return [x ** power for x in col]
+    return gamma_colors(col, power).tolist()
 
 
 def inverse_gamma_color(col: List[float], power: float=2.2) -> List[float]:
-    return [x ** (1.0 / power) for x in col]
+    return inverse_gamma_colors(col, power).tolist()
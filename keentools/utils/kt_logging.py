@@ -17,7 +17,7 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import logging
-from typing import Optional
+from typing import Any, Optional
 
 
 _log_colors = {
@@ -31,7 +31,18 @@ _log_colors = {
     'reset': '\x1b[0m'}
 
 
+_output_levels = {
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'debug': logging.DEBUG}
+
+
 class KTLogger():
+    ''' Messages can be passed as ready strings, as %-style format
+        with args or as callables returning a string. Formatting
+        is done only when the level is enabled for the logger
+    '''
     def __init__(self, name, *, output: str='debug',
                  info_color: Optional[str]=None,
                  debug_color: Optional[str]=None,
@@ -50,30 +61,37 @@ class KTLogger():
             self.output = self.error
         else:
             self.output = self.debug
+        self._output_level = _output_levels.get(output, logging.DEBUG)
 
-    def info(self, message: str) -> None:
-        if self._info_color is None:
-            self._logger.info(message)
-        else:
-            self._logger.info(self.color(self._info_color, message))
+    def enabled(self, level: Optional[str]=None) -> bool:
+        ''' Cheap guard for code that prepares data for logging only.
+            Checks output level when level is not set '''
+        return self._logger.isEnabledFor(
+            self._output_level if level is None else _output_levels[level])
 
-    def warning(self, message: str) -> None:
-        if self._warning_color is None:
-            self._logger.warning(message)
-        else:
-            self._logger.warning(self.color(self._warning_color, message))
+    def _log(self, level: int, color: Optional[str],
+             message: Any, args: Any) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+        if color is not None:
+            message = self.color(color, message)
+        self._logger.log(level, message)
 
-    def debug(self, message: str) -> None:
-        if self._debug_color is None:
-            self._logger.debug(message)
-        else:
-            self._logger.debug(self.color(self._debug_color, message))
+    def info(self, message: Any, *args: Any) -> None:
+        self._log(logging.INFO, self._info_color, message, args)
 
-    def error(self, message: str) -> None:
-        if self._error_color is None:
-            self._logger.error(message)
-        else:
-            self._logger.error(self.color(self._error_color, message))
+    def warning(self, message: Any, *args: Any) -> None:
+        self._log(logging.WARNING, self._warning_color, message, args)
+
+    def debug(self, message: Any, *args: Any) -> None:
+        self._log(logging.DEBUG, self._debug_color, message, args)
+
+    def error(self, message: Any, *args: Any) -> None:
+        self._log(logging.ERROR, self._error_color, message, args)
 
     def color(self, color: str, txt: str) -> str:
         ''' Add an ASCII color code at the beginning
@@ -16,13 +16,21 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future
 
 import bpy
 import numpy as np
 
 from ..facebuilder_config import FBConfig, get_fb_settings
 from ..facebuilder.fbloader import FBLoader
-from ..utils.images import load_rgba, find_bpy_image_by_name, assign_pixels_data
+from ..utils.images import (find_bpy_image_by_name,
+                            assign_pixels_data,
+                            np_cached_array_from_bpy_image,
+                            oriented_float_image,
+                            KTToneMappingCache)
+from ..utils.color_transform import srgb_to_linear
 from ..blender_independent_packages.pykeentools_loader import module as pkt_module
 
 
@@ -142,18 +150,103 @@ def _get_fb_for_bake_tex(headnum, head):
 
 
 def _sRGB_to_linear(img):
-    img_rgb = img[:, :, :3]
-    img_rgb[img_rgb < 0.04045] = 25 * img_rgb[img_rgb < 0.04045] / 323
-    img_rgb[img_rgb >= 0.04045] = ((200 * img_rgb[img_rgb >= 0.04045] + 11) / 211) ** (12 / 5)
-    return img
-
-
-def _create_frame_data_loader(settings, head, camnums, fb):
+    return srgb_to_linear(img, out=img)
+
+
+class _BakeFramesCache:
+    ''' Original camera image pixels kept between texture bakes
+        of one pin mode session. 8-bit images are stored as uint8,
+        see cached_pixels '''
+    _items: Dict[int, Tuple[Tuple, Any]] = {}
+
+    @classmethod
+    def _signature(cls, image: Any) -> Tuple:
+        w, h = image.size[:2]
+        try:
+            mtime = os.path.getmtime(bpy.path.abspath(image.filepath))
+        except (OSError, ValueError):
+            mtime = 0.0
+        return (image.filepath, w, h, image.channels, image.is_float,
+                image.packed_file is not None, mtime)
+
+    @classmethod
+    def get(cls, image: Any) -> Optional[Any]:
+        item = cls._items.get(image.as_pointer())
+        if item is None or image.is_dirty:
+            return None
+        signature, np_img = item
+        return np_img if signature == cls._signature(image) else None
+
+    @classmethod
+    def put(cls, image: Any, np_img: Any) -> None:
+        cls._items[image.as_pointer()] = (cls._signature(image), np_img)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._items = {}
+
+    @classmethod
+    def keep_only(cls, images: Any) -> None:
+        keys = {image.as_pointer() for image in images}
+        cls._items = {k: v for k, v in cls._items.items() if k in keys}
+
+
+def clear_bake_frames_cache() -> None:
+    _BakeFramesCache.clear()
+
+
+def _read_camera_source_image(cam: Any) -> Optional[Any]:
+    # Main thread only: bpy data access.
+    # Tone mapping source keeps untouched pixels of the image
+    image = cam.cam_image
+    np_img = _BakeFramesCache.get(image)
+    if np_img is not None:
+        return np_img
+
+    tone_item = KTToneMappingCache.get_item(image)
+    if tone_item is not None:
+        np_img = tone_item['source']
+    else:
+        cam.reset_tone_mapping()
+        np_img = np_cached_array_from_bpy_image(image)
+        if np_img is None:
+            return None
+    _BakeFramesCache.put(image, np_img)
+    return np_img
+
+
+class _FrameImagesLoader:
+    ''' Prepares oriented float frames in worker threads ahead of
+        texture builder requests '''
+    def __init__(self, sources: Any, orientations: Any):
+        self._sources = sources
+        self._orientations = orientations
+        self._workers = max(1, min(len(sources), os.cpu_count() or 1,
+                                   FBConfig.bake_tex_loader_threads))
+        self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        self._futures: Dict[int, Future] = {}
+
+    def _submit(self, index: int) -> None:
+        if index in self._futures or index >= len(self._sources):
+            return
+        self._futures[index] = self._executor.submit(
+            oriented_float_image, self._sources[index],
+            self._orientations[index])
+
+    def get(self, index: int) -> Any:
+        for i in range(index, index + self._workers + 1):
+            self._submit(i)
+        return self._futures.pop(index).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._futures = {}
+
+
+def _create_frame_data_loader(settings, head, camnums, fb, images_loader):
     def frame_data_loader(kf_idx):
         cam = head.cameras[camnums[kf_idx]]
-        cam.reset_tone_mapping()
-
-        img = load_rgba(cam)
+        img = images_loader.get(kf_idx)
 
         frame_data = pkt_module().texture_builder.FrameData()
         frame_data.geo = fb.applied_args_model_at(cam.get_keyframe())
@@ -187,8 +280,18 @@ def bake_tex(headnum, tex_name):
         return False
     
     fb = _get_fb_for_bake_tex(headnum, head)
+
+    cameras = [head.cameras[i] for i in camnums]
+    _BakeFramesCache.keep_only([cam.cam_image for cam in head.cameras
+                                if cam.cam_image])
+    sources = [_read_camera_source_image(cam) for cam in cameras]
+    if any(x is None for x in sources):
+        logger.debug("CAMERA IMAGE CANNOT BE READ")
+        return False
+    images_loader = _FrameImagesLoader(
+        sources, [cam.orientation for cam in cameras])
     frame_data_loader = _create_frame_data_loader(
-        settings, head, camnums, fb)
+        settings, head, camnums, fb, images_loader)
 
     bpy.context.window_manager.progress_begin(0, 1)
 
@@ -198,12 +301,17 @@ def bake_tex(headnum, tex_name):
             return False
 
     progress_callBack = ProgressCallBack()
-    built_texture = pkt_module().texture_builder.build_texture(
-        frames_count, frame_data_loader, progress_callBack,
-        settings.tex_height, settings.tex_width, settings.tex_face_angles_affection,
-        settings.tex_uv_expand_percents, settings.tex_back_face_culling,
-        settings.tex_equalize_brightness, settings.tex_equalize_colour, settings.tex_fill_gaps)
-    bpy.context.window_manager.progress_end()
+    try:
+        built_texture = pkt_module().texture_builder.build_texture(
+            frames_count, frame_data_loader, progress_callBack,
+            settings.tex_height, settings.tex_width, settings.tex_face_angles_affection,
+            settings.tex_uv_expand_percents, settings.tex_back_face_culling,
+            settings.tex_equalize_brightness, settings.tex_equalize_colour, settings.tex_fill_gaps)
+    finally:
+        images_loader.shutdown()
+        if not settings.pinmode:
+            _BakeFramesCache.clear()
+        bpy.context.window_manager.progress_end()
 
     _create_bpy_texture_from_img(built_texture, tex_name)
     return True
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ##### END GPL LICENSE BLOCK #####
 
+import numpy as np
 from typing import List, Optional, Tuple, Any
 
 from bpy.types import SpaceView3D
@@ -29,27 +30,146 @@ from .shaders import (flat_color_3d_vertex_shader,
                       circular_dot_fragment_shader,
                       flat_color_2d_vertex_shader)
 from ..preferences.user_preferences import UserPreferences
-from .base_shaders import KTShaderBase
+from .base_shaders import KTShaderBase, float32_attribute
+
+
+class KTPointsGrid:
+    ''' Uniform grid over 2D points for nearest and box queries '''
+    def __init__(self, points: Any):
+        self._points: Any = points
+        count = len(points)
+        if count == 0:
+            return
+        self._min: Any = points.min(axis=0)
+        extent = float(np.max(points.max(axis=0) - self._min))
+        cells = max(1, int(np.sqrt(count)))
+        self._cell: float = max(extent / cells, 1.0e-6)
+        self._size: int = cells + 1
+        ij = self._cells_of(points)
+        keys = ij[:, 0] * self._size + ij[:, 1]
+        self._order: Any = np.argsort(keys, kind='stable')
+        self._keys: Any = keys[self._order]
+
+    def _cells_of(self, points: Any) -> Any:
+        ij = np.floor((points - self._min) / self._cell).astype(np.int64)
+        return np.clip(ij, 0, self._size - 1)
+
+    def _indices_in_cells(self, i1: int, j1: int, i2: int, j2: int) -> Any:
+        i1, j1 = max(i1, 0), max(j1, 0)
+        i2, j2 = min(i2, self._size - 1), min(j2, self._size - 1)
+        if i1 > i2 or j1 > j2:
+            return np.empty((0,), dtype=np.int64)
+        starts = np.arange(i1, i2 + 1) * self._size
+        left = np.searchsorted(self._keys, starts + j1, side='left')
+        right = np.searchsorted(self._keys, starts + j2, side='right')
+        return np.concatenate([self._order[a:b] for a, b in zip(left, right)])
+
+    def _ring_indices(self, ci: int, cj: int, r: int) -> Any:
+        if r == 0:
+            return self._indices_in_cells(ci, cj, ci, cj)
+        return np.concatenate([
+            self._indices_in_cells(ci - r, cj - r, ci + r, cj - r),
+            self._indices_in_cells(ci - r, cj + r, ci + r, cj + r),
+            self._indices_in_cells(ci - r, cj - r + 1, ci - r, cj + r - 1),
+            self._indices_in_cells(ci + r, cj - r + 1, ci + r, cj + r - 1)])
+
+    def nearest(self, x: float, y: float,
+                dist2: float=4000000.0) -> Tuple[int, float]:
+        ''' Same result as coords.nearest_point '''
+        nearest = -1
+        if len(self._points) == 0:
+            return nearest, dist2
+        ci, cj = self._cells_of(np.array([[x, y]]))[0]
+        for r in range(self._size):
+            if (max(r - 1, 0) * self._cell) ** 2 >= dist2:
+                break
+            indices = self._ring_indices(ci, cj, r)
+            if len(indices) == 0:
+                continue
+            d2 = np.sum((self._points[indices] - (x, y)) ** 2, axis=1)
+            best = int(np.argmin(d2))
+            if d2[best] < dist2:
+                dist2 = float(d2[best])
+                nearest = int(indices[best])
+        return nearest, dist2
+
+    def inside_rectangle(self, x1: float, y1: float,
+                         x2: float, y2: float) -> List[int]:
+        if len(self._points) == 0:
+            return []
+        (i1, j1), (i2, j2) = self._cells_of(np.array([[x1, y1], [x2, y2]]))
+        indices = np.sort(self._indices_in_cells(i1, j1, i2, j2))
+        p = self._points[indices]
+        inside = (x1 <= p[:, 0]) & (p[:, 0] <= x2) & \
+                 (y1 <= p[:, 1]) & (p[:, 1] <= y2)
+        return indices[inside].tolist()
 
 
 class KTScreenPins:
+    ''' Pins in image space as (N, 2) array with selection and
+        disabled masks. Spatial index is rebuilt lazily after changes '''
     def __init__(self):
-        self._pins: List[Tuple[float, float]] = []
+        self._pins: Any = np.empty((0, 2), dtype=np.float32)
+        self._selected: Any = np.zeros((0,), dtype=np.bool_)
+        self._disabled: Any = np.zeros((0,), dtype=np.bool_)
+        self._grid: Optional[KTPointsGrid] = None
         self._current_pin: Optional[Tuple[float, float]] = None
         self._current_pin_num: int = -1
-        self._disabled_pins: List[int] = []
-        self._selected_pins: List[int] = []
         self._add_selection_mode: bool = False
         self._move_pin_mode: bool = False
 
-    def arr(self) -> List:
-        return self._pins
-
-    def set_pins(self, arr: List[Tuple[float, float]]) -> None:
-        self._pins = arr
+    def arr(self) -> Any:
+        ''' Read-only view, use set_pin to change pin position '''
+        view = self._pins.view()
+        view.flags.writeable = False
+        return view
+
+    def _resize_masks(self, count: int) -> None:
+        def _resized(mask: Any) -> Any:
+            res = np.zeros((count,), dtype=np.bool_)
+            size = min(count, len(mask))
+            res[:size] = mask[:size]
+            return res
+
+        if len(self._selected) != count:
+            self._selected = _resized(self._selected)
+        if len(self._disabled) != count:
+            self._disabled = _resized(self._disabled)
+
+    def _indices_mask(self, indices: Any) -> Any:
+        count = len(self._pins)
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        mask = np.zeros((count,), dtype=np.bool_)
+        mask[indices[(indices >= 0) & (indices < count)]] = True
+        return mask
+
+    def set_pins(self, arr: Any) -> None:
+        self._pins = np.array(arr, dtype=np.float32).reshape(-1, 2)
+        self._resize_masks(len(self._pins))
+        self._grid = None
+
+    def set_pin(self, index: int, vec2d: Tuple[float, float]) -> None:
+        self._pins[index] = vec2d
+        self._grid = None
+
+    def set_pins_at(self, indices: Any, arr: Any) -> None:
+        self._pins[np.asarray(indices, dtype=np.int64)] = arr
+        self._grid = None
 
     def add_pin(self, vec2d: Tuple[float, float]) -> None:
-        self._pins.append(vec2d)
+        self._pins = np.append(self._pins,
+                               np.array([vec2d], dtype=np.float32), axis=0)
+        self._resize_masks(len(self._pins))
+        self._grid = None
+
+    def _spatial_index(self) -> KTPointsGrid:
+        if self._grid is None:
+            self._grid = KTPointsGrid(self._pins)
+        return self._grid
+
+    def nearest_pin(self, x: float, y: float,
+                    dist: float=4000000.0) -> Tuple[int, float]:  # dist squared
+        return self._spatial_index().nearest(x, y, dist)
 
     def current_pin_num(self) -> Optional[int]:
         return self._current_pin_num
@@ -58,7 +178,7 @@ class KTScreenPins:
         self._current_pin_num = value
 
     def set_current_pin_num_to_last(self) -> None:
-        self._current_pin_num = len(self.arr()) - 1
+        self._current_pin_num = len(self._pins) - 1
 
     def current_pin(self) -> Optional[Tuple[float, float]]:
         return self._current_pin
@@ -71,34 +191,38 @@ class KTScreenPins:
         self._current_pin_num = -1
 
     def get_selected_pins(self) -> List[int]:
-        return self._selected_pins
+        return np.flatnonzero(self._selected).tolist()
+
+    def get_selected_mask(self) -> Any:
+        return self._selected
 
     def set_selected_pins(self, selected_pins: List[int]) -> None:
-        self._selected_pins = selected_pins
+        self._selected = self._indices_mask(selected_pins)
 
     def add_selected_pins(self, selected_pins: List[int]) -> None:
-        self._selected_pins = list(set(self._selected_pins + selected_pins))
+        self._selected |= self._indices_mask(selected_pins)
 
     def toggle_selected_pins(self, selected_pins: List[int]) -> None:
-        old_selected_set = set(self._selected_pins)
-        new_selected_set = set(selected_pins)
-        self._selected_pins = list(old_selected_set.symmetric_difference(new_selected_set))
+        self._selected ^= self._indices_mask(selected_pins)
 
     def exclude_selected_pin(self, pin_number: int) -> None:
-        self.set_selected_pins([x for x in self.get_selected_pins()
-                                if x != pin_number])
+        if 0 <= pin_number < len(self._selected):
+            self._selected[pin_number] = False
 
     def clear_selected_pins(self) -> None:
-        self._selected_pins = []
+        self._selected = np.zeros((len(self._pins),), dtype=np.bool_)
 
     def get_disabled_pins(self) -> List[int]:
-        return self._disabled_pins
+        return np.flatnonzero(self._disabled).tolist()
+
+    def get_disabled_mask(self) -> Any:
+        return self._disabled
 
     def set_disabled_pins(self, disabled_pins: List[int]) -> None:
-        self._disabled_pins = disabled_pins
+        self._disabled = self._indices_mask(disabled_pins)
 
     def clear_disabled_pins(self) -> None:
-        self._disabled_pins = []
+        self._disabled = np.zeros((len(self._pins),), dtype=np.bool_)
 
     def pins_inside_rectangle(self, x1: float, y1: float,
                               x2: float, y2: float) -> List[int]:
@@ -106,8 +230,7 @@ class KTScreenPins:
             x1, x2 = x2, x1
         if y1 > y2:
             y1, y2 = y2, y1
-        return [i for i, p in enumerate(self._pins)
-                if x1 <= p[0] <= x2 and y1 <= p[1] <= y2]
+        return self._spatial_index().inside_rectangle(x1, y1, x2, y2)
 
     def set_add_selection_mode(self, value: bool) -> None:
         self._add_selection_mode = value
@@ -121,15 +244,12 @@ class KTScreenPins:
         self.clear_disabled_pins()
 
     def remove_pin(self, index: int) -> None:
-        if index in self._selected_pins:
-            self._selected_pins.remove(index)
-        self._selected_pins = [x if x < index else x - 1
-                               for x in self._selected_pins]
-        if index in self._disabled_pins:
-            self._disabled_pins.remove(index)
-        self._disabled_pins = [x if x < index else x - 1
-                               for x in self._disabled_pins]
-        del self.arr()[index]
+        if not 0 <= index < len(self._pins):
+            return
+        self._pins = np.delete(self._pins, index, axis=0)
+        self._selected = np.delete(self._selected, index)
+        self._disabled = np.delete(self._disabled, index)
+        self._grid = None
 
     def move_pin_mode(self) -> bool:
         return self._move_pin_mode
@@ -139,18 +259,20 @@ class KTScreenPins:
 
 
 class KTShaderPoints(KTShaderBase):
+    pos_width: int = 3
+
     def __init__(self, target_class: Any=SpaceView3D):
         self.shader: Any = None
         self.batch: Any = None
 
-        self.vertices: List[Tuple[float, float, float]] = []
-        self.vertices_colors: List[Tuple[float, float, float, float]] = []
+        self.vertices: Any = np.empty((0, self.pos_width), dtype=np.float32)
+        self.vertices_colors: Any = np.empty((0, 4), dtype=np.float32)
 
         self._point_size: float = UserPreferences.get_value_safe(
             'pin_size', UserPreferences.type_float)
         super().__init__(target_class)
 
-    def get_vertices(self) -> List[Tuple[float, float, float]]:
+    def get_vertices(self) -> Any:
         return self.vertices
 
     def set_point_size(self, ps: float) -> None:
@@ -159,13 +281,15 @@ class KTShaderPoints(KTShaderBase):
     def get_point_size(self) -> float:
         return self._point_size
 
-    def set_vertices_colors(self, verts: List, colors: List) -> None:
-        self.vertices = verts
-        self.vertices_colors = colors
+    def set_vertices_colors(self, verts: Any, colors: Any) -> None:
+        self.vertices = float32_attribute(verts, self.pos_width)
+        self.vertices_colors = float32_attribute(colors, 4)
+        self.update_batch_inputs(vertices=self.vertices,
+                                 colors=self.vertices_colors)
 
     def clear_vertices(self) -> None:
-        self.vertices = []
-        self.vertices_colors = []
+        self.vertices = np.empty((0, self.pos_width), dtype=np.float32)
+        self.vertices_colors = np.empty((0, 4), dtype=np.float32)
 
     def draw_callback(self, context: Any) -> None:
         # Force Stop
@@ -190,6 +314,8 @@ class KTShaderPoints(KTShaderBase):
 
 
 class KTPoints2D(KTShaderPoints):
+    pos_width: int = 2
+
     def init_shaders(self) -> None:
         if bpy_background_mode():
             return
@@ -42,8 +42,8 @@ _log = KTLogger(__name__)
 
 class KTTrisShaderLocal3D(KTShaderBase):
     def __init__(self, target_class: Any, mask_color=GTConfig.mask_3d_color):
-        self.vertices: List[Tuple[float, float, float]] = []
-        self.triangle_indices: List[List[int]] = []
+        self.vertices: Any = np.empty((0, 3), dtype=np.float32)
+        self.triangle_indices: Any = np.empty((0, 3), dtype=np.int32)
         self.color: Tuple[float, float, float, float] = mask_color
         self.fill_shader: Any = None
         self.fill_batch: Any = None
@@ -61,8 +61,8 @@ class KTTrisShaderLocal3D(KTShaderBase):
     def create_batch(self) -> None:
         if bpy_background_mode():
             return
-        verts = []
-        indices = []
+        verts = np.empty((0, 3), dtype=np.float32)
+        indices = np.empty((0, 3), dtype=np.int32)
 
         verts_count = len(self.vertices)
         if verts_count > 0:
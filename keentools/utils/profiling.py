@@ -0,0 +1,188 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+# KeenTools for blender is a blender addon for using KeenTools in Blender.
+# Copyright (C) 2022  KeenTools
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ##### END GPL LICENSE BLOCK #####
+
+import os
+import json
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from .kt_logging import KTLogger
+from ..addon_config import Config
+
+
+_log = KTLogger(__name__)
+
+
+class KTRingBuffer:
+    ''' Last records of (start, duration) in seconds '''
+    def __init__(self, size: int):
+        self._data: Any = np.zeros((size, 2), dtype=np.float64)
+        self._next: int = 0
+        self._count: int = 0
+
+    def append(self, start: float, duration: float) -> None:
+        self._data[self._next] = (start, duration)
+        self._next = (self._next + 1) % len(self._data)
+        self._count = min(self._count + 1, len(self._data))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def records(self) -> Any:
+        ''' Records in chronological order '''
+        if self._count < len(self._data):
+            return self._data[:self._count]
+        return np.roll(self._data, -self._next, axis=0)
+
+
+class _KTStage:
+    __slots__ = ('_name', '_start')
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *args: Any) -> None:
+        KTProfiler.record(self._name, self._start,
+                          time.perf_counter() - self._start)
+
+
+class _KTNullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_null_stage = _KTNullStage()
+
+
+class KTProfiler:
+    ''' Add-on wide timings of interactive stages (solve, batch rebuild,
+        redraw, frame load). Nothing is measured while it is disabled '''
+    _enabled: bool = Config.hot_path_profiling
+    _buffer_size: int = Config.profiler_buffer_size
+    _stages: Dict[str, KTRingBuffer] = {}
+    _origin: float = time.perf_counter()
+
+    @classmethod
+    def enable(cls, state: bool=True) -> None:
+        cls._enabled = state
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._enabled
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._stages = {}
+        cls._origin = time.perf_counter()
+
+    @classmethod
+    def stage(cls, name: str) -> Any:
+        ''' with KTProfiler.stage('solve'): ... '''
+        if not cls._enabled:
+            return _null_stage
+        return _KTStage(name)
+
+    @classmethod
+    def record(cls, name: str, start: float, duration: float) -> None:
+        buffer = cls._stages.get(name)
+        if buffer is None:
+            buffer = KTRingBuffer(cls._buffer_size)
+            cls._stages[name] = buffer
+        buffer.append(start, duration)
+
+    @classmethod
+    def stage_names(cls) -> List[str]:
+        return list(cls._stages.keys())
+
+    @classmethod
+    def stage_stats(cls, name: str) -> Dict[str, float]:
+        ''' Durations in milliseconds '''
+        buffer = cls._stages.get(name)
+        if buffer is None or len(buffer) == 0:
+            return {'count': 0, 'last': 0.0, 'mean': 0.0, 'max': 0.0}
+        durations = buffer.records()[:, 1] * 1000
+        return {'count': len(durations), 'last': float(durations[-1]),
+                'mean': float(durations.mean()),
+                'max': float(durations.max())}
+
+    @classmethod
+    def overlay_text(cls, y: int=90, line_height: int=20) -> List[Dict]:
+        ''' Rows for KTScreenText placed above the default message '''
+        rows = []
+        for i, name in enumerate(sorted(cls._stages.keys())):
+            stats = cls.stage_stats(name)
+            rows.append({'text': f'{name}: last {stats["last"]:.1f} ms '
+                                 f'mean {stats["mean"]:.1f} ms '
+                                 f'max {stats["max"]:.1f} ms '
+                                 f'({stats["count"]})',
+                         'color': (1., 1., 0., 0.75),
+                         'size': 16,
+                         'x': 20,
+                         'y': y + i * line_height})
+        return rows
+
+    @classmethod
+    def chrome_trace(cls) -> Dict:
+        ''' Trace Event Format: chrome://tracing or ui.perfetto.dev '''
+        pid = os.getpid()
+        events = []
+        for tid, (name, buffer) in enumerate(cls._stages.items()):
+            for start, duration in buffer.records():
+                events.append({'name': name, 'cat': 'keentools', 'ph': 'X',
+                               'ts': (start - cls._origin) * 1.0e+6,
+                               'dur': duration * 1.0e+6,
+                               'pid': pid, 'tid': tid})
+        events.sort(key=lambda x: x['ts'])
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    @classmethod
+    def save_chrome_trace(cls, filepath: str=Config.profiler_trace_filename
+                          ) -> bool:
+        try:
+            with open(filepath, 'w') as f:
+                json.dump(cls.chrome_trace(), f)
+        except OSError as err:
+            _log.error(f'save_chrome_trace: {str(err)}')
+            return False
+        _log.info(f'Profiler trace saved: {filepath}')
+        return True
+
+
+def profile_stage(name: str) -> Callable:
+    ''' Decorator recording function timings as the named stage '''
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            if not KTProfiler.is_enabled():
+                return func(*args, **kwargs)
+            with KTProfiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,48 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+# KeenTools for blender is a blender addon for using KeenTools in Blender.
+# Copyright (C) 2022  KeenTools
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ##### END GPL LICENSE BLOCK #####
+
+import zlib
+import base64
+import hashlib
+
+from ..addon_config import Config
+
+
+def serial_hash(serial: str) -> str:
+    return hashlib.blake2b(serial.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def is_compressed_serial(data: str) -> bool:
+    return data.startswith(Config.serial_compression_prefix)
+
+
+def compress_serial(serial: str) -> str:
+    if serial == '':
+        return serial
+    packed = zlib.compress(serial.encode('utf-8'),
+                           Config.serial_compression_level)
+    return Config.serial_compression_prefix + \
+        base64.b64encode(packed).decode('ascii')
+
+
+def decompress_serial(data: str) -> str:
+    ''' Strings saved before compression was introduced are returned as is '''
+    if not is_compressed_serial(data):
+        return data
+    packed = base64.b64decode(data[len(Config.serial_compression_prefix):])
+    return zlib.decompress(packed).decode('utf-8')
@@ -132,32 +132,6 @@ def simple_fill_vertex_local_shader() -> str:
     '''
 
 
-def smooth_3d_vertex_local_shader() -> str:
-    return '''
-    uniform mat4 ModelViewProjectionMatrix;
-    uniform mat4 modelMatrix;
-
-    #ifdef USE_WORLD_CLIP_PLANES
-    uniform mat4 ModelMatrix;
-    #endif
-
-    in vec3 pos;
-    in vec4 color;
-
-    out vec4 finalColor;
-
-    void main()
-    {
-      gl_Position = ModelViewProjectionMatrix * modelMatrix * vec4(pos, 1.0);
-      finalColor = color;
-
-    #ifdef USE_WORLD_CLIP_PLANES
-      world_clip_planes_calc_clip_distance((ModelMatrix * modelMatrix * vec4(pos, 1.0)).xyz);
-    #endif
-    }
-    '''
-
-
 def smooth_3d_fragment_shader() -> str:
     txt = '''
     // Based on gpu.shader.code_from_builtin('3D_SMOOTH_COLOR')['fragment_shader']
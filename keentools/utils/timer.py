@@ -17,9 +17,12 @@
 # ##### END GPL LICENSE BLOCK #####
 
 import threading
-from typing import Any, Callable, Optional
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
 
 from .kt_logging import KTLogger
+from ..addon_config import Config
 from .bpy_common import bpy_timer_register, bpy_timer_unregister
 
 
@@ -94,6 +97,58 @@ class KTStopShaderTimer(KTTimer):
         self._stop(self.check_pinmode)
 
 
+class KTDragUpdates:
+    ''' Coalesces mouse-move events of pin dragging. Heavy update
+        (solve etc.) is skipped while previous one does not fit into
+        frame budget, only the latest cursor position is kept pending.
+        Pending position is flushed by timer events or on release
+    '''
+    def __init__(self, budget: float=Config.pin_drag_frame_budget):
+        self._budget: float = budget
+        self._pending: Optional[Tuple] = None
+        self._last_finish: float = 0.0
+        self._last_duration: float = 0.0
+        self._timer: Any = None
+        self._window_manager: Any = None
+
+    def push(self, *position: Any) -> None:
+        self._pending = position
+
+    def has_pending(self) -> bool:
+        return self._pending is not None
+
+    def pop(self) -> Optional[Tuple]:
+        position = self._pending
+        self._pending = None
+        return position
+
+    def is_due(self) -> bool:
+        if self._last_duration <= self._budget:
+            return True
+        return time.perf_counter() - self._last_finish >= self._last_duration
+
+    @contextmanager
+    def measure(self) -> Any:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last_finish = time.perf_counter()
+            self._last_duration = self._last_finish - start
+
+    def start_timer(self, context: Any) -> None:
+        self.stop_timer()
+        self._window_manager = context.window_manager
+        self._timer = self._window_manager.event_timer_add(
+            time_step=self._budget, window=context.window)
+
+    def stop_timer(self) -> None:
+        if self._timer is not None:
+            self._window_manager.event_timer_remove(self._timer)
+        self._timer = None
+        self._window_manager = None
+
+
 class RepeatTimer(threading.Timer):
     def run(self):
         interval = self.interval
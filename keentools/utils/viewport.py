@@ -25,6 +25,7 @@ from bpy.types import Area
 from ..preferences.user_preferences import UserPreferences
 from .points import KTScreenPins
 from .coords import get_pixel_relative_size
+from .profiling import KTProfiler
 
 
 class KTViewport:
@@ -143,6 +144,13 @@ class KTViewport:
     def message_to_screen(self, msg: List) -> None:
         self.texter().set_message(msg)
 
+    def update_profiler_overlay(self) -> None:
+        if not KTProfiler.is_enabled():
+            return
+        texter = self.texter()
+        self.message_to_screen(texter.get_default_text() +
+                               KTProfiler.overlay_text())
+
     def revert_default_screen_message(self, unregister=False) -> None:
         texter = self.texter()
         texter.set_message(texter.get_default_text())
@@ -15,6 +15,7 @@ from keentools.geotracker_config import GTConfig
 from keentools.utils.animation import create_locrot_keyframe
 from keentools.utils.bpy_common import (bpy_current_frame,
                                         bpy_set_current_frame,
+                                        bpy_render_frame,
                                         bpy_scene,
                                         update_depsgraph)
 from keentools.geotracker_config import get_gt_settings, get_current_geotracker_item
@@ -263,6 +264,30 @@ class GeoTrackerTest(unittest.TestCase):
         _log_output(f'Cube location diff: {loc_diff}')
         assert loc_diff < GTTestConfig.cube_location_tolerance
 
+    def test_unsaved_changes_are_reloaded(self) -> None:
+        new_scene()
+        test_utils.load_scene(GTTestConfig.cube_tracked_scene_filename)
+        keyframe = GTTestConfig.cube_start_frame
+        bpy_set_current_frame(keyframe)
+        self.assertTrue(GTLoader.load_geotracker())
+        loaded_hash = GTLoader._loaded_serial_hash
+        self.assertIsNotNone(loaded_hash)
+        # The same serial is not deserialized again
+        self.assertTrue(GTLoader.load_geotracker())
+        self.assertEqual(GTLoader._loaded_serial_hash, loaded_hash)
+
+        # Tracker handed out for changes is deserialized by the next loading
+        gt = GTLoader.kt_geotracker()
+        self.assertIsNone(GTLoader._loaded_serial_hash)
+        pins_count = gt.pins_count()
+
+        w, h = bpy_render_frame()
+        self.assertIsNotNone(GTLoader.add_pin(keyframe, (w * 0.5, h * 0.5)))
+        self.assertEqual(gt.pins_count(), pins_count + 1)
+        # Tracker is not saved, so its stored state is restored
+        self.assertTrue(GTLoader.load_geotracker())
+        self.assertEqual(gt.pins_count(), pins_count)
+
 
 if __name__ == '__main__':
     try:
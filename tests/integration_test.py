@@ -20,6 +20,7 @@ from keentools.utils import coords, materials
 from keentools.addon_config import get_operator
 from keentools.facebuilder_config import FBConfig, get_fb_settings
 from keentools.facebuilder.fbloader import FBLoader
+from keentools.utils.serial_storage import serial_hash
 from keentools.facebuilder.pick_operator import reset_detected_faces, get_detected_faces
 
 
@@ -255,6 +256,42 @@ class FaceBuilderTest(unittest.TestCase):
         test_utils.delete_blendshapes()
         self.assertTrue(headobj.data.shape_keys is None)
 
+    def test_repeated_model_loading(self):
+        test_utils.new_scene()
+        self._head_cams_and_pins()
+        settings = get_fb_settings()
+        headnum = settings.get_last_headnum()
+        head = settings.get_head(headnum)
+
+        FBLoader.new_builder()
+        self.assertIsNone(FBLoader._loaded_serial_hash)
+        self.assertTrue(FBLoader.load_model(headnum))
+        loaded_hash = FBLoader._loaded_serial_hash
+        self.assertEqual(loaded_hash, serial_hash(head.get_serial_str()))
+
+        # The same serial is not deserialized again
+        self.assertTrue(FBLoader.load_model(headnum))
+        self.assertEqual(FBLoader._loaded_serial_hash, loaded_hash)
+
+        # Builder handed out for changes is deserialized by the next loading
+        fb = FBLoader.get_builder()
+        self.assertIsNone(FBLoader._loaded_serial_hash)
+        kid = fb.keyframes()[0]
+        pins_count = fb.pins_count(kid)
+        self.assertGreater(pins_count, 0)
+        fb.remove_pins(kid)
+        self.assertTrue(FBLoader.load_model(headnum))
+        self.assertEqual(fb.pins_count(kid), pins_count)
+        self.assertEqual(FBLoader._loaded_serial_hash, loaded_hash)
+
+        # Changed serial is loaded
+        FBLoader.save_fb_serial_str(headnum)
+        self.assertEqual(FBLoader._loaded_serial_hash,
+                         serial_hash(head.get_serial_str()))
+        head.set_serial_str('')
+        self.assertFalse(FBLoader.load_model(headnum))
+        self.assertIsNone(FBLoader._loaded_serial_hash)
+
     def test_uv_switch(self):
         if TestConfig.skip_this_test('test_uv_switch'):
             return
@@ -0,0 +1,1326 @@
+# -------
+# KeenTools for Blender performance tests (micro-benchmarks)
+# start it from commandline:
+# blender -b -P /full_path_to/performance_test.py
+# -------
+import unittest
+import logging
+import time
+import json
+import os
+import tempfile
+from typing import Any, Callable, List, Tuple
+
+import numpy as np
+
+import bpy
+from bpy.types import SpaceView3D
+
+from keentools.addon_config import Config
+from keentools.utils import color_transform
+from keentools.utils.images import (KTPixelBufferPool, KTToneMappingCache,
+                                    np_array_from_bpy_image)
+from keentools.utils.edges import (KTLitEdgeShaderLocal3D, loop_edge_pairs,
+                                   decimated_edges)
+from keentools.utils import coords
+from keentools.utils.bpy_common import bpy_render_frame
+from keentools.utils.points import KTScreenPins
+from keentools.utils import serial_storage
+from keentools.utils.kt_logging import KTLogger
+from keentools.utils.timer import KTDragUpdates
+from keentools.utils.profiling import KTProfiler, KTRingBuffer, profile_stage
+from keentools.facebuilder.utils.edges import mesh_edge_indices_and_uvs
+from keentools.facebuilder.fbloader import FBLoader
+from keentools.geotracker.gtloader import GTLoader
+from keentools.utils.blendshapes import (transfer_shape_keys,
+                                        facs_blendshapes_verts)
+from keentools.utils.base_shaders import (float32_attribute, color_attribute,
+                                          set_colors_at, KTShaderBase,
+                                          KTBatchStats)
+
+
+_logger: Any = logging.getLogger(__name__)
+
+
+def _log_output(message: str) -> None:
+    global _logger
+    _logger.info(message)
+
+
+def _log_error(message: str) -> None:
+    global _logger
+    _logger.error(message)
+
+
+class PerfTestConfig:
+    image_width = 2000
+    image_height = 1000
+    repeats = 5
+    memory_test_sizes = ((3840, 2160), (6144, 3456), (7680, 4320))
+    grid_subdivisions = 700  # about 500k vertices
+    lit_edges_loop_count = 1000000
+    residual_pins_count = 5000
+    screen_pins_count = 10000
+    screen_pins_queries = 200
+    surface_pins_count = 2000
+    surface_mesh_points = 20000
+    lod_test_edges = 2000000
+    fb_mesh_faces = 20000
+    shape_keys_grid_subdivisions = 120
+    shape_keys_counts = (51, 150)
+    facs_count = 51
+    facs_mesh_points = 30000
+    serial_keyframes = 3000
+    log_calls = 10000
+    drag_events = 60
+    drag_event_interval = 0.002
+    drag_solve_time = 0.02
+    profiler_calls = 100000
+    gt_pins_count = 5000
+    gt_selected_pins = 2000
+
+
+def _megapixels(np_img: Any) -> float:
+    return np_img.shape[0] * np_img.shape[1] / 1.0e+6
+
+
+def _best_time(func: Callable, repeats: int=PerfTestConfig.repeats) -> float:
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _report(name: str, old_time: float, new_time: float,
+            megapixels: float) -> None:
+    _log_output(f'{name}: old {1000 * old_time / megapixels:.2f} ms/MP '
+                f'new {1000 * new_time / megapixels:.2f} ms/MP '
+                f'speedup x{old_time / max(new_time, 1.0e-9):.2f}')
+
+
+def _random_rgba(width: int=PerfTestConfig.image_width,
+                 height: int=PerfTestConfig.image_height) -> Any:
+    return np.random.rand(height, width, 4).astype(np.float32)
+
+
+# --- Legacy implementations kept for comparison ---
+
+def _old_srgb_to_linear(img: Any) -> Any:
+    img_rgb = img[:, :, :3]
+    img_rgb[img_rgb < 0.04045] = 25 * img_rgb[img_rgb < 0.04045] / 323
+    img_rgb[img_rgb >= 0.04045] = \
+        ((200 * img_rgb[img_rgb >= 0.04045] + 11) / 211) ** (12 / 5)
+    return img
+
+
+def _old_tone_mapping(np_img: Any, exposure: float, gamma: float) -> Any:
+    gain = pow(2, exposure / 2.2)
+    np_img[:, :, :3] = np.power(gain * np_img[:, :, :3], 1.0 / gamma)
+    return np_img
+
+
+def _old_gamma_np_image(np_img: Any, gamma: float=1.0) -> Any:
+    res_img = np_img.copy()
+    res_img[:, :, :3] = np.power(np_img[:, :, :3], gamma)
+    return res_img
+
+
+def _old_threshold_image(np_img: Any, threshold: float=0.0) -> Any:
+    return (255 * ((np_img[:, :, 0] +
+                    np_img[:, :, 1] +
+                    np_img[:, :, 2]) / 3.0 > threshold)).astype(np.uint8)
+
+
+class ColorTransformTest(unittest.TestCase):
+    def test_srgb_to_linear(self):
+        np_img = _random_rgba()
+        mp = _megapixels(np_img)
+        expected = _old_srgb_to_linear(np_img.copy())
+        result = color_transform.srgb_to_linear(np_img)
+        self.assertTrue(np.allclose(expected, result, atol=1.0e-6))
+
+        buffer = np_img.copy()
+        old_time = _best_time(lambda: _old_srgb_to_linear(buffer))
+        new_time = _best_time(
+            lambda: color_transform.srgb_to_linear(np_img, out=buffer))
+        _report('srgb_to_linear', old_time, new_time, mp)
+
+        np_img8 = (np_img * 255).astype(np.uint8)
+        lut_time = _best_time(
+            lambda: color_transform.srgb_to_linear(np_img8, out=buffer))
+        _report('srgb_to_linear uint8 LUT', old_time, lut_time, mp)
+        self.assertTrue(np.allclose(
+            color_transform.srgb_to_linear(np_img8),
+            color_transform.srgb_to_linear(np_img8.astype(np.float32) / 255),
+            atol=1.0e-6))
+
+    def test_linear_to_srgb_roundtrip(self):
+        np_img = _random_rgba()
+        linear = color_transform.srgb_to_linear(np_img)
+        self.assertTrue(np.allclose(
+            np_img, color_transform.linear_to_srgb(linear), atol=1.0e-5))
+
+    def test_non_contiguous_output(self):
+        np_img = _random_rgba()
+        buffer = np.empty((np_img.shape[1], np_img.shape[0], 4),
+                          dtype=np.float32).transpose(1, 0, 2)
+        with self.assertRaises(ValueError):
+            color_transform.srgb_to_linear(np_img, out=buffer)
+        with self.assertRaises(ValueError):
+            color_transform.exposure_gamma(np_img, 1.5, 1.8, out=buffer)
+
+    def test_exposure_gamma(self):
+        np_img = _random_rgba()
+        mp = _megapixels(np_img)
+        exposure, gamma = 1.5, 1.8
+        expected = _old_tone_mapping(np_img.copy(), exposure, gamma)
+        result = color_transform.exposure_gamma(np_img, exposure, gamma)
+        self.assertTrue(np.allclose(expected, result, atol=1.0e-6))
+
+        buffer = np.empty_like(np_img)
+        old_time = _best_time(
+            lambda: _old_tone_mapping(np_img.copy(), exposure, gamma))
+        new_time = _best_time(lambda: color_transform.exposure_gamma(
+            np_img, exposure, gamma, out=buffer))
+        _report('exposure_gamma', old_time, new_time, mp)
+
+        np_img8 = (np_img * 255).astype(np.uint8)
+        lut_time = _best_time(lambda: color_transform.exposure_gamma(
+            np_img8, exposure, gamma, out=buffer))
+        _report('exposure_gamma uint8 LUT', old_time, lut_time, mp)
+
+    def test_gamma_image(self):
+        np_img = _random_rgba()
+        mp = _megapixels(np_img)
+        expected = _old_gamma_np_image(np_img, 2.2)
+        self.assertTrue(np.allclose(
+            expected, color_transform.gamma_image(np_img, 2.2), atol=1.0e-6))
+        buffer = np.empty_like(np_img)
+        old_time = _best_time(lambda: _old_gamma_np_image(np_img, 2.2))
+        new_time = _best_time(
+            lambda: color_transform.gamma_image(np_img, 2.2, out=buffer))
+        _report('gamma_image', old_time, new_time, mp)
+
+    def test_threshold_image(self):
+        np_img = _random_rgba()
+        mp = _megapixels(np_img)
+        threshold = 0.5
+        expected = _old_threshold_image(np_img, threshold)
+        result = color_transform.threshold_image(np_img, threshold)
+        # Border values can differ due to float rounding
+        self.assertLess(np.count_nonzero(expected != result), 10)
+        old_time = _best_time(lambda: _old_threshold_image(np_img, threshold))
+        new_time = _best_time(
+            lambda: color_transform.threshold_image(np_img, threshold))
+        _report('threshold_image', old_time, new_time, mp)
+
+
+class CompactPixelsTest(unittest.TestCase):
+    def test_uint8_roundtrip(self):
+        np_img8 = np.random.randint(0, 256, (PerfTestConfig.image_height,
+                                             PerfTestConfig.image_width, 4),
+                                    dtype=np.uint8)
+        np_img = color_transform.float32_pixels(np_img8)
+        self.assertEqual(np_img.dtype, np.float32)
+        compact = color_transform.compact_pixels(np_img, is_float=False)
+        self.assertEqual(compact.dtype, np.uint8)
+        self.assertTrue(np.array_equal(compact, np_img8))
+
+    def test_float16_precision(self):
+        np_img = _random_rgba()
+        compact = color_transform.compact_pixels(np_img, is_float=True)
+        self.assertEqual(compact.dtype, np.float16)
+        self.assertTrue(np.allclose(
+            color_transform.float32_pixels(compact), np_img, atol=1.0e-3))
+
+    def test_memory_4k_6k_8k(self):
+        for width, height in PerfTestConfig.memory_test_sizes:
+            np_img8 = np.random.randint(0, 256, (height, width, 4),
+                                        dtype=np.uint8)
+            np_img = color_transform.float32_pixels(np_img8)
+            mp = _megapixels(np_img)
+            to_uint8_time = _best_time(
+                lambda: color_transform.compact_pixels(np_img, False), 2)
+            to_float16_time = _best_time(
+                lambda: color_transform.compact_pixels(np_img, True), 2)
+            compact8 = color_transform.compact_pixels(np_img, False)
+            compact16 = color_transform.compact_pixels(np_img, True)
+            buffer = np.empty_like(np_img)
+            from_uint8_time = _best_time(
+                lambda: color_transform.float32_pixels(compact8, out=buffer), 2)
+            self.assertEqual(compact8.nbytes * 4, np_img.nbytes)
+            self.assertEqual(compact16.nbytes * 2, np_img.nbytes)
+            _log_output(f'{width}x{height}: float32 {np_img.nbytes >> 20} MB '
+                        f'float16 {compact16.nbytes >> 20} MB '
+                        f'uint8 {compact8.nbytes >> 20} MB | '
+                        f'to uint8 {1000 * to_uint8_time / mp:.2f} ms/MP '
+                        f'to float16 {1000 * to_float16_time / mp:.2f} ms/MP '
+                        f'uint8 to float32 '
+                        f'{1000 * from_uint8_time / mp:.2f} ms/MP')
+            del np_img8, np_img, compact8, compact16, buffer
+
+
+class PixelBufferPoolTest(unittest.TestCase):
+    def test_steady_state_frame_loop(self):
+        shape = (PerfTestConfig.image_height, PerfTestConfig.image_width, 4)
+        frames = 20
+        KTPixelBufferPool.clear()
+        KTPixelBufferPool.reset_counters()
+
+        def _pooled_loop():
+            for _ in range(frames):
+                with KTPixelBufferPool.leased(shape) as np_img:
+                    np_img.fill(0.5)
+
+        def _allocating_loop():
+            for _ in range(frames):
+                np_img = np.empty(shape, dtype=np.float32)
+                np_img.fill(0.5)
+
+        _pooled_loop()
+        self.assertEqual(KTPixelBufferPool.misses, 1)
+        self.assertEqual(KTPixelBufferPool.hits, frames - 1)
+        self.assertEqual(KTPixelBufferPool.peak_bytes,
+                         np.empty(shape, dtype=np.float32).nbytes)
+
+        mp = _megapixels(np.empty(shape[:2])) * frames
+        old_time = _best_time(_allocating_loop)
+        new_time = _best_time(_pooled_loop)
+        _report('pixel buffer pool', old_time, new_time, mp)
+        _log_output(f'pixel buffer pool stats: {KTPixelBufferPool.stats()}')
+
+    def test_release_limits(self):
+        KTPixelBufferPool.clear()
+        KTPixelBufferPool.reset_counters()
+        shape = (4, 4, 4)
+        buffers = [KTPixelBufferPool.lease(shape) for _ in range(5)]
+        for buffer in buffers:
+            KTPixelBufferPool.release(buffer)
+        KTPixelBufferPool.release(buffers[0])  # double release is ignored
+        self.assertEqual(KTPixelBufferPool.stats()['free_buffers'],
+                         Config.pixel_buffer_pool_size)
+        self.assertEqual(KTPixelBufferPool.peak_bytes, 5 * buffers[0].nbytes)
+        KTPixelBufferPool.clear()
+        self.assertEqual(KTPixelBufferPool.stats()['allocated_bytes'], 0)
+
+
+def _old_lit_edges(loops: Any, loop_normals: Any, polys: Any) -> Tuple:
+    loop_count = len(loops)
+    edge_indices = np.empty((loop_count * 2,), dtype=np.int32)
+    edge_normals = np.empty((loop_count * 2, 3), dtype=np.float32)
+    i = 0
+    k = 0
+    for p_count in polys:
+        indices = loops[i: i + p_count]
+        normals = loop_normals[i: i + p_count]
+        delta = p_count * 2
+        edge_indices[k: k + delta] = \
+            np.roll(np.repeat(indices, 2), -1, axis=0)
+        edge_normals[k: k + delta] = \
+            np.roll(np.repeat(normals, 2, axis=0), -1, axis=0)
+        i += p_count
+        k += delta
+    return edge_indices, edge_normals
+
+
+def _new_lit_edges(loops: Any, loop_normals: Any, polys: Any) -> Tuple:
+    pairs = loop_edge_pairs(polys)
+    return loops[pairs], loop_normals[pairs]
+
+
+def _random_polygons(loop_count: int) -> Any:
+    # Mix of triangles, quads and n-gons
+    polys = np.random.choice([3, 4, 4, 4, 5, 8], loop_count // 3)
+    polys = polys[np.cumsum(polys) <= loop_count]
+    polys = np.append(polys, loop_count - np.sum(polys))
+    return polys[polys > 0].astype(np.int32)
+
+
+class LitEdgesTest(unittest.TestCase):
+    def test_equivalence(self):
+        for loop_count in (3, 4, 7, 1000, 10007):
+            polys = _random_polygons(loop_count)
+            loops = np.random.randint(0, loop_count, loop_count,
+                                      dtype=np.int32)
+            normals = np.random.rand(loop_count, 3).astype(np.float32)
+            old_indices, old_normals = _old_lit_edges(loops, normals, polys)
+            new_indices, new_normals = _new_lit_edges(loops, normals, polys)
+            self.assertTrue(np.array_equal(old_indices, new_indices))
+            self.assertTrue(np.array_equal(old_normals, new_normals))
+
+    def test_empty_mesh(self):
+        self.assertEqual(len(loop_edge_pairs([])), 0)
+
+    def test_1m_loops(self):
+        loop_count = PerfTestConfig.lit_edges_loop_count
+        polys = _random_polygons(loop_count)
+        loops = np.random.randint(0, loop_count, loop_count, dtype=np.int32)
+        normals = np.random.rand(loop_count, 3).astype(np.float32)
+        old_time = _best_time(
+            lambda: _old_lit_edges(loops, normals, polys), 1)
+        new_time = _best_time(
+            lambda: _new_lit_edges(loops, normals, polys))
+        _report('lit edges (per 1M loops)', old_time, new_time,
+                loop_count / 1.0e+6)
+
+
+class ShaderAttributesTest(unittest.TestCase):
+    def test_colors_equivalence(self):
+        count = 1000
+        color = (0.1, 0.2, 0.3, 1.0)
+        hidden_color = (*color[:3], 0.0)
+        disabled = [0, 5, 17, 999, 1000, 2000]
+
+        old_colors = [color] * count
+        for i in [x for x in disabled if x < count]:
+            old_colors[i] = hidden_color
+
+        new_colors = color_attribute(color, count)
+        set_colors_at(new_colors, disabled, hidden_color)
+        self.assertTrue(np.array_equal(
+            np.array(old_colors, dtype=np.float32), new_colors))
+
+    def test_batch_data_preparation(self):
+        count = 1000000
+        color = (0.1, 0.2, 0.3, 1.0)
+        verts = np.random.rand(count, 3).astype(np.float32)
+        old_time = _best_time(lambda: np.array([color] * count,
+                                               dtype=np.float32), 3)
+        new_time = _best_time(lambda: color_attribute(color, count), 3)
+        _report('per-vertex colors (per 1M vertices)', old_time, new_time,
+                count / 1.0e+6)
+        self.assertTrue(np.shares_memory(float32_attribute(verts, 3), verts))
+
+
+def _old_residual_lines(projected: Any, p2d: Any, rx: float, ry: float,
+                        border: Tuple) -> Any:
+    verts = []
+    for i, v in enumerate(projected):
+        x, y = coords.frame_to_image_space(v[0], v[1], rx, ry, 0.1, -0.2)
+        verts.append(coords.image_space_to_region(x, y, *border))
+        verts.append((p2d[i][0], p2d[i][1]))
+    return verts
+
+
+def _new_residual_lines(projected: Any, p2d: Any, rx: float, ry: float,
+                        border: Tuple) -> Any:
+    return coords.residual_lines(coords.frame_to_region_array(
+        projected, rx, ry, *border, 0.1, -0.2), p2d)
+
+
+class CoordsArrayTest(unittest.TestCase):
+    def test_transforms_equivalence(self):
+        points = np.random.rand(100, 2).astype(np.float32) * 1000.0
+        rx, ry = 1920, 1080
+        border = (12.0, 40.0, 812.0, 490.0)
+        for (x, y), (ax, ay) in zip(points, coords.frame_to_image_space_array(
+                points, rx, ry, 0.1, -0.2)):
+            ex, ey = coords.frame_to_image_space(x, y, rx, ry, 0.1, -0.2)
+            self.assertAlmostEqual(ex, ax, places=5)
+            self.assertAlmostEqual(ey, ay, places=5)
+        image_points = points / 1000.0 - 0.5
+        for (x, y), (ax, ay) in zip(image_points,
+                                    coords.image_space_to_region_array(
+                                        image_points, *border)):
+            ex, ey = coords.image_space_to_region(x, y, *border)
+            self.assertAlmostEqual(ex, ax, places=3)
+            self.assertAlmostEqual(ey, ay, places=3)
+        back = coords.region_to_image_space_array(
+            coords.image_space_to_region_array(image_points, *border), *border)
+        self.assertTrue(np.allclose(back, image_points, atol=1.0e-5))
+
+    def test_residuals(self):
+        count = PerfTestConfig.residual_pins_count
+        projected = np.random.rand(count, 2) * 1000.0
+        p2d = np.random.rand(count, 2).astype(np.float32) * 500.0
+        rx, ry = 1920, 1080
+        border = (12.0, 40.0, 812.0, 490.0)
+        self.assertTrue(np.allclose(
+            np.array(_old_residual_lines(projected, p2d, rx, ry, border),
+                     dtype=np.float32),
+            _new_residual_lines(projected, p2d, rx, ry, border), atol=1.0e-3))
+        old_time = _best_time(
+            lambda: _old_residual_lines(projected, p2d, rx, ry, border))
+        new_time = _best_time(
+            lambda: _new_residual_lines(projected, p2d, rx, ry, border))
+        _log_output(f'residuals for {count} pins: '
+                    f'old {1000 * old_time:.3f} ms new {1000 * new_time:.3f} ms')
+
+
+def _linear_nearest(x: float, y: float, points: Any,
+                    dist2: float=4000000.0) -> Tuple[int, float]:
+    nearest = -1
+    for i, p in enumerate(points):
+        d2 = (x - p[0]) ** 2 + (y - p[1]) ** 2
+        if d2 < dist2:
+            dist2 = d2
+            nearest = i
+    return nearest, dist2
+
+
+class ToneMappingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._preview_step = Config.tone_mapping_preview_step
+        # Full resolution recalculation on every apply
+        Config.tone_mapping_preview_step = 1
+        self.image = bpy.data.images.new('perf_tone_mapping', width=64,
+                                         height=48, alpha=True,
+                                         float_buffer=True)
+        pixels = np.random.rand(48, 64, 4).astype(np.float32)
+        self.image.pixels.foreach_set(pixels.ravel())
+        self.original = np_array_from_bpy_image(self.image)
+
+    def tearDown(self):
+        Config.tone_mapping_preview_step = self._preview_step
+        KTToneMappingCache.clear(self.image)
+        bpy.data.images.remove(self.image)
+
+    def test_apply_and_restore(self):
+        self.assertTrue(KTToneMappingCache.apply(self.image, 1.5, 0.8))
+        self.assertTrue(KTToneMappingCache.apply(self.image, -0.5, 1.3))
+        expected = color_transform.exposure_gamma(self.original, -0.5, 1.3)
+        self.assertTrue(np.allclose(np_array_from_bpy_image(self.image),
+                                    expected, atol=1.0e-5))
+        self.assertTrue(KTToneMappingCache.restore(self.image))
+        self.assertTrue(np.allclose(np_array_from_bpy_image(self.image),
+                                    self.original, atol=1.0e-5))
+
+
+class ScreenPinsTest(unittest.TestCase):
+    def _random_pins(self, count: int) -> KTScreenPins:
+        pins = KTScreenPins()
+        pins.set_pins(np.random.rand(count, 2) - 0.5)
+        return pins
+
+    def test_nearest_and_rectangle(self):
+        pins = self._random_pins(1000)
+        points = pins.arr()
+        for x, y in np.random.rand(100, 2) * 1.4 - 0.7:
+            index, dist2 = pins.nearest_pin(x, y)
+            expected_index, expected_dist2 = _linear_nearest(x, y, points)
+            self.assertEqual(index, expected_index)
+            self.assertAlmostEqual(dist2, expected_dist2, places=6)
+            self.assertEqual(pins.nearest_pin(x, y, 1.0e-6)[0],
+                             _linear_nearest(x, y, points, 1.0e-6)[0])
+        x1, y1, x2, y2 = -0.2, -0.1, 0.15, 0.3
+        expected = [i for i, (x, y) in enumerate(points)
+                    if x1 <= x <= x2 and y1 <= y <= y2]
+        self.assertEqual(pins.pins_inside_rectangle(x2, y2, x1, y1), expected)
+
+    def test_degenerate_pins(self):
+        pins = KTScreenPins()
+        self.assertEqual(pins.nearest_pin(0.0, 0.0)[0], -1)
+        self.assertEqual(pins.pins_inside_rectangle(-1, -1, 1, 1), [])
+        pins.set_pins([(0.1, 0.1)] * 3)
+        self.assertEqual(pins.nearest_pin(0.5, 0.5)[0], 0)
+        self.assertEqual(pins.pins_inside_rectangle(0, 0, 1, 1), [0, 1, 2])
+
+    def test_masks_follow_pins(self):
+        pins = self._random_pins(5)
+        pins.set_selected_pins([1, 3, 10])
+        pins.set_disabled_pins([3])
+        self.assertEqual(pins.get_selected_pins(), [1, 3])
+        pins.remove_pin(1)
+        self.assertEqual(pins.get_selected_pins(), [2])
+        self.assertEqual(pins.get_disabled_pins(), [2])
+        pins.add_pin((0.4, 0.4))
+        pins.toggle_selected_pins([2, 4])
+        self.assertEqual(pins.get_selected_pins(), [4])
+        pins.set_pin(0, (0.45, 0.45))
+        self.assertEqual(pins.nearest_pin(0.46, 0.46)[0], 0)
+        with self.assertRaises(ValueError):
+            pins.arr()[0] = (0.0, 0.0)
+
+    def test_click_latency(self):
+        pins = self._random_pins(PerfTestConfig.screen_pins_count)
+        points = pins.arr().tolist()
+        queries = np.random.rand(PerfTestConfig.screen_pins_queries, 2) - 0.5
+        pins.nearest_pin(0.0, 0.0)  # build index
+
+        def _indexed():
+            for x, y in queries:
+                pins.nearest_pin(x, y)
+
+        def _scan():
+            for x, y in queries:
+                _linear_nearest(x, y, points)
+
+        old_time = _best_time(_scan, 1) / len(queries)
+        new_time = _best_time(_indexed) / len(queries)
+        _log_output(f'nearest pin of {len(points)}: '
+                    f'old {1000 * old_time:.3f} ms new {1000 * new_time:.3f} ms')
+
+
+class _SurfacePoint:
+    def __init__(self, idxs: Any, bars: Any):
+        self.geo_point_idxs = idxs
+        self.barycentric_coordinates = bars
+
+
+class _Pin:
+    def __init__(self, idxs: Any, bars: Any):
+        self.surface_point = _SurfacePoint(idxs, bars)
+
+
+class _GeoMesh:
+    def __init__(self, verts: Any):
+        self._verts = verts
+
+    def point(self, index: int) -> Any:
+        return self._verts[index]
+
+
+class SurfacePointsTest(unittest.TestCase):
+    def _random_pins(self, verts_count: int) -> Any:
+        pins = []
+        for _ in range(PerfTestConfig.surface_pins_count):
+            bars = np.random.rand(3)
+            pins.append(_Pin(np.random.randint(0, verts_count, 3).tolist(),
+                             (bars / bars.sum()).tolist()))
+        return pins
+
+    def test_geo_mesh_points(self):
+        verts = np.random.rand(PerfTestConfig.surface_mesh_points, 3)
+        geo_mesh = _GeoMesh(verts)
+        pins = self._random_pins(len(verts))
+
+        def _old():
+            return np.array([coords.pin_to_xyz_from_fb_geo_mesh(pin, geo_mesh)
+                             for pin in pins], dtype=np.float32)
+
+        def _new():
+            return coords.surface_points_from_geo_mesh(pins, geo_mesh)
+
+        self.assertTrue(np.allclose(_old(), _new(), atol=1.0e-6))
+        old_time = _best_time(_old)
+        new_time = _best_time(_new)
+        _log_output(f'surface points for {len(pins)} pins: '
+                    f'old {1000 * old_time:.3f} ms new {1000 * new_time:.3f} ms')
+
+    def test_invalid_surface_points_are_skipped(self):
+        verts = np.random.rand(10, 3)
+        pins = [_Pin([0, 1, 2], [0.2, 0.3, 0.5]), _Pin([], []),
+                _Pin([1, 2, 30], [0.3, 0.3, 0.4]), _Pin([9, 9, 9], [1, 0, 0])]
+        points = coords.surface_points_from_verts(pins, verts)
+        self.assertEqual(points.shape, (2, 3))
+        self.assertTrue(np.allclose(
+            points[0], 0.2 * verts[0] + 0.3 * verts[1] + 0.5 * verts[2]))
+        self.assertTrue(np.allclose(points[1], verts[9]))
+
+
+class _CountingShader(KTShaderBase):
+    def __init__(self):
+        super().__init__(SpaceView3D)
+        self.batches_created = 0
+
+    def create_batch(self) -> None:
+        self.batches_created += 1
+
+
+class BatchSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        KTBatchStats.reset()
+
+    def test_rebuild_only_on_changed_inputs(self):
+        shader = _CountingShader()
+        pins = np.random.rand(100, 2).astype(np.float32)
+        border = (0.0, 0.0, 800.0, 600.0)
+        shader.update_batch_inputs(pins=pins, camera_border=border)
+        self.assertTrue(shader.update_batch())
+        for _ in range(100):  # update calls without real changes
+            shader.update_batch_inputs(pins=pins.copy(), camera_border=border)
+            shader.update_batch()
+        self.assertEqual(shader.batches_created, 1)
+
+        pins[0] = (0.5, 0.5)
+        self.assertTrue(shader.update_batch_inputs(pins=pins,
+                                                   camera_border=border))
+        self.assertFalse(shader.update_batch_inputs(pins=pins))
+        self.assertTrue(shader.update_batch_inputs(pins=pins[:-1]))
+        shader.update_batch()
+        self.assertFalse(shader.update_batch())
+        self.assertEqual(shader.batches_created, 2)
+        self.assertEqual(KTBatchStats.rebuild_counts(),
+                         {'_CountingShader': 2})
+
+    def test_hidden_shader_keeps_dirty_batch(self):
+        shader = _CountingShader()
+        shader.update_batch_inputs(colors=(1.0, 0.0, 0.0, 1.0))
+        shader.hide_shader()
+        shader._scheduled_draw_callback(None)
+        self.assertTrue(shader.is_batch_dirty())
+        shader.unhide_shader()
+        shader._scheduled_draw_callback(None)
+        self.assertFalse(shader.is_batch_dirty())
+        self.assertEqual(shader.batches_created, 1)
+        self.assertGreaterEqual(KTBatchStats.rebuilds_per_second(), 0.0)
+
+
+class _FixedViewCameraBorder(coords.KTCameraBorder):
+    _items = {}
+    state = (1, 1200, 700, 10.0, 0.05, -0.02, 1920, 1080)
+
+    @classmethod
+    def _view_state(cls, area: Any) -> Tuple:
+        return cls.state
+
+
+class CameraBorderTest(unittest.TestCase):
+    def test_matrices_match_scalar_transforms(self):
+        border = coords.calc_camera_border(1200, 700, 10.0, 0.05, -0.02,
+                                           1920, 1080)
+        points = np.random.rand(50, 2) - 0.5
+        im2reg = coords.image_to_region_matrix(*border)
+        reg2im = coords.region_to_image_matrix(*border)
+        self.assertTrue(np.allclose(im2reg @ reg2im, np.eye(3)))
+        region = coords.transform_points_2d(points, im2reg)
+        for (x, y), (rx, ry) in zip(points, region):
+            ex, ey = coords.image_space_to_region(x, y, *border)
+            self.assertAlmostEqual(ex, rx, places=3)
+            self.assertAlmostEqual(ey, ry, places=3)
+        frame = np.random.rand(50, 2) * 1000.0
+        self.assertTrue(np.allclose(
+            coords.frame_to_region_array(frame, 1920, 1080, *border,
+                                         0.1, 0.2),
+            coords.image_space_to_region_array(
+                coords.frame_to_image_space_array(frame, 1920, 1080,
+                                                  0.1, 0.2), *border),
+            atol=1.0e-3))
+
+    def test_memoized_per_view_state(self):
+        _FixedViewCameraBorder.clear()
+        border = _FixedViewCameraBorder.border(None)
+        self.assertIs(_FixedViewCameraBorder.border(None), border)
+        self.assertIs(_FixedViewCameraBorder.image_to_region_matrix(None),
+                      _FixedViewCameraBorder.image_to_region_matrix(None))
+        old_state = _FixedViewCameraBorder.state
+        _FixedViewCameraBorder.state = (1, 1200, 700, 12.0, 0.05, -0.02,
+                                        1920, 1080)
+        self.assertNotEqual(_FixedViewCameraBorder.border(None), border)
+        _FixedViewCameraBorder.state = old_state
+        self.assertIs(_FixedViewCameraBorder.border(None), border)
+
+
+class _SmallLodWireframe(KTLitEdgeShaderLocal3D):
+    lod_min_edges = 10
+    lod_edges = 5
+    lod_idle_delay = 0.05
+
+
+class WireframeLodTest(unittest.TestCase):
+    def test_decimated_edges(self):
+        verts = np.random.rand(1000, 3).astype(np.float32)
+        edges = np.random.randint(0, len(verts), (400, 2)).astype(np.int32)
+        lod = decimated_edges(verts, edges, 100)
+        self.assertEqual(len(lod), 100)
+        lengths = np.linalg.norm(verts[edges[:, 1]] - verts[edges[:, 0]],
+                                 axis=1)
+        lod_lengths = np.linalg.norm(verts[lod[:, 1]] - verts[lod[:, 0]],
+                                     axis=1)
+        self.assertGreaterEqual(lod_lengths.min(), np.sort(lengths)[-100])
+        positions = [np.flatnonzero((edges == e).all(axis=1))[0] for e in lod]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIs(decimated_edges(verts, edges, 1000), edges)
+
+    def test_decimation_time(self):
+        count = PerfTestConfig.lod_test_edges
+        verts = np.random.rand(count // 2, 3).astype(np.float32)
+        edges = np.random.randint(0, len(verts), (count, 2)).astype(np.int32)
+        lod_time = _best_time(
+            lambda: decimated_edges(verts, edges, count // 4), 1)
+        _log_output(f'LOD edges for {count} edges: {1000 * lod_time:.1f} ms')
+
+    def test_interaction_states(self):
+        wf = _SmallLodWireframe(SpaceView3D, mask_color=(0., 0., 1., 0.4))
+        wf.vertices = np.random.rand(20, 3).astype(np.float32)
+        wf._mesh_edges = np.random.randint(0, 20, (8, 2)).astype(np.int32)
+        wf._init_lod_edges()
+        self.assertIsNone(wf._lod_edges)
+        wf.begin_interaction()
+        self.assertFalse(wf.lod_is_active())
+
+        wf._mesh_edges = np.random.randint(0, 20, (30, 2)).astype(np.int32)
+        wf._init_lod_edges()
+        self.assertEqual(len(wf._lod_edges), 5)
+        self.assertTrue(wf.lod_is_active())
+        wf.end_interaction()
+        self.assertFalse(wf.lod_is_active())
+        wf.pulse_interaction()
+        self.assertTrue(wf.lod_is_active())
+        wf._lod_drawn = True
+        self.assertFalse(wf.needs_full_detail_redraw())
+        time.sleep(wf.lod_idle_delay * 2)
+        self.assertFalse(wf.lod_is_active())
+        self.assertTrue(wf.needs_full_detail_redraw())
+
+
+class _FaceMesh:
+    def __init__(self, faces: List, uvs: List):
+        self._faces = faces
+        self._uvs = uvs
+
+    def faces_count(self) -> int:
+        return len(self._faces)
+
+    def face_size(self, face: int) -> int:
+        return len(self._faces[face])
+
+    def face_point(self, face: int, k: int) -> int:
+        return self._faces[face][k]
+
+    def uv(self, face: int, k: int) -> Tuple[float, float]:
+        return self._uvs[face][k]
+
+
+def _old_edge_indices_and_uvs(me: Any) -> Tuple[Any, Any]:
+    face_counts = [me.face_size(x) for x in range(me.faces_count())]
+    indices = np.empty((sum(face_counts), 2), dtype=np.int32)
+    tex_coords = np.empty((sum(face_counts) * 2, 2), dtype=np.float32)
+    i = 0
+    for face, count in enumerate(face_counts):
+        tex_coords[i * 2] = me.uv(face, count - 1)
+        tex_coords[i * 2 + 1] = me.uv(face, 0)
+        indices[i] = (me.face_point(face, count - 1), me.face_point(face, 0))
+        i += 1
+        for k in range(1, count):
+            tex_coords[i * 2] = me.uv(face, k - 1)
+            tex_coords[i * 2 + 1] = me.uv(face, k)
+            indices[i] = (me.face_point(face, k - 1), me.face_point(face, k))
+            i += 1
+    return indices, tex_coords
+
+
+class FBEdgeIndicesTest(unittest.TestCase):
+    def test_same_edges_and_uvs(self):
+        faces = [np.random.randint(0, 5000, size).tolist()
+                 for size in np.random.randint(3, 5,
+                                               PerfTestConfig.fb_mesh_faces)]
+        uvs = [np.random.rand(len(face), 2).tolist() for face in faces]
+        me = _FaceMesh(faces, uvs)
+
+        def _edges_with_uvs(indices: Any, tex_coords: Any) -> Any:
+            data = np.concatenate([indices.astype(np.float32),
+                                   tex_coords.reshape(-1, 4)], axis=1)
+            return data[np.lexsort(data.T[::-1])]
+
+        old = _old_edge_indices_and_uvs(me)
+        new = mesh_edge_indices_and_uvs(me)
+        self.assertEqual(new[0].shape, old[0].shape)
+        self.assertEqual(new[1].shape, old[1].shape)
+        self.assertTrue(np.array_equal(_edges_with_uvs(*old),
+                                       _edges_with_uvs(*new)))
+        old_time = _best_time(lambda: _old_edge_indices_and_uvs(me))
+        new_time = _best_time(lambda: mesh_edge_indices_and_uvs(me))
+        _log_output(f'FB edge indices for {len(faces)} faces: '
+                    f'old {1000 * old_time:.1f} ms new {1000 * new_time:.1f} ms')
+
+
+class _FacsExecutor:
+    def __init__(self, verts: Any, count: int):
+        self._verts = verts
+        self.facs_names = [f'facs_{i}' for i in range(count)]
+
+    def get_facs_blendshape(self, index: int) -> Any:
+        return self._verts * np.cos(self._verts * (index + 1)).astype(
+            np.float64)
+
+
+def _old_facs_blendshapes_verts(facs_executor: Any, indices: List) -> List:
+    rot = coords.xy_to_xz_rotation_matrix_3x3()
+    return [facs_executor.get_facs_blendshape(i) @ rot for i in indices]
+
+
+class FacsBlendshapesTest(unittest.TestCase):
+    def test_same_verts_as_serial_version(self):
+        verts = np.random.rand(PerfTestConfig.facs_mesh_points, 3)
+        fe = _FacsExecutor(verts, PerfTestConfig.facs_count)
+        indices = list(range(PerfTestConfig.facs_count))
+
+        old = _old_facs_blendshapes_verts(fe, indices)
+        new = np.array(list(facs_blendshapes_verts(fe, indices)))
+        self.assertEqual(new.shape, (len(indices), len(verts), 3))
+        self.assertEqual(new.dtype, np.float32)
+        self.assertTrue(np.allclose(new, np.array(old), atol=1.0e-5))
+        self.assertEqual(len(list(facs_blendshapes_verts(fe, []))), 0)
+
+        old_time = _best_time(lambda: _old_facs_blendshapes_verts(fe, indices))
+        new_time = _best_time(
+            lambda: list(facs_blendshapes_verts(fe, indices)))
+        _log_output(f'{len(indices)} FACS blendshapes for {len(verts)} '
+                    f'vertices: old {1000 * old_time:.1f} ms '
+                    f'new {1000 * new_time:.1f} ms')
+
+
+def _fake_tracker_serial(keyframes: int) -> str:
+    frames = [{'frame': i,
+               'model': np.random.rand(16).round(6).tolist(),
+               'pins': np.random.rand(20, 2).round(6).tolist()}
+              for i in range(keyframes)]
+    return json.dumps({'version': 1, 'keyframes': frames})
+
+
+class SerialStorageTest(unittest.TestCase):
+    def test_round_trip_and_size(self):
+        serial = _fake_tracker_serial(PerfTestConfig.serial_keyframes)
+        data = serial_storage.compress_serial(serial)
+        self.assertTrue(serial_storage.is_compressed_serial(data))
+        self.assertEqual(serial_storage.decompress_serial(data), serial)
+        self.assertLess(len(data), len(serial))
+
+        compress_time = _best_time(
+            lambda: serial_storage.compress_serial(serial))
+        hash_time = _best_time(lambda: serial_storage.serial_hash(serial))
+        _log_output(f'Serial {len(serial) / 1.0e+6:.2f} MB stored as '
+                    f'{len(data) / 1.0e+6:.2f} MB: '
+                    f'compress {1000 * compress_time:.1f} ms '
+                    f'hash {1000 * hash_time:.1f} ms')
+
+    def test_legacy_and_empty_serials(self):
+        serial = _fake_tracker_serial(2)
+        self.assertEqual(serial_storage.decompress_serial(serial), serial)
+        self.assertEqual(serial_storage.compress_serial(''), '')
+        self.assertEqual(serial_storage.decompress_serial(''), '')
+        self.assertEqual(serial_storage.serial_hash(serial),
+                         serial_storage.serial_hash(str(serial)))
+        self.assertNotEqual(serial_storage.serial_hash(serial),
+                            serial_storage.serial_hash(serial + ' '))
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: Any) -> None:
+        self.messages.append(record.getMessage())
+
+
+class LazyLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.handler = _ListHandler()
+        self.logger = logging.getLogger('keentools.perf_lazy_logging')
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.log = KTLogger('keentools.perf_lazy_logging')
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_no_formatting_when_disabled(self):
+        self.logger.setLevel(logging.INFO)
+        self.assertFalse(self.log.enabled())
+        self.assertTrue(self.log.enabled('error'))
+
+        def _fail() -> str:
+            raise AssertionError('message is formatted')
+
+        self.log.output(_fail)
+        self.log.output('%s %d', 'not', 'formatted')
+        self.assertEqual(self.handler.messages, [])
+
+        serial = _fake_tracker_serial(200)
+        old_time = _best_time(lambda: [
+            self.log.output(self.log.color('cyan', f'SERIAL:\n{serial}'))
+            for _ in range(PerfTestConfig.log_calls)])
+        new_time = _best_time(lambda: [
+            self.log.output(lambda: self.log.color('cyan',
+                                                   f'SERIAL:\n{serial}'))
+            for _ in range(PerfTestConfig.log_calls)])
+        _log_output(f'{PerfTestConfig.log_calls} disabled debug messages: '
+                    f'old {1000 * old_time:.1f} ms '
+                    f'new {1000 * new_time:.1f} ms')
+
+    def test_formatting_when_enabled(self):
+        self.logger.setLevel(logging.DEBUG)
+        self.assertTrue(self.log.enabled())
+        self.log.output(lambda: 'lazy')
+        self.log.output('%s=%d', 'args', 2)
+        self.log.output('100% as is')
+        self.log.warning('%s', 'colored')
+        self.assertEqual(self.handler.messages[:3],
+                         ['lazy', 'args=2', '100% as is'])
+        self.assertEqual(self.handler.messages[3],
+                         self.log.color('yellow', 'colored'))
+
+
+class DragUpdatesTest(unittest.TestCase):
+    def test_latest_position_is_kept(self):
+        drag = KTDragUpdates(budget=0.001)
+        self.assertTrue(drag.is_due())
+        self.assertFalse(drag.has_pending())
+        drag.push(1, 2)
+        drag.push(3, 4)
+        self.assertEqual(drag.pop(), (3, 4))
+        self.assertIsNone(drag.pop())
+
+        with drag.measure():
+            time.sleep(0.02)
+        finish = time.perf_counter()
+        self.assertFalse(drag.is_due())
+        while not drag.is_due() and time.perf_counter() - finish < 1.0:
+            time.sleep(0.005)
+        self.assertTrue(drag.is_due())
+        self.assertGreaterEqual(time.perf_counter() - finish, 0.02)
+
+    def test_slow_solve_is_coalesced(self):
+        def _solve(position: Tuple) -> None:
+            solved.append(position)
+            time.sleep(PerfTestConfig.drag_solve_time)
+
+        def _drag_events() -> None:
+            drag = KTDragUpdates()
+            for i in range(PerfTestConfig.drag_events):
+                time.sleep(PerfTestConfig.drag_event_interval)
+                drag.push(i)
+                if drag.is_due():
+                    with drag.measure():
+                        _solve(drag.pop())
+            # Release
+            if drag.has_pending():
+                _solve(drag.pop())
+
+        solved = []
+        start = time.perf_counter()
+        _drag_events()
+        new_time = time.perf_counter() - start
+        self.assertEqual(solved[-1], (PerfTestConfig.drag_events - 1,))
+        self.assertLess(len(solved), PerfTestConfig.drag_events)
+        old_time = PerfTestConfig.drag_events * (
+            PerfTestConfig.drag_solve_time +
+            PerfTestConfig.drag_event_interval)
+        _log_output(f'Pin drag with {PerfTestConfig.drag_events} events: '
+                    f'{len(solved)} solves, old {1000 * old_time:.1f} ms '
+                    f'new {1000 * new_time:.1f} ms')
+
+
+class _GTPin:
+    def __init__(self, pos: Tuple[float, float]):
+        self.img_pos = pos
+        self.enabled = True
+
+
+class _GeoTracker:
+    def __init__(self, points: Any):
+        self._pins = [_GTPin(tuple(p)) for p in points.tolist()]
+
+    def pins_count(self) -> int:
+        return len(self._pins)
+
+    def pin(self, keyframe: int, index: int) -> _GTPin:
+        return self._pins[index]
+
+    def move_pin(self, keyframe: int, index: int,
+                 pos: Tuple[float, float]) -> None:
+        self._pins[index] = _GTPin(pos)
+
+    def projected_pins(self, keyframe: int) -> List[_GTPin]:
+        return self._pins
+
+
+def _old_delta_move_pin(gt: Any, keyframe: int, indices: List,
+                        offset: Tuple[float, float]) -> None:
+    for i in indices:
+        if i < gt.pins_count():
+            x, y = gt.pin(keyframe, i).img_pos
+            gt.move_pin(keyframe, i, (x + offset[0], y + offset[1]))
+    GTLoader.load_pins_into_viewport()
+
+
+class GTDeltaMovePinTest(unittest.TestCase):
+    def setUp(self):
+        self._saved_gt = GTLoader._kt_geotracker
+        w, h = bpy_render_frame()
+        points = np.random.rand(PerfTestConfig.gt_pins_count, 2) * (w, h)
+        self.gt = _GeoTracker(points)
+        GTLoader._kt_geotracker = self.gt
+        GTLoader.load_pins_into_viewport()
+
+    def tearDown(self):
+        GTLoader._kt_geotracker = self._saved_gt
+        GTLoader.viewport().pins().set_pins([])
+
+    def test_batched_move(self):
+        count = PerfTestConfig.gt_pins_count
+        indices = np.random.choice(count, PerfTestConfig.gt_selected_pins,
+                                   replace=False)
+        offset = (12.5, -7.25)
+        expected = np.array([pin.img_pos for pin in self.gt._pins])
+        expected[indices] += offset
+
+        GTLoader.delta_move_pin(0, np.append(indices, count + 10), offset)
+        self.assertTrue(np.allclose(
+            np.array([pin.img_pos for pin in self.gt._pins]), expected))
+        new_viewport = GTLoader.viewport().pins().arr().copy()
+        GTLoader.load_pins_into_viewport()
+        self.assertTrue(np.allclose(new_viewport,
+                                    GTLoader.viewport().pins().arr(),
+                                    atol=1.0e-6))
+
+        selected = indices.tolist()
+        old_time = _best_time(lambda: _old_delta_move_pin(
+            self.gt, 0, selected, offset))
+        new_time = _best_time(lambda: GTLoader.delta_move_pin(
+            0, indices, offset))
+        _log_output(f'GT delta move {len(selected)} of {count} pins: '
+                    f'old {1000 * old_time:.1f} ms new {1000 * new_time:.1f} ms')
+
+
+@profile_stage('perf_test_stage')
+def _profiled_func(x: int) -> int:
+    return x + 1
+
+
+class ProfilerTest(unittest.TestCase):
+    def tearDown(self):
+        KTProfiler.enable(False)
+        KTProfiler.reset()
+
+    def test_ring_buffer_order(self):
+        buffer = KTRingBuffer(4)
+        for i in range(6):
+            buffer.append(float(i), 0.5)
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.records()[:, 0].tolist(), [2., 3., 4., 5.])
+
+    def test_disabled_profiler_records_nothing(self):
+        KTProfiler.enable(False)
+        KTProfiler.reset()
+        with KTProfiler.stage('solve'):
+            pass
+        self.assertEqual(_profiled_func(1), 2)
+        self.assertEqual(KTProfiler.stage_names(), [])
+
+        def _plain() -> None:
+            for i in range(PerfTestConfig.profiler_calls):
+                _profiled_func.__wrapped__(i)
+
+        def _profiled() -> None:
+            for i in range(PerfTestConfig.profiler_calls):
+                _profiled_func(i)
+
+        plain_time = _best_time(_plain)
+        profiled_time = _best_time(_profiled)
+        _log_output(f'Disabled profiler overhead: '
+                    f'{1.0e+9 * (profiled_time - plain_time) / PerfTestConfig.profiler_calls:.0f} '
+                    f'ns per call')
+
+    def test_stages_overlay_and_trace(self):
+        KTProfiler.reset()
+        KTProfiler.enable()
+        for _ in range(3):
+            with KTProfiler.stage('solve'):
+                time.sleep(0.002)
+        self.assertEqual(_profiled_func(1), 2)
+
+        self.assertEqual(sorted(KTProfiler.stage_names()),
+                         ['perf_test_stage', 'solve'])
+        stats = KTProfiler.stage_stats('solve')
+        self.assertEqual(stats['count'], 3)
+        self.assertGreaterEqual(stats['max'], stats['mean'])
+        self.assertGreater(stats['mean'], 1.0)
+        self.assertEqual(len(KTProfiler.overlay_text()), 2)
+
+        trace = KTProfiler.chrome_trace()
+        events = trace['traceEvents']
+        self.assertEqual(len(events), 4)
+        self.assertTrue(all(x['ph'] == 'X' for x in events))
+        self.assertEqual([x['ts'] for x in events],
+                         sorted(x['ts'] for x in events))
+
+        filepath = os.path.join(tempfile.gettempdir(), 'kt_perf_trace.json')
+        self.assertTrue(KTProfiler.save_chrome_trace(filepath))
+        with open(filepath) as f:
+            self.assertEqual(len(json.load(f)['traceEvents']), 4)
+        os.remove(filepath)
+
+
+def _create_grid_object(subdivisions: int=PerfTestConfig.grid_subdivisions
+                        ) -> Any:
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=subdivisions,
+                                    y_subdivisions=subdivisions, size=2)
+    return bpy.context.object
+
+
+class WireframeTopologyCacheTest(unittest.TestCase):
+    def test_vertex_only_update(self):
+        obj = _create_grid_object()
+        wf = KTLitEdgeShaderLocal3D(SpaceView3D, mask_color=(1., 0., 0., 1.))
+        first_time = _best_time(lambda: wf.init_geom_data_from_mesh(obj), 1)
+        triangles = wf.triangle_indices
+        vertices = wf.vertices
+
+        # Same mesh: neither triangulation nor vertices are replaced
+        same_time = _best_time(lambda: wf.init_geom_data_from_mesh(obj))
+        self.assertIs(wf.triangle_indices, triangles)
+        self.assertIs(wf.vertices, vertices)
+
+        # Vertex-only change keeps triangulation
+        obj.data.vertices[0].co.z += 1.0
+        obj.data.update()
+        wf.init_geom_data_from_mesh(obj)
+        self.assertIs(wf.triangle_indices, triangles)
+        self.assertIsNot(wf.vertices, vertices)
+        self.assertAlmostEqual(float(wf.vertices[0][2]),
+                               obj.data.vertices[0].co.z, places=5)
+        _report('wireframe update on unchanged topology',
+                first_time, same_time, len(obj.data.vertices) / 1.0e+6)
+        bpy.data.objects.remove(obj)
+
+
+def _old_builder_mesh(builder: Any, mesh_name: str) -> Any:
+    me = builder.applied_args_model().mesh(0)
+    rot = coords.xy_to_xz_rotation_matrix_3x3()
+    vertices = np.array([me.point(i) for i in range(me.points_count())],
+                        dtype=np.float32) @ rot
+    faces = [[me.face_point(i, j) for j in range(me.face_size(i))]
+             for i in range(me.faces_count())]
+    mesh = bpy.data.meshes.new(mesh_name)
+    mesh.from_pydata(vertices.tolist(), [], faces)
+    uvmap = mesh.uv_layers.new().data
+    for i in range(me.uvs_count()):
+        uvmap[i].uv = me.uv(i)
+    mesh.update()
+    return mesh
+
+
+def _mesh_array(collection: Any, attr: str, size: int,
+                dtype: Any=np.float32) -> Any:
+    arr = np.empty(len(collection) * size, dtype=dtype)
+    collection.foreach_get(attr, arr)
+    return arr
+
+
+class BuilderMeshTest(unittest.TestCase):
+    def test_same_mesh_as_per_item_version(self):
+        builder = FBLoader.get_builder()
+        old_mesh = _old_builder_mesh(builder, 'perf_old_mesh')
+        new_mesh = FBLoader.get_builder_mesh(builder, 'perf_new_mesh')
+
+        self.assertEqual(len(new_mesh.vertices), len(old_mesh.vertices))
+        self.assertEqual(len(new_mesh.polygons), len(old_mesh.polygons))
+        self.assertEqual(len(new_mesh.edges), len(old_mesh.edges))
+        self.assertTrue(np.allclose(
+            _mesh_array(new_mesh.vertices, 'co', 3),
+            _mesh_array(old_mesh.vertices, 'co', 3), atol=1.0e-5))
+        self.assertTrue(np.array_equal(
+            _mesh_array(new_mesh.loops, 'vertex_index', 1, np.int32),
+            _mesh_array(old_mesh.loops, 'vertex_index', 1, np.int32)))
+        self.assertTrue(np.allclose(
+            _mesh_array(new_mesh.uv_layers[0].data, 'uv', 2),
+            _mesh_array(old_mesh.uv_layers[0].data, 'uv', 2)))
+
+        old_time = _best_time(lambda: bpy.data.meshes.remove(
+            _old_builder_mesh(builder, 'perf_old_mesh')))
+        new_time = _best_time(lambda: bpy.data.meshes.remove(
+            FBLoader.get_builder_mesh(builder, 'perf_new_mesh')))
+        _log_output(f'FB builder mesh with {len(new_mesh.vertices)} vertices: '
+                    f'old {1000 * old_time:.1f} ms new {1000 * new_time:.1f} ms')
+        bpy.data.meshes.remove(old_mesh)
+        bpy.data.meshes.remove(new_mesh)
+
+
+def _old_transfer_shape_keys(from_mesh: Any, obj: Any) -> None:
+    for kb in from_mesh.shape_keys.key_blocks:
+        shape = obj.shape_key_add(name=kb.name)
+        count = len(kb.data)
+        verts = np.empty((count, 3), dtype=np.float32)
+        kb.data.foreach_get('co', np.reshape(verts, count * 3))
+        shape.data.foreach_set('co', verts.ravel())
+        shape.value = kb.value
+
+
+def _shape_keys_verts(mesh: Any) -> Any:
+    return np.array([_mesh_array(kb.data, 'co', 3)
+                     for kb in mesh.shape_keys.key_blocks])
+
+
+class ShapeKeysTransferTest(unittest.TestCase):
+    def _source_object(self, count: int) -> Any:
+        obj = _create_grid_object(PerfTestConfig.shape_keys_grid_subdivisions)
+        obj.shape_key_add(name='Basis')
+        vert_count = len(obj.data.vertices)
+        for i in range(count):
+            shape = obj.shape_key_add(name=f'shape_{i}', from_mix=False)
+            shape.data.foreach_set(
+                'co', np.random.rand(vert_count * 3).astype(np.float32))
+            shape.value = i / count
+        return obj
+
+    def test_stacked_transfer(self):
+        for count in PerfTestConfig.shape_keys_counts:
+            source = self._source_object(count)
+            target = bpy.data.objects.new('perf_shape_keys_target',
+                                          source.data.copy())
+            target.shape_key_clear()
+
+            transfer_shape_keys(source.data, target)
+            key_blocks = target.data.shape_keys.key_blocks
+            self.assertEqual([kb.name for kb in key_blocks],
+                             [kb.name for kb in
+                              source.data.shape_keys.key_blocks])
+            self.assertAlmostEqual(key_blocks[-1].value,
+                                   (count - 1) / count, places=5)
+            self.assertTrue(np.array_equal(_shape_keys_verts(target.data),
+                                           _shape_keys_verts(source.data)))
+
+            def _old():
+                target.shape_key_clear()
+                _old_transfer_shape_keys(source.data, target)
+
+            def _new():
+                target.shape_key_clear()
+                transfer_shape_keys(source.data, target)
+
+            old_time = _best_time(_old, 3)
+            new_time = _best_time(_new, 3)
+            _log_output(f'{count} shape keys transfer for '
+                        f'{len(source.data.vertices)} vertices: '
+                        f'old {1000 * old_time:.1f} ms '
+                        f'new {1000 * new_time:.1f} ms')
+            mesh = target.data
+            bpy.data.objects.remove(target)
+            bpy.data.meshes.remove(mesh)
+            bpy.data.objects.remove(source)
+
+
+if __name__ == '__main__':
+    try:
+        from teamcity import is_running_under_teamcity
+        from teamcity.unittestpy import TeamcityTestRunner
+        runner = TeamcityTestRunner()
+        _log_output('Teamcity TeamcityTestRunner is active')
+    except ImportError:
+        _log_error('ImportError: Teamcity is not installed')
+        runner = unittest.TextTestRunner()
+        _log_error('Unittest TextTestRunner is active')
+    except Exception:
+        _log_error('Unhandled error with Teamcity')
+        runner = unittest.TextTestRunner()
+        _log_error('Unittest TextTestRunner is active')
+
+    # unittest.main()  # -- Doesn't work with Blender, so we use Suite
+    suite = unittest.TestSuite()
+    for test_case in (ColorTransformTest, CompactPixelsTest,
+                      PixelBufferPoolTest, ToneMappingCacheTest,
+                      WireframeTopologyCacheTest,
+                      LitEdgesTest, ShaderAttributesTest, CoordsArrayTest,
+                      ScreenPinsTest, SurfacePointsTest,
+                      BatchSchedulerTest, CameraBorderTest,
+                      WireframeLodTest, FBEdgeIndicesTest,
+                      BuilderMeshTest, ShapeKeysTransferTest,
+                      FacsBlendshapesTest, SerialStorageTest,
+                      LazyLoggingTest, DragUpdatesTest, GTDeltaMovePinTest,
+                      ProfilerTest):
+        suite.addTests(
+            unittest.defaultTestLoader.loadTestsFromTestCase(test_case))
+    result = runner.run(suite)
+
+    _log_output('Results: {}'.format(result))
+    if len(result.errors) != 0 or len(result.failures) != 0:
+        # For non-zero blender exit code in conjuction with command line option
+        # --python-exit-code <code>
+        raise Exception(f'Performance Test errors: {result.errors} '
+                        f'failures: {result.failures}')